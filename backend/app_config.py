@@ -20,13 +20,18 @@ app = Flask(
 )
 
 # ========== Database Configuration ==========
-DB_PATH = 'sqlite:///hospital.db'
+# DATABASE_URL lets scripts and benchmarks point at a scratch database
+DB_PATH = os.environ.get('DATABASE_URL', 'sqlite:///hospital.db')
 app.config['SQLALCHEMY_DATABASE_URI'] = DB_PATH
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # Initialize database
 db.init_app(app)
 
+# ========== Public URL ==========
+# Where users reach this app; links in emails and chat messages start with it
+app.config['PUBLIC_BASE_URL'] = os.environ.get('PUBLIC_BASE_URL', 'http://localhost:5000').rstrip('/')
+
 # ========== JWT Configuration ==========
 # TODO: Move secret key to environment variable for production
 JWT_SECRET = os.environ.get('JWT_SECRET', 'super-secret-key')
@@ -38,7 +43,8 @@ jwt = JWTManager(app)
 CORS(
     app,
     supports_credentials=True,
-    allow_headers=['Content-Type', 'Authorization']
+    allow_headers=['Content-Type', 'Authorization', 'Idempotency-Key'],
+    expose_headers=['Idempotent-Replayed']
 )
 
 # ========== Redis & Celery Configuration ==========
@@ -63,23 +69,29 @@ celery.Task = FlaskContextTask
 # Define periodic tasks schedule
 # NOTE: Using intervals for testing; switch to crontab for production
 BEAT_SCHEDULE = {
-    'send-daily-appointment-reminders': {
+    # Each booking writes its own reminder to the outbox (services/reminders.py);
+    # this sweep adds any that are missing for bookings in the next day
+    'sweep-appointment-reminders': {
         'task': 'tasks.send_daily_reminders',
-        'schedule': 60.0,  # Every 60 seconds (testing mode)
-        # Production: 'schedule': crontab(hour=8, minute=0)
+        'schedule': 3600.0,  # Every hour
     },
     'generate-monthly-reports': {
         'task': 'tasks.send_monthly_report',
         'schedule': 120.0,  # Every 120 seconds (testing mode)
         # Production: 'schedule': crontab(day_of_month=1, hour=9, minute=0)
     },
+    # Tasks only queue notifications in the outbox table; this delivers them
+    'dispatch-notification-outbox': {
+        'task': 'tasks.dispatch_notifications',
+        'schedule': 10.0,  # Every 10 seconds
+    },
 }
 
 app.config['beat_schedule'] = BEAT_SCHEDULE
 celery.conf.beat_schedule = BEAT_SCHEDULE
 
 # ========== Caching Configuration ==========
-app.config['CACHE_TYPE'] = 'RedisCache'
+app.config['CACHE_TYPE'] = os.environ.get('CACHE_TYPE', 'RedisCache')
 app.config['CACHE_REDIS_URL'] = REDIS_URL
 app.config['CACHE_DEFAULT_TIMEOUT'] = 300  # Cache timeout: 5 minutes
 
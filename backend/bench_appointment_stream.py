@@ -0,0 +1,108 @@
+"""
+Appointment Export Memory Benchmark
+Compares peak RSS of GET /api/admin/appointments returning the whole list
+as one JSON document against the streaming ?format=ndjson / ?format=csv
+modes.
+
+Each mode runs in its own process so peak RSS is measured independently:
+    python bench_appointment_stream.py [rows]      (default 1,000,000)
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import resource
+import tempfile
+import subprocess
+from datetime import date, timedelta
+
+MODES = ['list', 'ndjson', 'csv']
+
+
+def seed(db_path, row_count):
+    """Create the schema through the app, then bulk insert rows with sqlite3."""
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ.setdefault('CACHE_TYPE', 'NullCache')
+    from main import app
+    from models.models import db
+
+    with app.app_context():
+        db.create_all()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO user (id, username, email, password, role, is_blacklisted) "
+                 "VALUES (1, 'admin', 'admin@bench.local', 'x', 'Admin', 0)")
+    doctors = 200
+    patients = 5000
+    conn.executemany(
+        "INSERT INTO user (id, username, email, password, role, is_blacklisted) VALUES (?, ?, ?, 'x', ?, 0)",
+        [(10 + i, f'doctor_{i}', f'doctor{i}@bench.local', 'Doctor') for i in range(doctors)] +
+        [(10 + doctors + i, f'patient_{i}', f'patient{i}@bench.local', 'Patient') for i in range(patients)]
+    )
+    conn.executemany("INSERT INTO doctor (id, user_id, doctor_id, specialization) VALUES (?, ?, ?, 'General')",
+                     [(i + 1, 10 + i, f'DOC-{i}') for i in range(doctors)])
+    conn.executemany("INSERT INTO patient (id, user_id) VALUES (?, ?)",
+                     [(i + 1, 10 + doctors + i) for i in range(patients)])
+
+    start = date(2015, 1, 1)
+    batch = []
+    for i in range(row_count):
+        # Spread rows so (doctor, date, time) stays unique for active bookings
+        day = start + timedelta(days=i // (doctors * 2))
+        batch.append((i % doctors + 1, i % patients + 1, day.isoformat(),
+                      '10:00:00.000000' if (i // doctors) % 2 == 0 else '18:00:00.000000', 'Completed'))
+        if len(batch) == 50000:
+            conn.executemany("INSERT INTO appointment (doctor_id, patient_id, date, time, status) "
+                             "VALUES (?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO appointment (doctor_id, patient_id, date, time, status) "
+                         "VALUES (?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    conn.close()
+
+
+def run_child(mode, db_path):
+    """Call the endpoint once in this process and report bytes, time and peak RSS."""
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ.setdefault('CACHE_TYPE', 'NullCache')
+    from flask_jwt_extended import create_access_token
+    from main import app
+
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={'role': 'Admin'})
+
+    client = app.test_client()
+    url = '/api/admin/appointments' if mode == 'list' else f'/api/admin/appointments?format={mode}'
+    started = time.perf_counter()
+    response = client.get(url, headers={'Authorization': f'Bearer {token}'}, buffered=False)
+    total_bytes = 0
+    for chunk in response.response:
+        total_bytes += len(chunk)
+    response.close()
+    elapsed = time.perf_counter() - started
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    print(f"{mode:>8} {response.status_code:>6} {total_bytes / 1e6:>10.1f} {elapsed:>8.1f} {peak_mb:>10.1f}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        run_child(sys.argv[2], sys.argv[3])
+        return
+
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    db_path = os.path.join(tempfile.mkdtemp(prefix='appt_stream_'), 'bench.db')
+
+    print(f"Seeding {row_count:,} appointments into {db_path}...")
+    seed(db_path, row_count)
+
+    print(f"{'mode':>8} {'status':>6} {'MB out':>10} {'sec':>8} {'peak RSS':>10}")
+    for mode in MODES:
+        subprocess.run([sys.executable, '-W', 'ignore', os.path.abspath(__file__), '--child', mode, db_path],
+                       check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+if __name__ == '__main__':
+    main()
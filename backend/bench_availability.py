@@ -0,0 +1,72 @@
+"""
+Availability Benchmark
+Shows that GET /patient/doctors/<id>/availability issues a flat number of
+SQL statements regardless of the requested window size.
+
+Runs against a scratch in-memory database, so it is safe to run anywhere:
+    python bench_availability.py
+"""
+
+import os
+import time
+from datetime import date, time as dtime, timedelta
+
+# Point the app at a scratch database before it is configured
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+from main import app
+from models.models import db, User, Doctor, DoctorSlot, Patient, Appointment
+
+
+def seed(days=90):
+    """Create one doctor with availability and bookings across the window."""
+    doctor_user = User(username='bench_doctor', email='doc@bench.local', password='x', role='Doctor')
+    patient_user = User(username='bench_patient', email='pat@bench.local', password='x', role='Patient')
+    db.session.add_all([doctor_user, patient_user])
+    db.session.flush()
+
+    today = date.today()
+    doctor = Doctor(user_id=doctor_user.id, doctor_id='BENCH-1', specialization='Cardiology')
+    patient = Patient(user_id=patient_user.id)
+    db.session.add_all([doctor, patient])
+    db.session.flush()
+
+    for i in range(days):
+        for slot in ('morning', 'evening'):
+            db.session.add(DoctorSlot(doctor_id=doctor.id, date=today + timedelta(days=i), slot=slot))
+    for i in range(0, days, 2):
+        db.session.add(Appointment(doctor_id=doctor.id, patient_id=patient.id,
+                                   date=today + timedelta(days=i), time=dtime(10, 0), status='Booked'))
+    db.session.commit()
+    return doctor.id, patient_user.id
+
+
+def main():
+    with app.app_context():
+        db.create_all()
+        doctor_id, patient_user_id = seed()
+        token = create_access_token(identity=str(patient_user_id), additional_claims={'role': 'Patient'})
+        headers = {'Authorization': f'Bearer {token}'}
+
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda *args, **kwargs: statements.append(1))
+
+        client = app.test_client()
+        print(f"{'days':>6} {'queries':>8} {'ms':>8}")
+        for window in (7, 14, 30, 60, 90):
+            db.session.remove()  # start each request with an empty identity map
+            statements.clear()
+            started = time.perf_counter()
+            response = client.get(f'/patient/doctors/{doctor_id}/availability?days={window}', headers=headers)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            assert response.status_code == 200, response.get_json()
+            assert len(response.get_json()['availability']) == window
+            print(f"{window:>6} {len(statements):>8} {elapsed_ms:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
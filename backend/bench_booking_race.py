@@ -0,0 +1,110 @@
+"""
+Concurrent Booking Load Test
+Fires many simultaneous POST /patient/appointments/book requests for the
+same doctor slot from different patients and checks that exactly one
+succeeds while every other request gets a 409.
+
+Uses a scratch SQLite file so that each worker gets its own connection:
+    python bench_booking_race.py [workers] [rounds]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+# Point the app at a scratch database before it is configured
+SCRATCH_DIR = tempfile.mkdtemp(prefix='booking_race_')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(SCRATCH_DIR, 'race.db')}")
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from flask_jwt_extended import create_access_token
+from main import app
+from models.models import db, User, Doctor, Patient, Appointment
+
+
+def seed(worker_count):
+    """Create one doctor and one patient per worker."""
+    doctor_user = User(username='race_doctor', email='doc@race.local', password='x', role='Doctor')
+    db.session.add(doctor_user)
+    db.session.flush()
+    doctor = Doctor(user_id=doctor_user.id, doctor_id='RACE-1', specialization='Cardiology')
+    db.session.add(doctor)
+
+    patient_user_ids = []
+    for i in range(worker_count):
+        user = User(username=f'race_patient_{i}', email=f'pat{i}@race.local', password='x', role='Patient')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Patient(user_id=user.id))
+        patient_user_ids.append(user.id)
+
+    db.session.commit()
+    return doctor.id, patient_user_ids
+
+
+def run_round(doctor_id, tokens, booking_date):
+    """Release all workers at once against the same slot; return status counts."""
+    barrier = threading.Barrier(len(tokens))
+    statuses = []
+    lock = threading.Lock()
+
+    def worker(token):
+        client = app.test_client()
+        payload = {'doctor_id': doctor_id, 'date': booking_date.strftime('%d/%m/%Y'), 'time_slot': 'morning'}
+        barrier.wait()
+        response = client.post('/patient/appointments/book', json=payload,
+                               headers={'Authorization': f'Bearer {token}'})
+        with lock:
+            statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=worker, args=(token,)) for token in tokens]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return Counter(statuses)
+
+
+def main():
+    worker_count = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    round_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    with app.app_context():
+        db.create_all()
+        doctor_id, patient_user_ids = seed(worker_count)
+        tokens = [
+            create_access_token(identity=str(user_id), additional_claims={'role': 'Patient'})
+            for user_id in patient_user_ids
+        ]
+
+    print(f"{worker_count} workers x {round_count} rounds against one slot per round")
+    failures = 0
+    started = time.perf_counter()
+    for round_number in range(round_count):
+        booking_date = date.today() + timedelta(days=round_number + 1)
+        statuses = run_round(doctor_id, tokens, booking_date)
+
+        with app.app_context():
+            active = Appointment.query.filter(
+                Appointment.doctor_id == doctor_id,
+                Appointment.date == booking_date,
+                Appointment.status != 'Cancelled'
+            ).count()
+
+        ok = statuses.get(201, 0) == 1 and statuses.get(409, 0) == worker_count - 1 and active == 1
+        failures += 0 if ok else 1
+        print(f"  round {round_number + 1}: {dict(statuses)} active rows={active} {'OK' if ok else 'FAIL'}")
+
+    elapsed = time.perf_counter() - started
+    total_requests = worker_count * round_count
+    print(f"{total_requests} requests in {elapsed:.2f}s ({total_requests / elapsed:.0f} req/s)")
+    print("PASS" if failures == 0 else f"FAIL ({failures} rounds)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Bulk Export Benchmark
+Exports every patient's treatment history with services/bulk_export.py
+and reports patients/second and rows/second for each worker count.
+
+Worker processes need a database they can all open, so the benchmark
+seeds a scratch SQLite file (not the in-memory database other benchmarks
+use) and writes archives to a scratch export directory.
+
+Run:
+    python bench_bulk_export.py [patients] [visits_per_patient] [workers,...]   (default 5,000 / 20 / 1,2,4,8)
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import tempfile
+import zipfile
+from datetime import date, time as clock, timedelta
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix='bench_bulk_export_')
+
+# Scratch database file (shared by worker processes), export directory and no Redis
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(SCRATCH_DIR, 'bench.db')}"
+os.environ['EXPORT_DIR'] = os.path.join(SCRATCH_DIR, 'exports')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from main import app
+from models.models import db, User, Doctor, Patient, Appointment, Treatment
+from services.bulk_export import run_bulk_export, archive_path
+
+DOCTORS = 50
+VISIT_TYPES = ['OPD', 'Follow-up', 'Emergency', 'Teleconsult']
+
+
+def seed(patient_count, visits_per_patient):
+    db.create_all()
+    rng = random.Random(11)
+    users = [{'id': i + 1, 'username': f'doctor_{i}', 'email': f'doctor{i}@bench.local', 'password': 'x', 'role': 'Doctor'}
+             for i in range(DOCTORS)]
+    users += [{'id': DOCTORS + i + 1, 'username': f'patient_{i}', 'email': f'patient{i}@bench.local', 'password': 'x',
+               'role': 'Patient'} for i in range(patient_count)]
+    db.session.execute(User.__table__.insert(), users)
+    db.session.execute(Doctor.__table__.insert(), [
+        {'id': i + 1, 'user_id': i + 1, 'doctor_id': f'DOC-{i}', 'specialization': 'General'} for i in range(DOCTORS)
+    ])
+    db.session.execute(Patient.__table__.insert(), [
+        {'id': i + 1, 'user_id': DOCTORS + i + 1} for i in range(patient_count)
+    ])
+
+    appointment_id = 0
+    first_day = date(2015, 1, 1)
+    for start in range(0, patient_count, 1000):
+        appointments, treatments = [], []
+        for patient_id in range(start + 1, min(start + 1000, patient_count) + 1):
+            for visit in range(visits_per_patient):
+                appointment_id += 1
+                appointments.append({
+                    'id': appointment_id, 'doctor_id': rng.randint(1, DOCTORS), 'patient_id': patient_id,
+                    # Unique (doctor, date, time) per appointment
+                    'date': first_day + timedelta(days=appointment_id // 8), 'time': clock(9 + appointment_id % 8),
+                    'status': 'Completed'
+                })
+                treatments.append({
+                    'appointment_id': appointment_id, 'diagnosis': f'Diagnosis {visit}', 'prescription': 'Rest',
+                    'notes': json.dumps({
+                        'visitType': rng.choice(VISIT_TYPES), 'testDone': 'CBC',
+                        'medicines': [{'name': 'Paracetamol', 'dosage': '500mg'}, {'name': 'ORS', 'dosage': ''}],
+                        'notes': 'Review in two weeks'
+                    })
+                })
+        db.session.execute(Appointment.__table__.insert(), appointments)
+        db.session.execute(Treatment.__table__.insert(), treatments)
+    db.session.commit()
+    return appointment_id
+
+
+def main():
+    patient_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    visits_per_patient = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    worker_counts = [int(n) for n in sys.argv[3].split(',')] if len(sys.argv) > 3 else [1, 2, 4, 8]
+
+    try:
+        with app.app_context():
+            started = time.perf_counter()
+            rows = seed(patient_count, visits_per_patient)
+            print(f"Seeded {patient_count:,} patients / {rows:,} visits in {time.perf_counter() - started:.1f}s "
+                  f"({os.cpu_count()} CPUs)")
+
+            print(f"{'workers':>8} {'sec':>7} {'patients/s':>11} {'rows/s':>9} {'archive MB':>11}")
+            for workers in worker_counts:
+                started = time.perf_counter()
+                result = run_bulk_export(export_format='csv', compress=True, workers=workers)
+                elapsed = time.perf_counter() - started
+
+                path = archive_path(result['filename'])
+                with zipfile.ZipFile(path) as archive:
+                    manifest = json.loads(archive.read('manifest.json'))
+                    assert len(archive.namelist()) == patient_count + 1
+                assert manifest['rows'] == rows
+                os.remove(path)
+
+                print(f"{workers:>8} {elapsed:>7.2f} {patient_count / elapsed:>11,.0f} {rows / elapsed:>9,.0f} "
+                      f"{result['size_bytes'] / 1024 / 1024:>11.1f}")
+    finally:
+        shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
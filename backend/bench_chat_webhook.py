@@ -0,0 +1,107 @@
+"""
+Google Chat Webhook Benchmark
+Delivers reminder-sized messages to a local HTTP stand-in for the Google
+Chat webhook and reports messages/second for:
+  - requests.post per message (previous implementation, new connection each time)
+  - pooled client, one post per message
+  - pooled client with coalescing (send_many)
+
+The stand-in can fail a share of requests with 503 to exercise retries.
+
+Run:
+    python bench_chat_webhook.py [messages] [failure_rate]    (default 2000, 0.0)
+"""
+
+import sys
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from services.chat_webhook import ChatWebhookClient
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Accepts webhook posts and counts the messages inside them."""
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+    # Send headers and body in one segment (avoids Nagle/delayed-ACK stalls on keep-alive)
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server = self.server
+        if random.random() < server.failure_rate:
+            self._reply(503, b'{"error": "unavailable"}')
+            return
+        text = json.loads(body)['text']
+        with server.lock:
+            server.posts += 1
+            server.messages += text.count('*Daily Reminder*')
+        self._reply(200, b'{}')
+
+    def _reply(self, status, payload):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stand_in(failure_rate):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.failure_rate = failure_rate
+    server.lock = threading.Lock()
+    server.posts = server.messages = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def reminder_messages(count):
+    return [
+        f"🔔 *Daily Reminder*\nHi Patient {i}, don't forget your appointment with Dr. Doctor {i % 40} today at 10:00!"
+        for i in range(count)
+    ]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    failure_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    messages = reminder_messages(count)
+
+    def unpooled(url):
+        for message in messages:
+            requests.post(url, headers={'Content-Type': 'application/json; charset=UTF-8'},
+                          data=json.dumps({'text': message}))
+
+    def pooled(url):
+        client = ChatWebhookClient(url, backoff_base=0.01)
+        for message in messages:
+            client.post(message)
+        client.close()
+
+    def coalesced(url):
+        client = ChatWebhookClient(url, backoff_base=0.01)
+        client.send_many(messages)
+        client.close()
+
+    print(f"{count:,} messages, stand-in failure rate {failure_rate:.0%}")
+    print(f"{'mode':>24} {'sec':>7} {'msg/s':>9} {'posts':>6} {'delivered':>10}")
+    for label, run in (('requests.post each', unpooled), ('pooled client', pooled), ('pooled + coalesced', coalesced)):
+        server = start_stand_in(failure_rate)
+        url = f'http://127.0.0.1:{server.server_address[1]}/v1/spaces/test/messages'
+        started = time.perf_counter()
+        run(url)
+        elapsed = time.perf_counter() - started
+        server.shutdown()
+        print(f"{label:>24} {elapsed:>7.2f} {count / elapsed:>9,.0f} {server.posts:>6} {server.messages:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Daily Reminder Benchmark
+Compares recipient resolution for the reminder sweep
+(tasks.send_daily_reminders): the old four query.get() calls per
+appointment against the single joined query.
+
+Run:
+    python bench_daily_reminders.py [appointments]      (default 20,000)
+"""
+
+import os
+import sys
+import time
+from datetime import date, time as clock
+
+# Use a scratch in-memory database and no Redis for the benchmark
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from main import app
+from models.models import db, User, Doctor, Patient, Appointment
+from services.reminders import reminder_recipients
+from tasks import REMINDER_CHUNK_SIZE
+
+DOCTORS = 400
+
+
+def seed(appointment_count):
+    db.create_all()
+    patients = appointment_count
+    db.session.execute(User.__table__.insert(), [
+        {'id': i + 1, 'username': f'doctor_{i}', 'email': f'doctor{i}@bench.local', 'password': 'x', 'role': 'Doctor'}
+        for i in range(DOCTORS)
+    ] + [
+        {'id': DOCTORS + i + 1, 'username': f'patient_{i}', 'email': f'patient{i}@bench.local',
+         'password': 'x', 'role': 'Patient'}
+        for i in range(patients)
+    ])
+    db.session.execute(Doctor.__table__.insert(), [
+        {'id': i + 1, 'user_id': i + 1, 'doctor_id': f'DOC-{i}', 'specialization': 'General'} for i in range(DOCTORS)
+    ])
+    db.session.execute(Patient.__table__.insert(), [
+        {'id': i + 1, 'user_id': DOCTORS + i + 1} for i in range(patients)
+    ])
+    db.session.execute(Appointment.__table__.insert(), [
+        {'doctor_id': i % DOCTORS + 1, 'patient_id': i + 1, 'date': date.today(),
+         'time': clock(8 + (i // DOCTORS) // 60 % 13, (i // DOCTORS) % 60), 'status': 'Booked'}
+        for i in range(appointment_count)
+    ])
+    db.session.commit()
+
+
+def per_row_lookups():
+    """The previous implementation's recipient resolution."""
+    recipients = []
+    for appt in Appointment.query.filter_by(date=date.today(), status='Booked').all():
+        patient = Patient.query.get(appt.patient_id)
+        user = User.query.get(patient.user_id)
+        doctor = Doctor.query.get(appt.doctor_id)
+        doctor_user = User.query.get(doctor.user_id)
+        recipients.append((user.email, doctor_user.username, appt.time))
+    return recipients
+
+
+def main():
+    appointment_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    with app.app_context():
+        seed(appointment_count)
+
+        for label, resolve in (('query.get per row', per_row_lookups),
+                               ('joined query', lambda: reminder_recipients(date.today(), date.today()))):
+            db.session.expunge_all()
+            started = time.perf_counter()
+            rows = len(resolve())
+            elapsed = time.perf_counter() - started
+            print(f"{label:>18}: {rows:,} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+
+        print(f"Fan-out: {-(-appointment_count // REMINDER_CHUNK_SIZE)} subtasks of {REMINDER_CHUNK_SIZE}")
+
+
+if __name__ == '__main__':
+    main()
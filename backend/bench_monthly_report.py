@@ -0,0 +1,69 @@
+"""
+Monthly Report Benchmark
+Times the per-doctor statistics behind tasks.send_monthly_report for a
+month of bookings across many doctors.
+
+Run:
+    python bench_monthly_report.py [doctors] [appointments]   (default 2,000 / 200,000)
+"""
+
+import os
+import sys
+import time
+import random
+from datetime import date, time as clock
+
+# Use a scratch in-memory database and no Redis for the benchmark
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from main import app
+from models.models import db, User, Doctor, Patient, Appointment
+from services.reports import monthly_doctor_stats, previous_month
+
+STATUSES = ['Booked', 'Completed', 'Completed', 'Completed', 'Cancelled']
+
+
+def seed(doctor_count, appointment_count, start, end):
+    db.create_all()
+    rng = random.Random(3)
+    days = (end - start).days
+    db.session.execute(User.__table__.insert(), [
+        {'id': i + 1, 'username': f'doctor_{i}', 'email': f'doctor{i}@bench.local', 'password': 'x', 'role': 'Doctor'}
+        for i in range(doctor_count)
+    ] + [{'id': doctor_count + 1, 'username': 'patient', 'email': 'p@bench.local', 'password': 'x', 'role': 'Patient'}])
+    db.session.execute(Doctor.__table__.insert(), [
+        {'id': i + 1, 'user_id': i + 1, 'doctor_id': f'DOC-{i}', 'specialization': 'General'}
+        for i in range(doctor_count)
+    ])
+    db.session.execute(Patient.__table__.insert(), [{'id': 1, 'user_id': doctor_count + 1}])
+    db.session.execute(Appointment.__table__.insert(), [
+        {'doctor_id': i % doctor_count + 1, 'patient_id': 1,
+         'date': date.fromordinal(start.toordinal() + (i // doctor_count) % days),
+         # Unique minute per (doctor, day) keeps the active-slot index happy
+         'time': clock(8 + (i // (doctor_count * days)) // 60 % 13, (i // (doctor_count * days)) % 60),
+         'status': rng.choice(STATUSES)}
+        for i in range(appointment_count)
+    ])
+    db.session.commit()
+
+
+def main():
+    doctor_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    appointment_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    start, end = previous_month()
+
+    with app.app_context():
+        seed(doctor_count, appointment_count, start, end)
+
+        started = time.perf_counter()
+        report = monthly_doctor_stats(start, end)
+        elapsed = time.perf_counter() - started
+
+        busiest = max(report, key=lambda stats: stats['total'])
+        print(f"{len(report):,} doctors, {appointment_count:,} appointments in {start:%B %Y}: {elapsed:.2f}s")
+        print(f"Example: {busiest}")
+
+
+if __name__ == '__main__':
+    main()
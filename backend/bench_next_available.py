@@ -0,0 +1,103 @@
+"""
+Next Available Slot Benchmark
+Measures GET /patient/doctors/next-available latency with 500 doctors
+offering both slots every day over a 30-day horizon, with most of the
+earliest slots already booked so the search has to skip past them.
+
+Runs against a scratch in-memory database:
+    python bench_next_available.py [doctors] [requests]
+"""
+
+import os
+import sys
+import time
+import random
+from datetime import date, time as dtime, timedelta
+
+# Point the app at a scratch database before it is configured
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from flask_jwt_extended import create_access_token
+from main import app
+from models.models import db, User, Doctor, DoctorSlot, Patient, Appointment
+
+SPECIALIZATIONS = ['Cardiology', 'Oncology', 'Neurology', 'Orthopedics', 'General Medicine']
+HORIZON_DAYS = 30
+
+
+def seed(doctor_count):
+    """Create doctors, their slots for the horizon and a heavy booking load."""
+    random.seed(42)
+    today = date.today()
+
+    patient_user = User(username='bench_patient', email='pat@bench.local', password='x', role='Patient')
+    db.session.add(patient_user)
+    db.session.flush()
+    patient = Patient(user_id=patient_user.id)
+    db.session.add(patient)
+    db.session.flush()
+
+    slot_rows = []
+    booking_rows = []
+    for i in range(doctor_count):
+        user = User(username=f'bench_doctor_{i}', email=f'doc{i}@bench.local', password='x',
+                    role='Doctor', is_blacklisted=(i % 50 == 0))
+        db.session.add(user)
+        db.session.flush()
+        doctor = Doctor(user_id=user.id, doctor_id=f'BENCH-{i}',
+                        specialization=SPECIALIZATIONS[i % len(SPECIALIZATIONS)])
+        db.session.add(doctor)
+        db.session.flush()
+
+        for day in range(HORIZON_DAYS):
+            slot_date = today + timedelta(days=day)
+            for slot, booking_time in (('morning', dtime(10, 0)), ('evening', dtime(18, 0))):
+                slot_rows.append({'doctor_id': doctor.id, 'date': slot_date, 'slot': slot})
+                # First week is almost fully booked, later weeks partly booked
+                if random.random() < (0.97 if day < 7 else 0.5):
+                    booking_rows.append({'doctor_id': doctor.id, 'patient_id': patient.id,
+                                         'date': slot_date, 'time': booking_time, 'status': 'Booked'})
+
+    db.session.bulk_insert_mappings(DoctorSlot, slot_rows)
+    db.session.bulk_insert_mappings(Appointment, booking_rows)
+    db.session.commit()
+    return patient_user.id, len(slot_rows), len(booking_rows)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    doctor_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    request_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    with app.app_context():
+        db.create_all()
+        patient_user_id, slot_count, booking_count = seed(doctor_count)
+        print(f"Seeded {doctor_count} doctors, {slot_count} slots, {booking_count} bookings")
+
+        token = create_access_token(identity=str(patient_user_id), additional_claims={'role': 'Patient'})
+        headers = {'Authorization': f'Bearer {token}'}
+        client = app.test_client()
+
+        queries = [''] + [f'department={name.split()[0].lower()}' for name in SPECIALIZATIONS]
+        samples = []
+        for i in range(request_count):
+            url = f'/patient/doctors/next-available?limit=10&{queries[i % len(queries)]}'
+            started = time.perf_counter()
+            response = client.get(url, headers=headers)
+            samples.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.get_json()
+
+        print(f"requests: {request_count}")
+        print(f"p50: {percentile(samples, 50):.2f} ms")
+        print(f"p95: {percentile(samples, 95):.2f} ms")
+        print(f"max: {max(samples):.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
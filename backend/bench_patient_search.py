@@ -0,0 +1,79 @@
+"""
+Patient Search Benchmark
+Compares the previous ILIKE patient search against the in-process trigram
+index used by /api/admin/search/patients.
+
+Run:
+    python bench_patient_search.py [patients]      (default 50,000)
+"""
+
+import os
+import sys
+import time
+import random
+
+# Use a scratch in-memory database and no Redis for the benchmark
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from main import app
+from models.models import db, User, Patient
+from services.patient_search import PatientSearchIndex
+
+QUERIES = ['jhon', 'maria garcai', '98765', 'smtih', 'ann', 'zzzz']
+REPEAT = 20
+
+FIRST_NAMES = ['john', 'maria', 'arjun', 'neha', 'fatima', 'li', 'omar', 'annabelle', 'sara', 'david']
+LAST_NAMES = ['smith', 'garcia', 'rao', 'khan', 'patel', 'chen', 'iyer', 'brown', 'lee', 'doe']
+
+
+def seed(count):
+    db.create_all()
+    rng = random.Random(7)
+    db.session.execute(User.__table__.insert(), [
+        {'id': i + 1, 'username': f'{rng.choice(FIRST_NAMES)}_{rng.choice(LAST_NAMES)}_{i}',
+         'email': f'patient{i}@mail.com', 'password': 'x', 'role': 'Patient'}
+        for i in range(count)
+    ])
+    db.session.execute(Patient.__table__.insert(), [
+        {'id': i + 1, 'user_id': i + 1, 'contact_info': f'9{rng.randrange(10 ** 9):09d}'}
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def ilike_search(query_str):
+    """The previous endpoint query."""
+    return Patient.query.filter(
+        (Patient.user.has(User.username.ilike(f'%{query_str}%'))) |
+        (Patient.user.has(User.email.ilike(f'%{query_str}%'))) |
+        (Patient.contact_info.ilike(f'%{query_str}%'))
+    ).all()
+
+
+def time_ms(func, query_str):
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        result = func(query_str)
+    return (time.perf_counter() - started) * 1000 / REPEAT, len(result)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    with app.app_context():
+        seed(count)
+        index = PatientSearchIndex()
+
+        started = time.perf_counter()
+        index.search('warmup')
+        print(f"Index built for {count:,} patients in {time.perf_counter() - started:.2f}s")
+
+        print(f"{'query':>14} {'ILIKE ms':>10} {'hits':>6} {'index ms':>10} {'hits':>6}")
+        for query_str in QUERIES:
+            ilike_ms, ilike_hits = time_ms(ilike_search, query_str)
+            index_ms, index_hits = time_ms(index.search, query_str)
+            print(f"{query_str:>14} {ilike_ms:>10.2f} {ilike_hits:>6} {index_ms:>10.2f} {index_hits:>6}")
+
+
+if __name__ == '__main__':
+    main()
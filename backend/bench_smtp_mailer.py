@@ -0,0 +1,172 @@
+"""
+SMTP Mailer Benchmark
+Sends reminder emails to a local stand-in SMTP server and reports
+messages/second for:
+  - a new connection + login per email (previous commented-out approach)
+  - the connection pool with a single connection
+  - the connection pool with SMTP_MAX_CONNECTIONS concurrent connections
+
+Uses aiosmtpd as the stand-in when it is installed, otherwise a minimal
+threaded SMTP responder defined here. The built-in stand-in can delay each
+reply to mimic a remote relay's round-trip time.
+
+Run:
+    python bench_smtp_mailer.py [messages] [connections] [latency_ms]    (default 1000, 4, 2)
+"""
+
+import sys
+import time
+import smtplib
+import threading
+import socketserver
+
+from services.mailer import SMTPConnectionPool, EmailTemplate, build_message
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    Controller = None
+
+
+# ---------- Built-in stand-in ----------
+
+class StandInSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough ESMTP for smtplib: EHLO, AUTH PLAIN, MAIL, RCPT, DATA, RSET, NOOP, QUIT."""
+    # Replies go out immediately (avoids Nagle/delayed-ACK stalls between commands)
+    disable_nagle_algorithm = True
+
+    def reply(self, line):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.wfile.write(line.encode() + b'\r\n')
+        self.wfile.flush()
+
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        self.reply('220 stand-in ESMTP ready')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self.reply('250-stand-in\r\n250-AUTH PLAIN\r\n250 8BITMIME')
+            elif verb == 'HELO':
+                self.reply('250 stand-in')
+            elif verb == 'AUTH':
+                self.reply('235 2.7.0 Authentication successful')
+            elif verb in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                with self.server.lock:
+                    self.server.messages += 1
+                self.reply('250 OK queued')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class StandInServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start_builtin_stand_in(latency):
+    server = StandInServer(('127.0.0.1', 0), StandInSMTPHandler)
+    server.latency = latency
+    server.lock = threading.Lock()
+    server.connections = server.messages = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1], server.shutdown
+
+
+class CountingHandler:
+    """aiosmtpd handler that only counts delivered messages."""
+
+    def __init__(self):
+        self.messages = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return '250 OK queued'
+
+
+def start_stand_in(latency):
+    """Returns (counter object with .messages, port, stop function)"""
+    if Controller is None:
+        return start_builtin_stand_in(latency)
+    handler = CountingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=0, auth_require_tls=False,
+                            auth_exclude_mechanism=[], authenticator=lambda *args: True)
+    controller.start()
+    return handler, controller.server.sockets[0].getsockname()[1], controller.stop
+
+
+# ---------- Benchmark ----------
+
+REMINDER_EMAIL = EmailTemplate(
+    subject="Appointment Reminder: {{ day }}",
+    body=("Hello {{ patient_name }},\n\nYou have an appointment today with "
+          "Dr. {{ doctor_name }} at {{ time }}.\nPlease arrive on time.")
+)
+
+
+def reminder_messages(count):
+    messages = []
+    for i in range(count):
+        subject, body = REMINDER_EMAIL.render(day='2025-01-24', patient_name=f'Patient {i}',
+                                              doctor_name=f'Doctor {i % 40}', time='10:00')
+        messages.append(build_message('hospital@example.com', f'patient{i}@example.com', subject, body))
+    return messages
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    connections = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 2.0) / 1000
+
+    started = time.perf_counter()
+    messages = reminder_messages(count)
+    print(f"Built {count:,} emails in {time.perf_counter() - started:.3f}s (template compiled once)")
+    print(f"Stand-in: {'aiosmtpd' if Controller else f'built-in, {latency * 1000:.0f} ms per reply'}")
+
+    def per_message(port):
+        for message in messages:
+            with smtplib.SMTP('127.0.0.1', port) as smtp:
+                smtp.login('hospital', 'secret')
+                smtp.send_message(message)
+        return count
+
+    def pooled(port, max_connections):
+        pool = SMTPConnectionPool('127.0.0.1', port, username='hospital', password='secret',
+                                  max_connections=max_connections, max_messages_per_connection=count)
+        errors = [error for error in pool.send_many(messages) if error is not None]
+        pool.close()
+        if errors:
+            print(f"  {len(errors)} emails failed, e.g. {errors[0]!r}")
+        return pool.connections_opened
+
+    print(f"{'mode':>28} {'sec':>7} {'msg/s':>9} {'conns':>6} {'received':>9}")
+    modes = (
+        ('connection per email', per_message),
+        ('pool, 1 connection', lambda port: pooled(port, 1)),
+        (f'pool, {connections} connections', lambda port: pooled(port, connections)),
+    )
+    for label, run in modes:
+        counter, port, stop = start_stand_in(latency)
+        started = time.perf_counter()
+        opened = run(port)
+        elapsed = time.perf_counter() - started
+        stop()
+        print(f"{label:>28} {elapsed:>7.2f} {count / elapsed:>9,.0f} {opened:>6} {counter.messages:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Database Migration Script
+Creates the appointment_daily_stat rollup table and backfills it from
+the appointment table.
+
+Safe to re-run at any time: the table is rebuilt from scratch, which also
+repairs drift (e.g. after appointments were edited with raw SQL).
+Use --verify to only compare the rollup against the appointment table.
+"""
+
+import sys
+
+from app_config import app
+from models.models import db, AppointmentDailyStat
+from services.appointment_rollup import grouped_counts
+
+
+def compare_with_appointments():
+    """Return the (date, doctor_id, status) buckets whose rollup count is wrong"""
+    expected = {(d, doc, status): count for d, doc, status, count in db.session.execute(grouped_counts())}
+    actual = {
+        (row.date, row.doctor_id, row.status): row.count
+        for row in AppointmentDailyStat.query.all()
+    }
+    return {
+        key: (actual.get(key, 0), expected.get(key, 0))
+        for key in set(expected) | set(actual)
+        if actual.get(key, 0) != expected.get(key, 0)
+    }
+
+
+def migrate_database(verify_only=False):
+    """Create and backfill appointment_daily_stat"""
+
+    with app.app_context():
+        try:
+            AppointmentDailyStat.__table__.create(db.engine, checkfirst=True)
+            print("[OK] Table 'appointment_daily_stat' is present")
+
+            if verify_only:
+                mismatches = compare_with_appointments()
+                for (day, doctor_id, status), (actual, expected) in sorted(mismatches.items()):
+                    print(f"  - {day} doctor {doctor_id} {status}: rollup {actual}, actual {expected}")
+                if mismatches:
+                    print(f"\n[ERROR] {len(mismatches)} buckets differ; re-run without --verify to rebuild")
+                else:
+                    print("[OK] Rollup matches the appointment table")
+                return
+
+            print("\nBackfilling daily counts...")
+            table = AppointmentDailyStat.__table__
+            db.session.execute(table.delete())
+            result = db.session.execute(
+                table.insert().from_select(['date', 'doctor_id', 'status', 'count'], grouped_counts())
+            )
+            db.session.commit()
+            print(f"[OK] Wrote {result.rowcount} (date, doctor, status) rows")
+
+            print("\n" + "="*50)
+            print("[SUCCESS] Database migration completed successfully!")
+            print("="*50)
+
+        except Exception as e:
+            print(f"\n[ERROR] Migration failed: {e}")
+            db.session.rollback()
+            raise
+
+if __name__ == '__main__':
+    print("\n" + "="*50)
+    print("Starting Database Migration")
+    print("="*50 + "\n")
+    migrate_database(verify_only='--verify' in sys.argv)
@@ -0,0 +1,83 @@
+"""
+Database Migration Script
+Adds the unique index that allows only one active (non-cancelled)
+appointment per doctor, date and time.
+
+The index cannot be created while duplicate active bookings exist.
+Run with --cancel-duplicates to keep the earliest booking for each
+slot and mark the later ones as Cancelled.
+"""
+
+import sys
+
+from sqlalchemy import text
+
+from app_config import app
+from models.models import db, Appointment
+
+
+def find_duplicate_slots():
+    """Return (doctor_id, date, time, count) for slots with several active bookings"""
+    return db.session.query(
+        Appointment.doctor_id, Appointment.date, Appointment.time, db.func.count(Appointment.id)
+    )\
+        .filter(Appointment.status != 'Cancelled')\
+        .group_by(Appointment.doctor_id, Appointment.date, Appointment.time)\
+        .having(db.func.count(Appointment.id) > 1)\
+        .all()
+
+
+def migrate_database(cancel_duplicates=False):
+    """Create uq_appointment_active_slot, resolving duplicates if requested"""
+
+    with app.app_context():
+        try:
+            duplicates = find_duplicate_slots()
+            if duplicates:
+                print(f"Found {len(duplicates)} slots with more than one active booking:")
+                for doctor_id, slot_date, slot_time, count in duplicates:
+                    print(f"  - Doctor {doctor_id} on {slot_date} at {slot_time}: {count} bookings")
+
+                if not cancel_duplicates:
+                    print("\n[ERROR] Resolve these bookings or re-run with --cancel-duplicates")
+                    return
+
+                for doctor_id, slot_date, slot_time, _ in duplicates:
+                    bookings = Appointment.query.filter(
+                        Appointment.doctor_id == doctor_id,
+                        Appointment.date == slot_date,
+                        Appointment.time == slot_time,
+                        Appointment.status != 'Cancelled'
+                    ).order_by(Appointment.id).all()
+                    # Keep the earliest booking, cancel the rest
+                    for booking in bookings[1:]:
+                        booking.status = 'Cancelled'
+                        print(f"  - Cancelled appointment {booking.id}")
+                db.session.commit()
+                print("[OK] Duplicate bookings cancelled")
+            else:
+                print("[OK] No duplicate active bookings")
+
+            print("\nCreating unique index...")
+            with db.engine.connect() as conn:
+                conn.execute(text(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS uq_appointment_active_slot "
+                    "ON appointment (doctor_id, date, time) WHERE status != 'Cancelled'"
+                ))
+                conn.commit()
+            print("[OK] Index 'uq_appointment_active_slot' is present")
+
+            print("\n" + "="*50)
+            print("[SUCCESS] Database migration completed successfully!")
+            print("="*50)
+
+        except Exception as e:
+            print(f"\n[ERROR] Migration failed: {e}")
+            db.session.rollback()
+            raise
+
+if __name__ == '__main__':
+    print("\n" + "="*50)
+    print("Starting Database Migration")
+    print("="*50 + "\n")
+    migrate_database(cancel_duplicates='--cancel-duplicates' in sys.argv)
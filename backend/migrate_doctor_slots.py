@@ -0,0 +1,84 @@
+"""
+Database Migration Script
+Creates the doctor_slot table, copies each doctor's legacy
+Doctor.availability JSON into DoctorSlot rows and adds the
+appointment (doctor_id, date) index used by free-slot searches.
+
+Safe to run more than once: existing slot rows are left untouched.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app_config import app
+from models.models import db, Doctor, DoctorSlot
+from services.availability import parse_offered_slots, DATE_FORMAT, SLOT_NAMES
+
+
+def migrate_database():
+    """Create doctor_slot and backfill it from Doctor.availability"""
+
+    with app.app_context():
+        try:
+            # Create any missing tables (only doctor_slot on an existing database)
+            inspector = db.inspect(db.engine)
+            if 'doctor_slot' not in inspector.get_table_names():
+                print("Creating 'doctor_slot' table...")
+                DoctorSlot.__table__.create(db.engine)
+                print("[OK] 'doctor_slot' table created")
+            else:
+                print("[OK] 'doctor_slot' table already exists")
+
+            # Index used to check whether a slot is already booked
+            with db.engine.connect() as conn:
+                conn.execute(text(
+                    'CREATE INDEX IF NOT EXISTS ix_appointment_doctor_date ON appointment (doctor_id, date)'
+                ))
+                conn.commit()
+            print("[OK] Index 'ix_appointment_doctor_date' is present")
+
+            # Copy legacy JSON availability into slot rows
+            print("\nMigrating Doctor.availability JSON...")
+            created = 0
+            skipped = 0
+            for doctor in Doctor.query.all():
+                offered = parse_offered_slots(doctor.availability)
+                if not offered:
+                    continue
+
+                existing = {
+                    (slot_row.date, slot_row.slot)
+                    for slot_row in DoctorSlot.query.filter_by(doctor_id=doctor.id)
+                }
+
+                for date_string, flags in offered.items():
+                    try:
+                        slot_date = datetime.strptime(date_string, DATE_FORMAT).date()
+                    except ValueError:
+                        print(f"  - Skipping invalid date '{date_string}' for doctor ID {doctor.id}")
+                        skipped += 1
+                        continue
+
+                    for slot in SLOT_NAMES:
+                        if flags.get(slot) and (slot_date, slot) not in existing:
+                            db.session.add(DoctorSlot(doctor_id=doctor.id, date=slot_date, slot=slot))
+                            created += 1
+
+            db.session.commit()
+            print(f"[OK] Created {created} slot rows ({skipped} invalid dates skipped)")
+
+            print("\n" + "="*50)
+            print("[SUCCESS] Database migration completed successfully!")
+            print("="*50)
+
+        except Exception as e:
+            print(f"\n[ERROR] Migration failed: {e}")
+            db.session.rollback()
+            raise
+
+if __name__ == '__main__':
+    print("\n" + "="*50)
+    print("Starting Database Migration")
+    print("="*50 + "\n")
+    migrate_database()
@@ -0,0 +1,62 @@
+"""
+Database Migration Script
+Adds the updated_at columns on appointment and treatment used to version
+treatment exports (services/export_cache.py), and the per-patient
+appointment index that keeps the version lookup cheap.
+
+Safe to re-run: existing columns and indexes are left alone. Existing
+rows keep a NULL updated_at until they are next modified; the export
+version also covers row counts and ids, so nothing needs backfilling.
+"""
+
+from sqlalchemy import text
+
+from app_config import app
+from models.models import db
+
+
+def add_updated_at(inspector, table):
+    """Add <table>.updated_at if it is missing"""
+    columns = [col['name'] for col in inspector.get_columns(table)]
+    if 'updated_at' in columns:
+        print(f"[OK] '{table}.updated_at' column already exists")
+        return
+
+    print(f"Adding '{table}.updated_at' column...")
+    with db.engine.connect() as conn:
+        conn.execute(text(f'ALTER TABLE {table} ADD COLUMN updated_at DATETIME'))
+        conn.commit()
+    print(f"[OK] '{table}.updated_at' column added successfully")
+
+
+def migrate_database():
+    """Add export version columns and index"""
+
+    with app.app_context():
+        try:
+            inspector = db.inspect(db.engine)
+            add_updated_at(inspector, 'appointment')
+            add_updated_at(inspector, 'treatment')
+
+            print("\nCreating per-patient appointment index...")
+            with db.engine.connect() as conn:
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_appointment_patient_date ON appointment (patient_id, date)"
+                ))
+                conn.commit()
+            print("[OK] Index 'ix_appointment_patient_date' is present")
+
+            print("\n" + "="*50)
+            print("[SUCCESS] Database migration completed successfully!")
+            print("="*50)
+
+        except Exception as e:
+            print(f"\n[ERROR] Migration failed: {e}")
+            db.session.rollback()
+            raise
+
+if __name__ == '__main__':
+    print("\n" + "="*50)
+    print("Starting Database Migration")
+    print("="*50 + "\n")
+    migrate_database()
@@ -0,0 +1,42 @@
+"""
+Database Migration Script
+Creates the notification_outbox table used to queue emails and Google
+Chat messages transactionally (see services/outbox.py).
+
+Safe to re-run: the table is only created if missing. Prints a summary
+of queued/sent/failed rows when it already exists.
+"""
+
+from sqlalchemy import func
+
+from app_config import app
+from models.models import db, NotificationOutbox
+
+
+def migrate_database():
+    """Create notification_outbox and report its contents"""
+
+    with app.app_context():
+        try:
+            NotificationOutbox.__table__.create(db.engine, checkfirst=True)
+            print("[OK] Table 'notification_outbox' is present")
+
+            counts = db.session.query(NotificationOutbox.status, func.count(NotificationOutbox.id))\
+                .group_by(NotificationOutbox.status).all()
+            for status, count in sorted(counts):
+                print(f"  - {status}: {count}")
+
+            print("\n" + "="*50)
+            print("[SUCCESS] Database migration completed successfully!")
+            print("="*50)
+
+        except Exception as e:
+            print(f"\n[ERROR] Migration failed: {e}")
+            db.session.rollback()
+            raise
+
+if __name__ == '__main__':
+    print("\n" + "="*50)
+    print("Starting Database Migration")
+    print("="*50 + "\n")
+    migrate_database()
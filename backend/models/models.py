@@ -53,12 +53,15 @@ class Doctor(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, unique=True)
     doctor_id = db.Column(db.String(50), unique=True, nullable=False, index=True)
     specialization = db.Column(db.String(100), nullable=False)
-    availability = db.Column(db.String, nullable=True)  # JSON string of available slots
+    availability = db.Column(db.String, nullable=True)  # Legacy JSON string, superseded by DoctorSlot
     address = db.Column(db.String(300), nullable=True)
     
     # One doctor can have many appointments
     appointments = db.relationship('Appointment', backref='doctor', lazy='dynamic', cascade='all, delete-orphan')
     
+    # Offered availability slots (one row per date + slot)
+    slots = db.relationship('DoctorSlot', backref='doctor', lazy='dynamic', cascade='all, delete-orphan')
+    
     def get_full_name(self):
         """Get doctor's full name from linked user"""
         return self.user.username if self.user else 'Unknown'
@@ -67,6 +70,30 @@ class Doctor(db.Model):
         return f'<Doctor {self.doctor_id} - {self.specialization}>'
 
 
+# ==================== DOCTOR SLOT MODEL ====================
+class DoctorSlot(db.Model):
+    """
+    Doctor availability table - one row per offered time slot
+    A row existing means the doctor is available for that date and slot
+    """
+    __tablename__ = 'doctor_slot'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('doctor.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    slot = db.Column(db.String(10), nullable=False)  # Values: 'morning', 'evening'
+    
+    __table_args__ = (
+        # One row per doctor, date and slot (also serves per-doctor lookups)
+        db.UniqueConstraint('doctor_id', 'date', 'slot', name='uq_doctor_slot'),
+        # "Which doctors are free on <date> <slot>" lookups
+        db.Index('ix_doctor_slot_date_slot', 'date', 'slot'),
+    )
+    
+    def __repr__(self):
+        return f'<DoctorSlot Dr.{self.doctor_id} {self.date} {self.slot}>'
+
+
 # ==================== PATIENT MODEL ====================
 class Patient(db.Model):
     """
@@ -106,6 +133,22 @@ class Appointment(db.Model):
     date = db.Column(db.Date, nullable=False, index=True)
     time = db.Column(db.Time, nullable=False)
     status = db.Column(db.String(20), default='Booked')  # Booked, Completed, Cancelled
+    # Last change; part of the treatment export version (see services/export_cache.py)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    __table_args__ = (
+        # Per-doctor date range lookups (availability calendars, free-slot search)
+        db.Index('ix_appointment_doctor_date', 'doctor_id', 'date'),
+        # Per-patient history (treatment exports, export versions)
+        db.Index('ix_appointment_patient_date', 'patient_id', 'date'),
+        # A doctor's time slot can only hold one active (non-cancelled) booking
+        db.Index(
+            'uq_appointment_active_slot', 'doctor_id', 'date', 'time',
+            unique=True,
+            sqlite_where=db.text("status != 'Cancelled'"),
+            postgresql_where=db.text("status != 'Cancelled'")
+        ),
+    )
     
     # Each appointment can have one treatment record
     treatment = db.relationship('Treatment', backref='appointment', uselist=False, cascade='all, delete-orphan')
@@ -122,6 +165,25 @@ class Appointment(db.Model):
         return f'<Appointment {self.id}: Dr.{self.doctor_id} - Patient.{self.patient_id} on {self.date}>'
 
 
+# ==================== APPOINTMENT DAILY ROLLUP MODEL ====================
+class AppointmentDailyStat(db.Model):
+    """
+    Appointment counts per day, doctor and status
+    Maintained incrementally on every appointment write (see services/appointment_rollup.py)
+    so analytics read O(days) rows instead of scanning appointments
+    """
+    __tablename__ = 'appointment_daily_stat'
+    
+    date = db.Column(db.Date, primary_key=True)
+    # No foreign key: rows are kept consistent by the rollup hooks, including for deleted doctors
+    doctor_id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<AppointmentDailyStat {self.date} Dr.{self.doctor_id} {self.status}: {self.count}>'
+
+
 # ==================== TREATMENT MODEL ====================
 class Treatment(db.Model):
     """
@@ -135,6 +197,8 @@ class Treatment(db.Model):
     diagnosis = db.Column(db.Text)  # Doctor's diagnosis
     prescription = db.Column(db.Text)  # Prescribed medicines
     notes = db.Column(db.Text)  # Additional medical notes (can be JSON)
+    # Last change; part of the treatment export version (see services/export_cache.py)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
     
     def has_prescription(self):
         """Check if prescription was provided"""
@@ -160,5 +224,40 @@ class Department(db.Model):
         return f'<Department: {self.name}>'
 
 
+# ==================== NOTIFICATION OUTBOX MODEL ====================
+class NotificationOutbox(db.Model):
+    """
+    Pending email/chat notifications (transactional outbox)
+    Rows are written in the same transaction as the change that triggers them
+    and delivered later by the dispatcher task (see services/outbox.py)
+    """
+    __tablename__ = 'notification_outbox'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    channel = db.Column(db.String(20), nullable=False)  # 'email' or 'chat'
+    recipient = db.Column(db.String(120))  # Email address (None for chat)
+    subject = db.Column(db.String(200))
+    body = db.Column(db.Text, nullable=False)
+    is_html = db.Column(db.Boolean, default=False, nullable=False)
+    # Same key = same notification; enqueueing it again is a no-op
+    dedupe_key = db.Column(db.String(255), unique=True)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    available_at = db.Column(db.DateTime, default=datetime.now, nullable=False)  # Next delivery attempt
+    claimed_by = db.Column(db.String(36))  # Dispatcher run holding the row
+    locked_until = db.Column(db.DateTime)  # Claim expires (crashed dispatcher) after this
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    sent_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        # Dispatcher scans for due rows by status and time
+        db.Index('ix_notification_outbox_status_available', 'status', 'available_at'),
+    )
+    
+    def __repr__(self):
+        return f'<NotificationOutbox {self.id} {self.channel} {self.status}>'
+
+
 # Export all models
-__all__ = ['db', 'User', 'Doctor', 'Patient', 'Appointment', 'Treatment', 'Department']
\ No newline at end of file
+__all__ = ['db', 'User', 'Doctor', 'DoctorSlot', 'Patient', 'Appointment', 'AppointmentDailyStat', 'Treatment', 'Department', 'NotificationOutbox']
\ No newline at end of file
@@ -7,14 +7,38 @@ Provides endpoints for admin dashboard:
 - List, filter appointments
 - Search doctors and patients
 - Blacklist/unblacklist users
+- Bulk treatment exports (all patients, one archive)
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context, send_file
 from flask_jwt_extended import jwt_required, get_jwt
 from models.models import db, User, Doctor, Patient, Appointment, Treatment
 from werkzeug.security import generate_password_hash
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import aliased, joinedload
+from services.doctor_search import search_doctors as find_doctors
+from services.patient_search import patient_index, parse_result_limit
+from services.stats import get_dashboard_counts
+from services.reminders import (
+    schedule_appointment_reminder, cancel_appointment_reminder, cancel_appointment_reminders
+)
+from services.availability import (
+    get_doctor_schedule, get_doctor_schedules, replace_doctor_slots, parse_availability_entries
+)
+from services.appointment_rollup import appointment_time_series, GROUP_BY_OPTIONS, DEFAULT_RANGE_DAYS
+from services.treatment_export import available_export_formats, DEFAULT_EXPORT_FORMAT
+from services.bulk_export import count_finished_shards, archive_path, BULK_SHARD_SIZE
+from app_config import celery
+from services.pagination import (
+    is_paginated_request, parse_page_args, build_page, wants_total, cached_total,
+    parse_offset_page_args, next_offset_cursor
+)
 from datetime import datetime, timedelta
 import json
+import csv
+import io
+import os
 
 admin_bp = Blueprint('admin_bp', __name__, url_prefix='/api/admin')
 
@@ -33,13 +57,41 @@ def check_admin_role(claims):
 @admin_bp.route('/doctors', methods=['GET'])
 @jwt_required()
 def list_doctors():
-    """Get all doctors with details."""
+    """
+    Get all doctors with details.
+
+    Pass ?limit=N (and ?cursor=<next_cursor>) for keyset pagination;
+    ?include_total=1 adds a cached total count.
+    """
     claims = get_jwt()
     if not check_admin_role(claims):
         return jsonify({'error': 'Unauthorized: Admin only'}), 403
 
     try:
-        doctors = Doctor.query.all()
+        # Load each doctor's user row in the same query
+        query = Doctor.query.options(joinedload(Doctor.user))
+        response_payload = {}
+
+        if is_paginated_request(request.args):
+            # Keyset pagination on id: ?limit=50&cursor=<next_cursor>
+            try:
+                limit, cursor = parse_page_args(request.args)
+                if cursor is not None:
+                    query = query.filter(Doctor.id > int(cursor[0]))
+            except (ValueError, TypeError, IndexError) as e:
+                return jsonify({'error': str(e) or 'Invalid cursor'}), 400
+
+            if wants_total(request.args):
+                response_payload['total'] = cached_total('admin_doctors', Doctor.query)
+
+            rows = query.order_by(Doctor.id).limit(limit + 1).all()
+            doctors, response_payload['next_cursor'] = build_page(rows, limit, lambda doc: [doc.id])
+        else:
+            doctors = query.order_by(Doctor.id).all()
+
+        # Next 7 days of offered slots for the whole page, in one query
+        schedules = get_doctor_schedules([doc.id for doc in doctors])
+
         doctor_list = []
         for doc in doctors:
             doctor_list.append({
@@ -49,12 +101,13 @@ def list_doctors():
                 'name': doc.user.username if doc.user else 'N/A',
                 'email': doc.user.email if doc.user else 'N/A',
                 'specialization': doc.specialization,
-                'availability': doc.availability,
+                'availability': schedules[doc.id],
                 'address': doc.address if doc.address else 'N/A',
                 'contact_info': getattr(doc.user, 'contact_info', 'N/A') if doc.user else 'N/A',
                 'is_blacklisted': doc.user.is_blacklisted if doc.user else False
             })
-        return jsonify({'doctors': doctor_list}), 200
+        response_payload['doctors'] = doctor_list
+        return jsonify(response_payload), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -76,7 +129,11 @@ def create_doctor():
         password = data.get('password')
         doctor_id = data.get('doctor_id')  # Unique doctor ID
         specialization = data.get('specialization')
-        availability = data.get('availability', '{}')
+        try:
+            # Day entries like POST /doctor/availability (or the legacy JSON string of them)
+            availability_entries = parse_availability_entries(data.get('availability'))
+        except ValueError as e:
+            return jsonify({'msg': str(e)}), 400
         address = data.get('address', '')  # Optional address
 
         # Check all required fields
@@ -125,10 +182,15 @@ def create_doctor():
             user_id=user.id,
             doctor_id=doctor_id,
             specialization=specialization,
-            availability=availability,
             address=address
         )
         db.session.add(doctor)
+        db.session.flush()  # Get the doctor ID for the slot rows
+        try:
+            replace_doctor_slots(doctor.id, availability_entries)
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'msg': str(e)}), 400
         db.session.commit()
 
         return jsonify({
@@ -140,7 +202,7 @@ def create_doctor():
                 'name': user.username,
                 'email': user.email,
                 'specialization': specialization,
-                'availability': availability,
+                'availability': get_doctor_schedule(doctor.id),
                 'address': address
             }
         }), 201
@@ -169,7 +231,12 @@ def update_doctor(doctor_id):
         if 'specialization' in data:
             doctor.specialization = data['specialization']
         if 'availability' in data:
-            doctor.availability = data['availability']
+            # Stored as slot rows, like POST /doctor/availability
+            try:
+                replace_doctor_slots(doctor.id, parse_availability_entries(data['availability']))
+            except ValueError as e:
+                db.session.rollback()
+                return jsonify({'error': str(e)}), 400
         if 'doctor_id' in data:
             # Check for uniqueness if changing doctor_id
             if doctor.doctor_id != data['doctor_id']:
@@ -202,7 +269,7 @@ def update_doctor(doctor_id):
                 'name': doctor.user.username,
                 'email': doctor.user.email,
                 'specialization': doctor.specialization,
-                'availability': doctor.availability,
+                'availability': get_doctor_schedule(doctor.id),
                 'doctor_id': getattr(doctor, 'doctor_id', None),
                 'address': getattr(doctor, 'address', None)
             }
@@ -227,7 +294,11 @@ def delete_doctor(doctor_id):
 
         user_id = doctor.user_id
         
-        # First delete all appointments associated with this doctor
+        # First delete all appointments associated with this doctor, and their unsent reminders
+        cancel_appointment_reminders(
+            appointment_id for (appointment_id,)
+            in db.session.query(Appointment.id).filter_by(doctor_id=doctor_id, status='Booked')
+        )
         Appointment.query.filter_by(doctor_id=doctor_id).delete()
         
         # Delete the doctor record
@@ -253,13 +324,38 @@ def delete_doctor(doctor_id):
 @admin_bp.route('/patients', methods=['GET'])
 @jwt_required()
 def list_patients():
-    """Get all patients with details."""
+    """
+    Get all patients with details.
+
+    Pass ?limit=N (and ?cursor=<next_cursor>) for keyset pagination;
+    ?include_total=1 adds a cached total count.
+    """
     claims = get_jwt()
     if not check_admin_role(claims):
         return jsonify({'error': 'Unauthorized: Admin only'}), 403
 
     try:
-        patients = Patient.query.all()
+        # Load each patient's user row in the same query
+        query = Patient.query.options(joinedload(Patient.user))
+        response_payload = {}
+
+        if is_paginated_request(request.args):
+            # Keyset pagination on id: ?limit=50&cursor=<next_cursor>
+            try:
+                limit, cursor = parse_page_args(request.args)
+                if cursor is not None:
+                    query = query.filter(Patient.id > int(cursor[0]))
+            except (ValueError, TypeError, IndexError) as e:
+                return jsonify({'error': str(e) or 'Invalid cursor'}), 400
+
+            if wants_total(request.args):
+                response_payload['total'] = cached_total('admin_patients', Patient.query)
+
+            rows = query.order_by(Patient.id).limit(limit + 1).all()
+            patients, response_payload['next_cursor'] = build_page(rows, limit, lambda pat: [pat.id])
+        else:
+            patients = query.order_by(Patient.id).all()
+
         patient_list = []
         for pat in patients:
             patient_list.append({
@@ -272,7 +368,8 @@ def list_patients():
                 'contact_info': pat.contact_info,
                 'is_blacklisted': pat.user.is_blacklisted if pat.user else False
             })
-        return jsonify({'patients': patient_list}), 200
+        response_payload['patients'] = patient_list
+        return jsonify(response_payload), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -338,7 +435,11 @@ def delete_patient(patient_id):
 
         user_id = patient.user_id
         
-        # First delete all appointments associated with this patient
+        # First delete all appointments associated with this patient, and their unsent reminders
+        cancel_appointment_reminders(
+            appointment_id for (appointment_id,)
+            in db.session.query(Appointment.id).filter_by(patient_id=patient_id, status='Booked')
+        )
         Appointment.query.filter_by(patient_id=patient_id).delete()
         
         # Delete the patient record
@@ -361,10 +462,103 @@ def delete_patient(patient_id):
 # APPOINTMENTS ENDPOINTS
 # ============================================================================
 
+def _appointment_list_query():
+    """
+    Single joined query returning exactly the columns the appointment list serializes.
+
+    Patient and doctor names come from two aliases of the user table, so
+    no per-row relationship loads are needed.
+    """
+    patient_user = aliased(User)
+    doctor_user = aliased(User)
+
+    return db.session.query(
+        Appointment.id,
+        Appointment.patient_id,
+        Appointment.doctor_id,
+        Appointment.date,
+        Appointment.time,
+        Appointment.status,
+        patient_user.username.label('patient_name'),
+        doctor_user.username.label('doctor_name')
+    )\
+        .outerjoin(Patient, Appointment.patient_id == Patient.id)\
+        .outerjoin(patient_user, Patient.user_id == patient_user.id)\
+        .outerjoin(Doctor, Appointment.doctor_id == Doctor.id)\
+        .outerjoin(doctor_user, Doctor.user_id == doctor_user.id)
+
+
+def _serialize_appointment_row(row):
+    """Convert a row from _appointment_list_query() to the list payload."""
+    return {
+        'id': row.id,
+        'patient': row.patient_name or 'N/A',
+        'patient_id': row.patient_id,
+        'doctor': row.doctor_name or 'N/A',
+        'doctor_id': row.doctor_id,
+        'date': row.date.isoformat(),
+        'time': row.time.isoformat(),
+        'status': row.status
+    }
+
+
+# Streaming export formats for the appointment list
+APPOINTMENT_STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+# Rows fetched from the database per batch while streaming
+STREAM_BATCH_SIZE = 1000
+
+
+def _stream_appointments(query, export_format):
+    """
+    Stream appointment rows as NDJSON or CSV
+
+    Rows are fetched in yield_per batches and written as they arrive, so
+    worker memory stays flat regardless of table size.
+    """
+    fieldnames = ['id', 'patient', 'patient_id', 'doctor', 'doctor_id', 'date', 'time', 'status']
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames) if export_format == 'csv' else None
+        if writer:
+            writer.writeheader()
+
+        for index, row in enumerate(query.yield_per(STREAM_BATCH_SIZE), start=1):
+            record = _serialize_appointment_row(row)
+            if writer:
+                writer.writerow(record)
+            else:
+                buffer.write(json.dumps(record))
+                buffer.write('\n')
+
+            # Flush one chunk per database batch
+            if index % STREAM_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+
+        yield buffer.getvalue()
+
+    response = Response(stream_with_context(generate()), mimetype=APPOINTMENT_STREAM_FORMATS[export_format])
+    if export_format == 'csv':
+        response.headers['Content-Disposition'] = 'attachment; filename=appointments.csv'
+    return response
+
+
 @admin_bp.route('/appointments', methods=['GET'])
 @jwt_required()
 def list_appointments():
-    """Get all appointments with filters."""
+    """
+    Get all appointments with filters.
+
+    Pass ?limit=N (and ?cursor=<next_cursor>) for keyset pagination on
+    (date, id); ?include_total=1 adds a cached total count.
+    Pass ?format=ndjson or ?format=csv to stream every matching row.
+    """
     claims = get_jwt()
     if not check_admin_role(claims):
         return jsonify({'error': 'Unauthorized: Admin only'}), 403
@@ -375,10 +569,10 @@ def list_appointments():
         date_from = request.args.get('date_from')
         date_to = request.args.get('date_to')
 
-        query = Appointment.query
+        query = _appointment_list_query()
 
         if status:
-            query = query.filter_by(status=status)
+            query = query.filter(Appointment.status == status)
 
         if date_from:
             query = query.filter(Appointment.date >= datetime.fromisoformat(date_from).date())
@@ -386,22 +580,53 @@ def list_appointments():
         if date_to:
             query = query.filter(Appointment.date <= datetime.fromisoformat(date_to).date())
 
-        appointments = query.order_by(Appointment.date.desc()).all()
-
-        appt_list = []
-        for appt in appointments:
-            appt_list.append({
-                'id': appt.id,
-                'patient': appt.patient.user.username if appt.patient and appt.patient.user else 'N/A',
-                'patient_id': appt.patient_id,
-                'doctor': appt.doctor.user.username if appt.doctor and appt.doctor.user else 'N/A',
-                'doctor_id': appt.doctor_id,
-                'date': appt.date.isoformat(),
-                'time': appt.time.isoformat(),
-                'status': appt.status
-            })
-
-        return jsonify({'appointments': appt_list}), 200
+        # Streaming export mode for spreadsheets/reporting
+        export_format = request.args.get('format')
+        if export_format:
+            if export_format not in APPOINTMENT_STREAM_FORMATS:
+                return jsonify({'error': 'format must be "ndjson" or "csv"'}), 400
+            ordered_query = query.order_by(Appointment.date.desc(), Appointment.id.desc())
+            return _stream_appointments(ordered_query, export_format)
+
+        response_payload = {}
+
+        if is_paginated_request(request.args):
+            # Keyset pagination on (date, id), newest first
+            try:
+                limit, cursor = parse_page_args(request.args)
+                if cursor is not None:
+                    cursor_date = datetime.fromisoformat(cursor[0]).date()
+                    cursor_id = int(cursor[1])
+                    query = query.filter(or_(
+                        Appointment.date < cursor_date,
+                        and_(Appointment.date == cursor_date, Appointment.id < cursor_id)
+                    ))
+            except (ValueError, TypeError, IndexError) as e:
+                return jsonify({'error': str(e) or 'Invalid cursor'}), 400
+
+            if wants_total(request.args):
+                # Count the filtered table without the name joins
+                total_query = Appointment.query
+                if status:
+                    total_query = total_query.filter(Appointment.status == status)
+                if date_from:
+                    total_query = total_query.filter(Appointment.date >= datetime.fromisoformat(date_from).date())
+                if date_to:
+                    total_query = total_query.filter(Appointment.date <= datetime.fromisoformat(date_to).date())
+                response_payload['total'] = cached_total(
+                    f'admin_appointments:{status}:{date_from}:{date_to}', total_query
+                )
+
+            rows = query.order_by(Appointment.date.desc(), Appointment.id.desc()).limit(limit + 1).all()
+            rows, response_payload['next_cursor'] = build_page(
+                rows, limit, lambda row: [row.date.isoformat(), row.id]
+            )
+        else:
+            rows = query.order_by(Appointment.date.desc(), Appointment.id.desc()).all()
+
+        response_payload['appointments'] = [_serialize_appointment_row(row) for row in rows]
+
+        return jsonify(response_payload), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -420,11 +645,23 @@ def update_appointment(appt_id):
             return jsonify({'error': 'Appointment not found'}), 404
 
         data = request.get_json()
+        previous_status = appointment.status
 
         if 'status' in data:
             appointment.status = data['status']
 
-        db.session.commit()
+        try:
+            # Keep the reminder in line with the booking, in the same transaction
+            if previous_status == 'Booked' and appointment.status != 'Booked':
+                cancel_appointment_reminder(appointment.id)
+            elif previous_status != 'Booked' and appointment.status == 'Booked':
+                db.session.flush()
+                schedule_appointment_reminder(appointment.id)
+            db.session.commit()
+        except IntegrityError:
+            # Re-activating a cancelled booking whose slot was taken since
+            db.session.rollback()
+            return jsonify({'error': 'This time slot is already booked'}), 409
 
         return jsonify({
             'msg': 'Appointment updated successfully',
@@ -532,6 +769,7 @@ def delete_appointment(appt_id):
             return jsonify({'error': 'Appointment not found'}), 404
 
         db.session.delete(appointment)
+        cancel_appointment_reminder(appt_id)
         db.session.commit()
 
         return jsonify({'msg': 'Appointment deleted successfully'}), 200
@@ -547,7 +785,12 @@ def delete_appointment(appt_id):
 @admin_bp.route('/search/doctors', methods=['GET'])
 @jwt_required()
 def search_doctors():
-    """Search doctors by name or specialization."""
+    """
+    Search doctors by name or specialization.
+
+    Returns every match with a total; pass ?limit=N (and
+    ?cursor=<next_cursor>) to page through ranked results.
+    """
     claims = get_jwt()
     if not check_admin_role(claims):
         return jsonify({'error': 'Unauthorized: Admin only'}), 403
@@ -558,14 +801,17 @@ def search_doctors():
             f.write(f"Search query: '{query_str}'\n")
 
         if not query_str:
-            return jsonify({'doctors': []}), 200
+            return jsonify({'doctors': [], 'total': 0, 'next_cursor': None}), 200
+
+        try:
+            limit, offset = parse_offset_page_args(request.args)
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e) or 'Invalid cursor'}), 400
 
-        # Search in doctor name (via user.username), specialization, or doctor_id
-        doctors = Doctor.query.filter(
-            (Doctor.specialization.ilike(f'%{query_str}%')) |
-            (Doctor.user.has(User.username.ilike(f'%{query_str}%'))) |
-            (Doctor.doctor_id.ilike(f'%{query_str}%'))
-        ).all()
+        # Search in doctor name, specialization, or doctor_id via the FTS index
+        doctors, total = find_doctors(query_str, limit, offset)
+
+        schedules = get_doctor_schedules([doc.id for doc in doctors])
 
         doctor_list = []
         for doc in doctors:
@@ -575,11 +821,15 @@ def search_doctors():
                 'name': doc.user.username if doc.user else 'N/A',
                 'email': doc.user.email if doc.user else 'N/A',
                 'specialization': doc.specialization,
-                'availability': doc.availability,
+                'availability': schedules[doc.id],
                 'is_blacklisted': doc.user.is_blacklisted if doc.user else False
             })
 
-        return jsonify({'doctors': doctor_list}), 200
+        return jsonify({
+            'doctors': doctor_list,
+            'total': total,
+            'next_cursor': next_offset_cursor(offset, len(doctor_list), total) if limit else None
+        }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -587,7 +837,12 @@ def search_doctors():
 @admin_bp.route('/search/patients', methods=['GET'])
 @jwt_required()
 def search_patients():
-    """Search patients by name, email, or contact info."""
+    """
+    Search patients by name, email, phone number or ID.
+
+    Typo tolerant: partial phone numbers and misspelled names match.
+    Results are the top `limit` patients (default 20, max 100) by similarity.
+    """
     claims = get_jwt()
     if not check_admin_role(claims):
         return jsonify({'error': 'Unauthorized: Admin only'}), 403
@@ -598,18 +853,20 @@ def search_patients():
         if not query_str:
             return jsonify({'patients': []}), 200
 
-        # Search in patient name (via user.username), email, contact info, or ID
-        criteria = (
-            (Patient.user.has(User.username.ilike(f'%{query_str}%'))) |
-            (Patient.user.has(User.email.ilike(f'%{query_str}%'))) |
-            (Patient.contact_info.ilike(f'%{query_str}%'))
-        )
+        try:
+            limit = parse_result_limit(request.args.get('limit'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        # If query is numeric, also check ID
-        if query_str.isdigit():
-            criteria = criteria | (Patient.id == int(query_str))
+        # Fuzzy match on name, email, phone digits or exact ID (top K by similarity)
+        matches = patient_index.search(query_str, limit=limit)
+        scores = dict(matches)
 
-        patients = Patient.query.filter(criteria).all()
+        patients_by_id = {
+            pat.id: pat
+            for pat in Patient.query.options(joinedload(Patient.user)).filter(Patient.id.in_(scores))
+        } if matches else {}
+        patients = [patients_by_id[patient_id] for patient_id, _ in matches if patient_id in patients_by_id]
 
         patient_list = []
         for pat in patients:
@@ -620,8 +877,8 @@ def search_patients():
                 'email': pat.user.email if pat.user else 'N/A',
                 'age': pat.age,
                 'gender': pat.gender,
-                'contact_info': pat.contact_info
-                
+                'contact_info': pat.contact_info,
+                'score': round(scores[pat.id], 3)
             })
 
         return jsonify({'patients': patient_list}), 200
@@ -802,27 +1059,203 @@ def dashboard_stats():
         return jsonify({'error': 'Unauthorized: Admin only'}), 403
 
     try:
-        total_patients = Patient.query.count()
-        total_doctors = Doctor.query.count()
-        total_appointments = Appointment.query.count()
+        # All counters come from one cached aggregate query
+        counts = get_dashboard_counts()
 
-        # Get upcoming appointments
-        today = datetime.now().date()
-        upcoming = Appointment.query.filter(Appointment.date >= today).count()
-        
-        # Get completed appointments
-        completed = Appointment.query.filter_by(status='Completed').count()
+        return jsonify({
+            'total_patients': counts['patients'],
+            'total_doctors': counts['doctors'],
+            'total_appointments': counts['appointments'],
+            'upcoming_appointments': counts['upcoming_appointments'],
+            'completed_appointments': counts['completed_appointments']
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ============================================================================
+# APPOINTMENT ANALYTICS
+# ============================================================================
+
+@admin_bp.route('/analytics/appointments', methods=['GET'])
+@jwt_required()
+def appointment_analytics():
+    """
+    Appointment counts over time for capacity planning.
+
+    Reads only the appointment_daily_stat rollup, so a year of data is
+    ~365 rows per status regardless of appointment volume.
+
+    Query params:
+        from / to: ISO dates, inclusive (default: last 30 days)
+        group_by: day (default), week, month, doctor or status
+        doctor_id: Optional doctor filter
+    """
+    claims = get_jwt()
+    if not check_admin_role(claims):
+        return jsonify({'error': 'Unauthorized: Admin only'}), 403
+
+    try:
+        try:
+            end_date = datetime.fromisoformat(request.args['to']).date() \
+                if request.args.get('to') else datetime.now().date()
+            start_date = datetime.fromisoformat(request.args['from']).date() \
+                if request.args.get('from') else end_date - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+            doctor_id = request.args.get('doctor_id', type=int)
+        except ValueError:
+            return jsonify({'error': 'from and to must be ISO dates (YYYY-MM-DD)'}), 400
+
+        if start_date > end_date:
+            return jsonify({'error': 'from must not be after to'}), 400
+
+        group_by = request.args.get('group_by', 'day')
+        if group_by not in GROUP_BY_OPTIONS:
+            return jsonify({'error': f'group_by must be one of: {", ".join(GROUP_BY_OPTIONS)}'}), 400
+
+        series = appointment_time_series(start_date, end_date, group_by=group_by, doctor_id=doctor_id)
 
         return jsonify({
-            'total_patients': total_patients,
-            'total_doctors': total_doctors,
-            'total_appointments': total_appointments,
-            'upcoming_appointments': upcoming,
-            'completed_appointments': completed
+            'from': start_date.isoformat(),
+            'to': end_date.isoformat(),
+            'group_by': group_by,
+            'doctor_id': doctor_id,
+            'total': sum(item['total'] for item in series),
+            'series': series
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+
+# ============================================================================
+# BULK TREATMENT EXPORTS
+# ============================================================================
+
+@admin_bp.route('/exports/treatments', methods=['POST'])
+@jwt_required()
+def start_bulk_export():
+    """
+    Export every patient's treatment history into one zip archive.
+
+    Patients are exported in shards, in parallel across Celery workers;
+    the archive holds one file per patient plus manifest.json.
+
+    Body (optional):
+        format: csv (default), jsonl or parquet
+        compress: gzip per-patient files (default: true)
+        shard_size: Patients per shard
+    """
+    claims = get_jwt()
+    if not check_admin_role(claims):
+        return jsonify({'error': 'Unauthorized: Admin only'}), 403
+
+    try:
+        options = request.get_json(silent=True) or {}
+        export_format = str(options.get('format') or DEFAULT_EXPORT_FORMAT).lower()
+        if export_format not in available_export_formats():
+            return jsonify({'error': f'format must be one of: {", ".join(available_export_formats())}'}), 400
+        try:
+            shard_size = int(options.get('shard_size') or BULK_SHARD_SIZE)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'shard_size must be a positive integer'}), 400
+        if shard_size < 1:
+            return jsonify({'error': 'shard_size must be a positive integer'}), 400
+
+        from tasks import bulk_export_patient_histories
+        task = bulk_export_patient_histories.delay(
+            export_format=export_format,
+            compress=bool(options.get('compress', True)),
+            shard_size=shard_size
+        )
+        return jsonify({
+            'message': 'Bulk export started',
+            'task_id': task.id,
+            'status_url': f'/api/admin/exports/{task.id}'
+        }), 202
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def _bulk_export_archive(task_id):
+    """
+    Look up a bulk export task and the archive task it queued
+
+    Returns:
+        tuple: (job AsyncResult, job result dict or None until queued, archive AsyncResult or None)
+    """
+    job = celery.AsyncResult(task_id)
+    if job.state != 'SUCCESS':
+        return job, None, None
+    info = job.result
+    if 'archive' in info:
+        # No patients: the archive was built by the job itself
+        return job, info, None
+    return job, info, celery.AsyncResult(info['archive_task_id'])
+
+
+@admin_bp.route('/exports/<task_id>', methods=['GET'])
+@jwt_required()
+def bulk_export_status(task_id):
+    """
+    Progress of a bulk export: shards finished so far, then the archive details.
+    """
+    claims = get_jwt()
+    if not check_admin_role(claims):
+        return jsonify({'error': 'Unauthorized: Admin only'}), 403
+
+    try:
+        job, info, archive = _bulk_export_archive(task_id)
+        if info is None:
+            status = {'task_id': task_id, 'state': job.state}
+            if job.state == 'FAILURE':
+                status['error'] = str(job.result)
+            return jsonify(status), 200
+
+        status = {'task_id': task_id, 'job_id': info['job_id'], 'shards': info['shards'], 'patients': info['patients']}
+        archive_result = info.get('archive')
+        if archive is not None:
+            status['state'] = archive.state
+            if archive.state == 'SUCCESS':
+                archive_result = archive.result
+            elif archive.state == 'FAILURE':
+                status['error'] = str(archive.result)
+            else:
+                status['state'] = 'PROGRESS'
+                status['shards_finished'] = count_finished_shards(info['job_id'])
+                status['percent'] = round(100 * status['shards_finished'] / info['shards'], 1)
+        if archive_result is not None:
+            status.update(state='SUCCESS', archive=archive_result, percent=100.0,
+                          download_url=f'/api/admin/exports/{task_id}/download')
+        return jsonify(status), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/exports/<task_id>/download', methods=['GET'])
+@jwt_required()
+def download_bulk_export(task_id):
+    """Download a finished bulk export archive (supports Range requests)."""
+    claims = get_jwt()
+    if not check_admin_role(claims):
+        return jsonify({'error': 'Unauthorized: Admin only'}), 403
+
+    try:
+        job, info, archive = _bulk_export_archive(task_id)
+        if info is not None and archive is None:
+            archive_result = info['archive']
+        elif archive is not None and archive.state == 'SUCCESS':
+            archive_result = archive.result
+        else:
+            return jsonify({'error': 'Bulk export is not ready'}), 409
+
+        filename = os.path.basename(archive_result['filename'])
+        filepath = archive_path(filename)
+        if not os.path.isfile(filepath):
+            return jsonify({'error': 'Archive is no longer available'}), 404
+        return send_file(filepath, as_attachment=True, download_name=filename,
+                         mimetype='application/zip', conditional=True, max_age=0)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @admin_bp.route('/api/debug/button', methods=['POST'])
 def debug_button():
     data = request.json
@@ -4,9 +4,10 @@ Handles user registration, login, and dashboard access
 """
 
 from flask import Blueprint, request, jsonify, render_template, redirect, url_for
-from models.models import db, User, Patient, Doctor, Appointment
+from models.models import db, User, Patient
 from werkzeug.security import check_password_hash, generate_password_hash
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
+from services.stats import get_dashboard_counts
 
 
 # Create Blueprint for authentication routes
@@ -225,14 +226,12 @@ def admin_dashboard():
         return jsonify({"error": "Unauthorized - Admin access required"}), 403
 
     # Query database for statistics
-    # Count total records in each table
-    total_patients = Patient.query.count()
-    total_doctors = Doctor.query.count()
-    total_appointments = Appointment.query.count()
+    # Shared stats service counts every table in one cached query
+    counts = get_dashboard_counts()
 
     # Return statistics as JSON
     return jsonify({
-        "patients": total_patients,
-        "doctors": total_doctors,
-        "appointments": total_appointments
+        "patients": counts['patients'],
+        "doctors": counts['doctors'],
+        "appointments": counts['appointments']
     }), 200
\ No newline at end of file
@@ -15,13 +15,20 @@ from datetime import date, timedelta
 
 # SQLAlchemy utilities for complex database queries
 from sqlalchemy import and_  # Used for combining multiple filter conditions
+from sqlalchemy.exc import IntegrityError
 
 # Database models
 from models.models import db, User, Doctor, Patient, Appointment, Treatment
 
-# JSON handling for storing/retrieving availability data
+# JSON handling for treatment notes
 import json
 
+# Slot-table backed availability helpers
+from services.availability import replace_doctor_slots, get_doctor_schedule
+
+# Drop unsent reminders when a booking is closed
+from services.reminders import cancel_appointment_reminder
+
 # Security utilities for password verification
 from werkzeug.security import check_password_hash
 
@@ -91,7 +98,7 @@ def doctor_login():
             'name': user.username,
             'email': user.email,
             'specialization': user.doctor.specialization,
-            'availability': user.doctor.availability  # JSON string of available slots
+            'availability': get_doctor_schedule(user.doctor.id)  # Next 7 days of offered slots
         }
     }), 200
 
@@ -213,7 +220,7 @@ def doctor_dashboard():
             'id': doctor.id,
             'name': doctor.user.username,
             'specialization': doctor.specialization,
-            'availability': doctor.availability  # JSON string of available time slots
+            'availability': get_doctor_schedule(doctor.id)  # Next 7 days of offered slots
         },
         'appointments_next_7_days': appointment_data,  # Upcoming appointments
         'assigned_patients': patients  # Unique patients with appointments
@@ -229,7 +236,8 @@ def update_availability():
     Update doctor's availability schedule
     
     Allows doctors to set their available time slots for the next 7 days.
-    Availability is stored as JSON in the database for flexibility.
+    Each offered slot is stored as a DoctorSlot row; dates present in the
+    payload replace any slots previously set for those dates.
     
     Expected JSON format:
     {
@@ -271,11 +279,12 @@ def update_availability():
     if not data or 'availability' not in data:
         return jsonify({'error': 'No availability data provided'}), 400
 
-    # Store availability as JSON string in database
-    # JSON format allows flexible storage of complex availability patterns
-    # Alternative: Could use separate AvailabilitySlot table, but JSON is simpler
-    import json
-    doctor.availability = json.dumps(data['availability'])
+    # Store one DoctorSlot row per offered slot
+    try:
+        replace_doctor_slots(doctor.id, data['availability'])
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     
     # Persist changes to database
     db.session.commit()
@@ -293,7 +302,8 @@ def get_availability():
     """
     Retrieve doctor's current availability schedule
     
-    Returns the doctor's set availability for the next 7 days.
+    Returns today and the next 6 days (the grid the modal saves), with
+    morning/evening false on days nothing is offered.
     Used by the frontend to populate the availability modal.
     
     Returns:
@@ -315,10 +325,8 @@ def get_availability():
     if not doctor:
         return jsonify({'error': 'Doctor profile not found'}), 404
 
-    # Parse availability from JSON string
-    # If no availability set, return empty array
-    import json
-    availability = json.loads(doctor.availability) if doctor.availability else []
+    # Fixed 7-day window built from the doctor's slot rows
+    availability = get_doctor_schedule(doctor.id)
 
     # Return availability data
     return jsonify({
@@ -354,6 +362,7 @@ def update_appointment_status():
         400: Invalid status value
         403: Unauthorized
         404: Appointment not found
+        409: Slot rebooked since this appointment was cancelled
     """
     # Get current user from JWT
     claims = get_jwt()
@@ -387,7 +396,14 @@ def update_appointment_status():
 
     # Update appointment status
     appointment.status = new_status
-    db.session.commit()
+    try:
+        # Completed/cancelled bookings need no reminder
+        cancel_appointment_reminder(appointment.id)
+        db.session.commit()
+    except IntegrityError:
+        # Completing a cancelled booking whose slot was taken since
+        db.session.rollback()
+        return jsonify({'error': 'This time slot is already booked'}), 409
 
     return jsonify({'msg': f'Appointment status updated to {new_status}'}), 200
 
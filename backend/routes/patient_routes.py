@@ -14,13 +14,15 @@ Date: November 2025
 """
 
 # Core Flask imports for request handling
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, send_file
 
 # JWT authentication for securing endpoints
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
 # SQLAlchemy query utilities
 from sqlalchemy import or_  # For complex OR conditions in database queries
+from sqlalchemy.orm import contains_eager  # Loads a relationship from an explicit join
+from sqlalchemy.exc import IntegrityError  # Raised when a unique constraint rejects a write
 
 # Database models
 from models.models import db, User, Doctor, Patient, Appointment, Treatment
@@ -29,7 +31,40 @@ from models.models import db, User, Doctor, Patient, Appointment, Treatment
 import json
 
 # Import caching utility for performance optimization
-from app_config import cache
+from app_config import cache, celery
+
+import os
+
+# Full-text doctor search (SQLite FTS5)
+from services.doctor_search import search_doctors as find_doctors
+
+# Offset cursors for paging through ranked search results
+from services.pagination import parse_offset_page_args, next_offset_cursor
+
+# In-memory prefix trie for search-box autocomplete
+from services.autocomplete import autocomplete_index, parse_suggestion_limit
+
+# Per-appointment reminders (outbox rows written with the booking)
+from services.reminders import schedule_appointment_reminder, cancel_appointment_reminder
+
+# Notifications are queued in the same transaction as the change they announce
+from services.outbox import enqueue_email
+
+# Treatment history export formats (CSV, JSON Lines, Parquet)
+from services.treatment_export import (
+    available_export_formats, export_directory, verify_download_token, DEFAULT_EXPORT_FORMAT,
+    EXPORT_RETENTION_SECONDS
+)
+from services.export_cache import history_version, export_cache_key, export_filename
+
+# Idempotency-Key support for retried write requests
+from services.idempotency import idempotent
+
+# Availability calendar engine (single range query per window)
+from services.availability import (
+    build_availability_calendars, find_next_available_slots, find_free_doctors, parse_window_days,
+    DATE_FORMAT, MAX_WINDOW_DAYS, SLOT_NAMES
+)
 
 # Create Blueprint for patient-specific routes
 # All routes will be prefixed with '/patient'
@@ -119,6 +154,56 @@ def _extract_first_name(full_username):
     return first_name.capitalize()
 
 
+# Department name variations mapping
+# Allows matching different forms of the same specialization
+DEPARTMENT_VARIATIONS = {
+    'cardiology': ['cardiology', 'cardiologist'],
+    'oncology': ['oncology', 'oncologist'],
+    'general': ['general', 'internal medicine', 'general medicine']
+}
+
+
+def _department_filter(department_name):
+    """
+    Build the specialization filter for a department name
+    
+    Args:
+        department_name (str): Department name from the request
+    
+    Returns:
+        tuple: (search_terms, SQLAlchemy OR condition)
+    """
+    # Get search terms for this department
+    search_terms = DEPARTMENT_VARIATIONS.get(
+        department_name.lower(),
+        [department_name.lower()]  # Default to department name if no mapping
+    )
+    
+    # Use ilike for case-insensitive LIKE queries
+    # %term% allows partial matching
+    query_filters = [Doctor.specialization.ilike(f'%{term}%') for term in search_terms]
+    return search_terms, or_(*query_filters)
+
+
+def _format_doctor_name(username):
+    """
+    Format a doctor's username for display with a single "Dr." prefix
+    
+    Args:
+        username (str): Raw username from the User table
+    
+    Returns:
+        str: Display name such as "Dr. Bob Turing"
+    """
+    display_name = username.replace('_', ' ').title()
+    
+    # Remove existing "Dr." prefix to avoid duplication
+    if display_name.lower().startswith('dr.'):
+        display_name = display_name[3:].strip()
+    
+    return f"Dr. {display_name}"
+
+
 # ========== PATIENT DASHBOARD ENDPOINT ==========
 
 @patient_bp.route('/dashboard', methods=['GET'])
@@ -271,32 +356,9 @@ def get_doctors_by_department(department_name):
         if user_role != 'Patient':
             return jsonify({'error': 'Unauthorized: Patient access required'}), 403
 
-        # Department name variations mapping
-        # Allows matching different forms of the same specialization
-        department_variations = {
-            'cardiology': ['cardiology', 'cardiologist'],
-            'oncology': ['oncology', 'oncologist'],
-            'general': ['general', 'internal medicine', 'general medicine']
-        }
-
-        # Get search terms for this department
-        search_terms = department_variations.get(
-            department_name.lower(),
-            [department_name.lower()]  # Default to department name if no mapping
-        )
-        
-        # Build database query filters
-        # Use ilike for case-insensitive LIKE queries
-        query_filters = []
-        for search_term in search_terms:
-            # %term% allows partial matching
-            query_filters.append(Doctor.specialization.ilike(f'%{search_term}%'))
-        
-        # Execute query with OR condition
-        if query_filters:
-            doctors_query_result = Doctor.query.filter(or_(*query_filters)).all()
-        else:
-            doctors_query_result = []
+        # Build specialization filter for this department
+        search_terms, department_condition = _department_filter(department_name)
+        doctors_query_result = Doctor.query.filter(department_condition).all()
         
         # Debug logging
         print(f"Searching department '{department_name}' with terms: {search_terms}")
@@ -308,14 +370,7 @@ def get_doctors_by_department(department_name):
             # Filter out blacklisted doctors
             if doctor_record.user and not doctor_record.user.is_blacklisted:
                 # Format doctor name with professional prefix
-                doctor_username = doctor_record.user.username.replace('_', ' ').title()
-                
-                # Remove existing "Dr." prefix to avoid duplication
-                if doctor_username.lower().startswith('dr.'):
-                    doctor_username = doctor_username[3:].strip()
-                
-                # Add "Dr." prefix
-                formatted_name = f"Dr. {doctor_username}"
+                formatted_name = _format_doctor_name(doctor_record.user.username)
                 
                 doctor_info = {
                     'id': doctor_record.id,
@@ -346,10 +401,12 @@ def get_doctors_by_department(department_name):
 @cache.cached(timeout=60, query_string=True)  # Cache for 1 minute
 def get_doctor_availability(doctor_id):
     """
-    Check doctor's availability for next 7 days
+    Check doctor's availability for the next few days
     
     Combines doctor's set availability with existing bookings to show
     which time slots are actually available for new appointments.
+    All bookings in the window are fetched with a single range query,
+    so a longer window does not cost extra database round trips.
     
     Time slots:
     - Morning: 08:00-12:00 (booked as 10:00)
@@ -358,8 +415,12 @@ def get_doctor_availability(doctor_id):
     Args:
         doctor_id (int): Doctor's database ID
     
+    Query Params:
+        days (int): Window size in days (default 7, max 90)
+    
     Returns:
         200: Availability schedule
+        400: Invalid window size
         403: Unauthorized or doctor unavailable
         404: Doctor not found
         500: Server error
@@ -372,6 +433,11 @@ def get_doctor_availability(doctor_id):
         if user_role != 'Patient':
             return jsonify({'error': 'Unauthorized: Patient access required'}), 403
 
+        # Validate requested window size
+        window_days = parse_window_days(request.args.get('days'))
+        if window_days is None:
+            return jsonify({'error': f'days must be an integer between 1 and {MAX_WINDOW_DAYS}'}), 400
+
         # Fetch doctor record
         doctor_record = Doctor.query.get(doctor_id)
         if not doctor_record:
@@ -381,70 +447,10 @@ def get_doctor_availability(doctor_id):
         if not doctor_record.user or doctor_record.user.is_blacklisted:
             return jsonify({'error': 'Doctor not available'}), 404
 
-        # Parse doctor's availability schedule
-        availability_schedule = []
-        if doctor_record.availability:
-            try:
-                availability_schedule = json.loads(doctor_record.availability)
-            except json.JSONDecodeError:
-                # If parsing fails, treat as no availability
-                availability_schedule = []
-
-        # Generate next 7 days
-        from datetime import date, timedelta
-        current_date = date.today()
-        availability_calendar = []
-        
-        for day_offset in range(7):
-            # Calculate date
-            target_date = current_date + timedelta(days=day_offset)
-            date_string = target_date.strftime('%d/%m/%Y')
-            
-            # Find doctor's set availability for this date
-            day_availability_settings = None
-            for availability_entry in availability_schedule:
-                if availability_entry.get('date') == date_string:
-                    day_availability_settings = availability_entry
-                    break
-            
-            # Check existing appointments
-            existing_bookings = Appointment.query.filter(
-                Appointment.doctor_id == doctor_id,
-                Appointment.date == target_date,
-                Appointment.status != 'Cancelled'
-            ).all()
-            
-            # Determine booked slots
-            morning_slot_booked = False
-            evening_slot_booked = False
-            
-            for booking in existing_bookings:
-                booking_hour = booking.time.hour
-                
-                # Morning: 08:00-12:00
-                if 8 <= booking_hour < 12:
-                    morning_slot_booked = True
-                # Evening: 16:00-21:00
-                elif 16 <= booking_hour < 21:
-                    evening_slot_booked = True
-            
-            # Calculate final availability
-            morning_available = False
-            evening_available = False
-            
-            if day_availability_settings:
-                morning_available = day_availability_settings.get('morning', False) and not morning_slot_booked
-                evening_available = day_availability_settings.get('evening', False) and not evening_slot_booked
-            
-            # Add to calendar
-            day_data = {
-                'date': date_string,
-                'morning': morning_available,
-                'evening': evening_available,
-                'morning_booked': morning_slot_booked,
-                'evening_booked': evening_slot_booked
-            }
-            availability_calendar.append(day_data)
+        # Build calendar from one range query over the whole window
+        availability_calendar = build_availability_calendars(
+            [doctor_record], days=window_days
+        )[doctor_record.id]
 
         # Build response
         response_payload = {
@@ -453,6 +459,7 @@ def get_doctor_availability(doctor_id):
                 'name': doctor_record.user.username if doctor_record.user else None,
                 'specialization': doctor_record.specialization
             },
+            'days': window_days,
             'availability': availability_calendar
         }
         
@@ -465,15 +472,260 @@ def get_doctor_availability(doctor_id):
         return jsonify({'error': f'Server error: {str(error)}'}), 500
 
 
+# ========== BATCH AVAILABILITY ENDPOINT ==========
+
+@patient_bp.route('/availability', methods=['GET'])
+@jwt_required()
+@cache.cached(timeout=60, query_string=True)  # Cache for 1 minute
+def get_batch_availability():
+    """
+    Get availability calendars for many doctors in one request
+    
+    Replaces one /doctors/<id>/availability call per doctor on the booking
+    page. Doctors are loaded with their user rows in one query and all
+    bookings for the window are loaded in one grouped query.
+    
+    Query Params:
+        department (str): Department name (same matching as /departments/<name>/doctors)
+        doctor_ids (str): Comma separated doctor IDs (alternative to department)
+        days (int): Window size in days (default 7, max 90)
+    
+    Returns:
+        200: Availability calendars keyed per doctor
+        400: Missing or invalid parameters
+        403: Unauthorized
+        500: Server error
+    """
+    try:
+        # Verify authorization
+        jwt_claims = get_jwt()
+        user_role = jwt_claims.get('role')
+
+        if user_role != 'Patient':
+            return jsonify({'error': 'Unauthorized: Patient access required'}), 403
+
+        # Validate requested window size
+        window_days = parse_window_days(request.args.get('days'))
+        if window_days is None:
+            return jsonify({'error': f'days must be an integer between 1 and {MAX_WINDOW_DAYS}'}), 400
+
+        department_name = request.args.get('department', '').strip()
+        raw_doctor_ids = request.args.get('doctor_ids', '').strip()
+
+        # Only non-blacklisted doctors, with user rows loaded in the same query
+        doctors_query = Doctor.query.join(User, Doctor.user_id == User.id)\
+            .options(contains_eager(Doctor.user))\
+            .filter(User.is_blacklisted == False)
+
+        if raw_doctor_ids:
+            try:
+                requested_ids = [int(value) for value in raw_doctor_ids.split(',') if value.strip()]
+            except ValueError:
+                return jsonify({'error': 'doctor_ids must be a comma separated list of integers'}), 400
+            doctors_query = doctors_query.filter(Doctor.id.in_(requested_ids))
+        elif department_name:
+            _, department_condition = _department_filter(department_name)
+            doctors_query = doctors_query.filter(department_condition)
+        else:
+            return jsonify({'error': 'Either department or doctor_ids is required'}), 400
+
+        doctor_records = doctors_query.order_by(Doctor.id).all()
+
+        # One grouped booking query for every doctor in the batch
+        calendars = build_availability_calendars(doctor_records, days=window_days)
+
+        doctors_collection = []
+        for doctor_record in doctor_records:
+            doctors_collection.append({
+                'id': doctor_record.id,
+                'name': _format_doctor_name(doctor_record.user.username),
+                'specialization': doctor_record.specialization,
+                'doctor_id': doctor_record.doctor_id,
+                'availability': calendars[doctor_record.id]
+            })
+
+        return jsonify({
+            'department': department_name or None,
+            'days': window_days,
+            'doctors': doctors_collection
+        }), 200
+        
+    except Exception as error:
+        print(f"Error in get_batch_availability: {str(error)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': f'Server error: {str(error)}'}), 500
+
+
+# ========== NEXT AVAILABLE SLOT SEARCH ENDPOINT ==========
+
+@patient_bp.route('/doctors/next-available', methods=['GET'])
+@jwt_required()
+def get_next_available_slots():
+    """
+    Find the earliest open slots across all doctors
+    
+    Answers "who can see me first" without checking each doctor's
+    calendar. Searches the indexed DoctorSlot table in date order and
+    skips slots that already have an active booking.
+    
+    Query Params:
+        department (str): Optional department/specialization name
+        from (str): First date to search, DD/MM/YYYY (default today)
+        to (str): Last date to search, DD/MM/YYYY (default from + 29 days)
+        limit (int): Number of slots to return (default 10, max 50)
+    
+    Returns:
+        200: Earliest open slots ordered by date and slot
+        400: Invalid parameters
+        403: Unauthorized
+        500: Server error
+    """
+    try:
+        # Verify authorization
+        jwt_claims = get_jwt()
+        user_role = jwt_claims.get('role')
+
+        if user_role != 'Patient':
+            return jsonify({'error': 'Unauthorized: Patient access required'}), 403
+
+        from datetime import date, datetime, timedelta
+
+        # Parse date range
+        try:
+            from_string = request.args.get('from')
+            to_string = request.args.get('to')
+            start_date = datetime.strptime(from_string, DATE_FORMAT).date() if from_string else date.today()
+            end_date = datetime.strptime(to_string, DATE_FORMAT).date() if to_string else start_date + timedelta(days=29)
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use DD/MM/YYYY'}), 400
+
+        if end_date < start_date:
+            return jsonify({'error': 'to must not be before from'}), 400
+        if (end_date - start_date).days >= MAX_WINDOW_DAYS:
+            return jsonify({'error': f'Date range cannot exceed {MAX_WINDOW_DAYS} days'}), 400
+
+        # Parse result size
+        try:
+            limit = int(request.args.get('limit', 10))
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        limit = max(1, min(limit, 50))
+
+        # Optional department filter (same matching as the department pages)
+        department_name = request.args.get('department', '').strip()
+        doctor_filter = _department_filter(department_name)[1] if department_name else None
+
+        open_slots = find_next_available_slots(start_date, end_date, limit, doctor_filter)
+
+        slots_collection = []
+        for open_slot in open_slots:
+            slots_collection.append({
+                'date': open_slot['date'].strftime(DATE_FORMAT),
+                'time_slot': open_slot['slot'],
+                'doctor': {
+                    'id': open_slot['doctor_id'],
+                    'name': _format_doctor_name(open_slot['username']),
+                    'specialization': open_slot['specialization'],
+                    'doctor_id': open_slot['doctor_code']
+                }
+            })
+
+        return jsonify({
+            'department': department_name or None,
+            'from': start_date.strftime(DATE_FORMAT),
+            'to': end_date.strftime(DATE_FORMAT),
+            'slots': slots_collection
+        }), 200
+        
+    except Exception as error:
+        print(f"Error in get_next_available_slots: {str(error)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': f'Server error: {str(error)}'}), 500
+
+
+# ========== FREE DOCTORS FOR A SLOT ENDPOINT ==========
+
+@patient_bp.route('/doctors/free', methods=['GET'])
+@jwt_required()
+def get_free_doctors():
+    """
+    List doctors who can be booked for a given date and time slot
+    
+    Answers "which doctors are free on <date> <slot>" from the (date, slot)
+    index on DoctorSlot, skipping doctors with an active booking in that
+    slot, in a single query.
+    
+    Query Params:
+        date (str): Day to check, DD/MM/YYYY (required)
+        slot (str): morning or evening (required)
+        department (str): Optional department/specialization name
+    
+    Returns:
+        200: Free doctors ordered by doctor ID
+        400: Missing or invalid parameters
+        403: Unauthorized
+        500: Server error
+    """
+    try:
+        # Verify authorization
+        jwt_claims = get_jwt()
+        user_role = jwt_claims.get('role')
+
+        if user_role != 'Patient':
+            return jsonify({'error': 'Unauthorized: Patient access required'}), 403
+
+        from datetime import datetime
+
+        try:
+            target_date = datetime.strptime(request.args.get('date', ''), DATE_FORMAT).date()
+        except ValueError:
+            return jsonify({'error': 'date is required. Use DD/MM/YYYY'}), 400
+
+        slot = request.args.get('slot', '').strip().lower()
+        if slot not in SLOT_NAMES:
+            return jsonify({'error': f'slot must be one of: {", ".join(SLOT_NAMES)}'}), 400
+
+        # Optional department filter (same matching as the department pages)
+        department_name = request.args.get('department', '').strip()
+        doctor_filter = _department_filter(department_name)[1] if department_name else None
+
+        free_doctors = find_free_doctors(target_date, slot, doctor_filter)
+
+        return jsonify({
+            'date': target_date.strftime(DATE_FORMAT),
+            'time_slot': slot,
+            'department': department_name or None,
+            'doctors': [
+                {
+                    'id': free_doctor['doctor_id'],
+                    'name': _format_doctor_name(free_doctor['username']),
+                    'specialization': free_doctor['specialization'],
+                    'doctor_id': free_doctor['doctor_code']
+                }
+                for free_doctor in free_doctors
+            ]
+        }), 200
+        
+    except Exception as error:
+        print(f"Error in get_free_doctors: {str(error)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': f'Server error: {str(error)}'}), 500
+
+
 # ========== APPOINTMENT BOOKING ENDPOINT ==========
 
 @patient_bp.route('/appointments/book', methods=['POST'])
 @jwt_required()
+@idempotent  # Retries with the same Idempotency-Key replay the first response
 def book_appointment():
     """
     Book an appointment with a doctor
     
     Creates a new appointment record if the slot is available.
+    Send an Idempotency-Key header to make client retries safe.
     
     Expected JSON:
     {
@@ -484,9 +736,10 @@ def book_appointment():
     
     Returns:
         201: Appointment booked successfully
-        400: Invalid input or slot already booked
+        400: Invalid input
         403: Unauthorized
         404: Doctor/Patient not found
+        409: Slot already booked
         500: Server error
     """
     try:
@@ -541,18 +794,6 @@ def book_appointment():
         else:
             appointment_time_obj = time(18, 0)
 
-        # Check for existing booking (Double Booking Prevention)
-        existing_booking = Appointment.query.filter_by(
-            doctor_id=doctor_id,
-            patient_id=patient_record.id,
-            date=appointment_date_obj,
-            time=appointment_time_obj,
-            status='Booked'
-        ).first()
-
-        if existing_booking:
-            return jsonify({'error': 'Appointment already exists for this time slot'}), 400
-
         # Create new appointment record
         new_appointment = Appointment(
             doctor_id=doctor_id,
@@ -563,14 +804,35 @@ def book_appointment():
         )
         
         # Save to database
-        db.session.add(new_appointment)
-        db.session.commit()
+        # Double booking is prevented by the unique index on active
+        # (doctor_id, date, time) rows, so concurrent requests for the same
+        # slot cannot both succeed and no pre-check query is needed
+        try:
+            db.session.add(new_appointment)
+            db.session.flush()
+            new_appointment_id = new_appointment.id
+
+            # Confirmation email commits (or rolls back) together with the booking
+            enqueue_email(
+                patient_record.user.email,
+                f"Appointment Confirmed: {appointment_date_obj.isoformat()}",
+                f"Hello {patient_record.user.username.replace('_', ' ').title()},\n\n"
+                f"Your appointment with {_format_doctor_name(doctor_record.user.username)} on "
+                f"{appointment_date_obj.strftime('%d/%m/%Y')} at {appointment_time_obj.strftime('%H:%M')} is confirmed.",
+                dedupe_key=f'booking:{new_appointment_id}:{appointment_date_obj.isoformat()}'
+            )
+            # So does the reminder, due REMINDER_LEAD_HOURS before it starts
+            schedule_appointment_reminder(new_appointment_id)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'error': 'This time slot is already booked'}), 409
 
         # Return success response
         return jsonify({
             'msg': 'Appointment booked successfully',
             'appointment': {
-                'id': new_appointment.id,
+                'id': new_appointment_id,
                 'doctor_id': doctor_id,
                 'date': appointment_date_obj.isoformat(),
                 'time': appointment_time_obj.strftime('%H:%M'),
@@ -676,14 +938,30 @@ def get_patient_history():
 @jwt_required()
 def export_treatments():
     """
-    Trigger CSV export of treatment history
+    Trigger export of treatment history
     
-    Initiates an asynchronous Celery task to generate a CSV file
+    Initiates an asynchronous Celery task to generate a file
     containing the patient's treatment history.
     
+    Request Body (optional):
+    {
+        "format": "csv",  // "csv" (default), "jsonl" or "parquet"
+        "compress": true  // gzip the file (.csv.gz / .jsonl.gz)
+    }
+    
+    Poll GET /patient/export/<task_id> for progress instead of starting
+    another export; once finished it links to the download route.
+    
+    If the patient's history has not changed since an export with the
+    same options, that export's task is returned again (200, "reused")
+    and nothing new is queued.
+    
     Returns:
-        202: Export task started
+        200: Unchanged history, existing export returned
+        202: Export task started (with status_url)
+        400: Unsupported format
         403: Unauthorized
+        404: Patient not found
         500: Server error
     """
     try:
@@ -700,11 +978,46 @@ def export_treatments():
         
         # Trigger the Celery task asynchronously
         # .delay() puts the task in the queue
-        async_task = export_patient_treatments.delay(authenticated_user_id)
+        export_options = request.get_json(silent=True) or {}
+        export_format = str(export_options.get('format') or DEFAULT_EXPORT_FORMAT).lower()
+        if export_format not in available_export_formats():
+            return jsonify({
+                'error': f'Unsupported export format. Choose one of: {", ".join(available_export_formats())}'
+            }), 400
+
+        compress = bool(export_options.get('compress', False))
+
+        # Same history and options as an earlier export: hand back that export
+        patient_id, version, _ = history_version(authenticated_user_id)
+        if patient_id is None:
+            return jsonify({'error': 'Patient profile not found'}), 404
+        export_key = export_cache_key(patient_id, version, export_format, compress)
+        artifact_key = _export_artifact_key(patient_id, export_key)
+
+        existing_task_id = cache.get(artifact_key)
+        if existing_task_id and _export_reusable(existing_task_id, export_filename(patient_id, export_key, export_format, compress)):
+            return jsonify({
+                'message': 'Your treatment history has not changed since your last export.',
+                'task_id': existing_task_id,
+                'status_url': f'/patient/export/{existing_task_id}',
+                'reused': True
+            }), 200
+
+        async_task = export_patient_treatments.delay(
+            authenticated_user_id,
+            compress=compress,
+            export_format=export_format
+        )
+
+        # Remember who started the task: status and download are owner-only
+        cache.set(_export_owner_key(async_task.id), str(authenticated_user_id), timeout=EXPORT_RETENTION_SECONDS)
+        cache.set(artifact_key, async_task.id, timeout=EXPORT_RETENTION_SECONDS)
+        cache.set(_export_queued_key(async_task.id), 1, timeout=EXPORT_QUEUE_TIMEOUT_SECONDS)
         
         return jsonify({
             'message': 'Export started. You will be notified via email when it is ready.',
-            'task_id': async_task.id
+            'task_id': async_task.id,
+            'status_url': f'/patient/export/{async_task.id}'
         }), 202
         
     except Exception as error:
@@ -712,6 +1025,150 @@ def export_treatments():
         return jsonify({'error': f'Server error: {str(error)}'}), 500
 
 
+# An export still queued after this long is presumed lost (never picked up by a worker)
+EXPORT_QUEUE_TIMEOUT_SECONDS = 15 * 60
+
+
+def _export_owner_key(task_id):
+    return f'export_task_owner:{task_id}'
+
+
+def _export_artifact_key(patient_id, export_key):
+    return f'export_artifact:{patient_id}:{export_key}'
+
+
+def _export_queued_key(task_id):
+    return f'export_task_queued:{task_id}'
+
+
+def _export_reusable(task_id, filename):
+    """
+    An earlier export can be handed back if its file exists or it is still live
+    
+    Celery reports unknown, lost and expired task ids as PENDING too, so
+    PENDING only counts while the marker written at enqueue time lasts
+    (EXPORT_QUEUE_TIMEOUT_SECONDS); after that the task is presumed lost.
+    """
+    if os.path.isfile(os.path.join(export_directory(), filename)):
+        return True
+    state = celery.AsyncResult(task_id).state
+    if state == 'PENDING':
+        return cache.get(_export_queued_key(task_id)) is not None
+    return state in ('STARTED', 'PROGRESS')
+
+
+def _owned_export_task(task_id, download_token=None):
+    """
+    Look up an export task started by the current patient
+    
+    The patient is the JWT's, or the one a download token (from the emailed
+    link) was issued to.
+    
+    Returns:
+        tuple: (AsyncResult, None) or (None, (error response, status code));
+               other users' (and unknown or expired) tasks are reported as 404
+    """
+    if download_token is not None:
+        user_id = verify_download_token(download_token, task_id)
+        if user_id is None:
+            return None, (jsonify({'error': 'Download link is invalid or has expired'}), 403)
+    elif get_jwt().get('role') != 'Patient':
+        return None, (jsonify({'error': 'Unauthorized: Patient access required'}), 403)
+    else:
+        user_id = str(get_jwt_identity())
+    
+    owner_id = cache.get(_export_owner_key(task_id))
+    if owner_id is None or owner_id != user_id:
+        return None, (jsonify({'error': 'Export not found'}), 404)
+    
+    return celery.AsyncResult(task_id), None
+
+
+@patient_bp.route('/export/<task_id>', methods=['GET'])
+@jwt_required()
+def get_export_status(task_id):
+    """
+    Report the state of a treatment export
+    
+    States: PENDING (queued), PROGRESS (rows_written/total_rows/percent),
+    SUCCESS (file details and download_url), FAILURE (error).
+    
+    Returns:
+        200: Export status
+        403: Unauthorized
+        404: Unknown export, or started by another user
+        500: Server error
+    """
+    try:
+        async_result, error_response = _owned_export_task(task_id)
+        if error_response:
+            return error_response
+        
+        state = async_result.state
+        status = {'task_id': task_id, 'state': state}
+        
+        if state == 'PROGRESS':
+            status.update(async_result.info or {})
+        elif state == 'SUCCESS':
+            status.update(async_result.result, percent=100.0,
+                          download_url=f'/patient/export/{task_id}/download')
+        elif state == 'FAILURE':
+            status['error'] = str(async_result.result)
+        else:
+            status['percent'] = 0.0
+        
+        return jsonify(status), 200
+        
+    except Exception as error:
+        print(f"Error in get_export_status: {str(error)}")
+        return jsonify({'error': f'Server error: {str(error)}'}), 500
+
+
+@patient_bp.route('/export/<task_id>/download', methods=['GET'])
+@jwt_required(optional=True)
+def download_export(task_id):
+    """
+    Download a finished treatment export
+    
+    Authenticated by the patient's JWT, or by the ?token= of the emailed
+    link (no Authorization header needed). Supports Range requests
+    (resumable downloads) and conditional requests (ETag / Last-Modified).
+    
+    Returns:
+        200/206: File contents
+        403: Unauthorized, or invalid/expired download token
+        404: Unknown export, started by another user, or file removed
+        409: Export not finished yet
+        500: Server error
+    """
+    try:
+        async_result, error_response = _owned_export_task(task_id, request.args.get('token'))
+        if error_response:
+            return error_response
+        
+        if async_result.state != 'SUCCESS':
+            return jsonify({'error': 'Export is not ready', 'state': async_result.state}), 409
+        
+        # The file name comes from the task result; basename() keeps it inside the export directory
+        filename = os.path.basename(async_result.result['filename'])
+        filepath = os.path.join(export_directory(), filename)
+        if not os.path.isfile(filepath):
+            return jsonify({'error': 'Export file is no longer available'}), 404
+        
+        return send_file(
+            filepath,
+            as_attachment=True,
+            download_name=async_result.result.get('download_name', filename),
+            mimetype='application/gzip' if filename.endswith('.gz') else None,
+            conditional=True,  # Range / If-None-Match handling
+            max_age=0
+        )
+        
+    except Exception as error:
+        print(f"Error in download_export: {str(error)}")
+        return jsonify({'error': f'Server error: {str(error)}'}), 500
+
+
 # ========== DOCTOR SEARCH ENDPOINT ==========
 
 @patient_bp.route('/search/doctors', methods=['GET'])
@@ -721,13 +1178,18 @@ def search_doctors():
     Search for doctors by name or specialization
     
     Allows patients to find doctors using a search query.
-    Supports partial matching and case-insensitive search.
+    Matches word prefixes case-insensitively and ranks the best matches first.
+    Blacklisted doctors are excluded by the search query itself, so pages
+    are always full while more matches exist.
     
     Query Params:
         q (str): Search query string
+        limit (int): Optional page size (default: every match)
+        cursor (str): next_cursor from the previous page
         
     Returns:
-        200: List of matching doctors
+        200: List of matching doctors, total matches and next_cursor
+        400: Invalid limit or cursor
         403: Unauthorized
         500: Server error
     """
@@ -746,48 +1208,34 @@ def search_doctors():
 
         # Return empty list if no query provided
         if not search_query:
-            return jsonify({'doctors': []}), 200
+            return jsonify({'doctors': [], 'total': 0, 'next_cursor': None}), 200
 
-        # Prepare search variations
-        # Handle both underscore and space separated names for flexibility
-        query_with_underscore = search_query.replace(' ', '_')
-        
-        # Build complex query with OR conditions
-        # Matches: Specialization OR Username (with spaces) OR Username (with underscores)
-        matching_doctors = Doctor.query.filter(
-            (Doctor.specialization.ilike(f'%{search_query}%')) |
-            (Doctor.user.has(User.username.ilike(f'%{search_query}%'))) |
-            (Doctor.user.has(User.username.ilike(f'%{query_with_underscore}%')))
-        ).all()
-        
-        print(f"[PATIENT SEARCH] Found {len(matching_doctors)} doctors before filtering")
+        # Optional paging through ranked results
+        try:
+            limit, offset = parse_offset_page_args(request.args)
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e) or 'Invalid cursor'}), 400
+
+        # Search name, specialization and doctor ID via the full-text index
+        # (prefix matching on words, best match first, blacklisted doctors excluded)
+        matching_doctors, total_matches = find_doctors(search_query, limit, offset, exclude_blacklisted=True)
 
-        # Process results and filter blacklisted doctors
         doctors_result_list = []
         for doctor_record in matching_doctors:
-            # Skip if user account missing or blacklisted
-            if doctor_record.user and not doctor_record.user.is_blacklisted:
-                # Format name nicely
-                username = doctor_record.user.username.replace('_', ' ').title()
-                
-                # Handle existing "Dr." prefix
-                if username.lower().startswith('dr.'):
-                    username = username[3:].strip()
-                
-                formatted_name = f"Dr. {username}"
-                
-                print(f"[PATIENT SEARCH] Adding: {formatted_name} - {doctor_record.specialization}")
-                
-                doctors_result_list.append({
-                    'id': doctor_record.id,
-                    'name': formatted_name,
-                    'specialization': doctor_record.specialization,
-                    'doctor_id': doctor_record.doctor_id
-                })
+            doctors_result_list.append({
+                'id': doctor_record.id,
+                'name': _format_doctor_name(doctor_record.user.username),
+                'specialization': doctor_record.specialization,
+                'doctor_id': doctor_record.doctor_id
+            })
         
-        print(f"[PATIENT SEARCH] Returning {len(doctors_result_list)} doctors after filtering")
+        print(f"[PATIENT SEARCH] Returning {len(doctors_result_list)} of {total_matches} doctors")
 
-        return jsonify({'doctors': doctors_result_list}), 200
+        return jsonify({
+            'doctors': doctors_result_list,
+            'total': total_matches,
+            'next_cursor': next_offset_cursor(offset, len(doctors_result_list), total_matches) if limit else None
+        }), 200
         
     except Exception as error:
         print(f"Error in search_doctors: {str(error)}")
@@ -796,16 +1244,72 @@ def search_doctors():
         return jsonify({'error': f'Server error: {str(error)}'}), 500
 
 
+# ========== SEARCH AUTOCOMPLETE ENDPOINT ==========
+
+@patient_bp.route('/search/autocomplete', methods=['GET'])
+@jwt_required()
+def search_autocomplete():
+    """
+    Suggest doctors and specializations while the patient types
+    
+    Served from a process-local prefix trie, so each keystroke is a
+    lookup without a database query. Any word of a doctor's name matches
+    ("smi" suggests "Dr. John Smith").
+    
+    Query Params:
+        q (str): Text typed so far
+        limit (int): Maximum suggestions (default 8, max 20)
+        
+    Returns:
+        200: {query, suggestions: [{type: 'specialization', name, doctor_count}
+                                   | {type: 'doctor', id, name, specialization, doctor_id}]}
+        400: Invalid limit
+        403: Unauthorized
+        500: Server error
+    """
+    try:
+        jwt_claims = get_jwt()
+        if jwt_claims.get('role') != 'Patient':
+            return jsonify({'error': 'Unauthorized: Patient access required'}), 403
+
+        query_text = request.args.get('q', '').strip()
+        try:
+            limit = parse_suggestion_limit(request.args.get('limit'))
+        except ValueError as error:
+            return jsonify({'error': str(error)}), 400
+
+        suggestions = []
+        for suggestion in autocomplete_index.suggest(query_text, limit=limit):
+            if suggestion['type'] == 'doctor':
+                suggestions.append({
+                    'type': 'doctor',
+                    'id': suggestion['id'],
+                    'name': _format_doctor_name(suggestion['username']),
+                    'specialization': suggestion['specialization'],
+                    'doctor_id': suggestion['doctor_id']
+                })
+            else:
+                suggestions.append(suggestion)
+
+        return jsonify({'query': query_text, 'suggestions': suggestions}), 200
+
+    except Exception as error:
+        print(f"Error in search_autocomplete: {str(error)}")
+        return jsonify({'error': f'Server error: {str(error)}'}), 500
+
+
 # ========== CANCEL APPOINTMENT ENDPOINT ==========
 
 @patient_bp.route('/appointments/<int:appointment_id>/cancel', methods=['POST'])
 @jwt_required()
+@idempotent  # Retries with the same Idempotency-Key replay the first response
 def cancel_appointment(appointment_id):
     """
     Cancel a scheduled appointment
     
     Allows patients to cancel their own appointments.
     Completed appointments cannot be cancelled.
+    Send an Idempotency-Key header to make client retries safe.
     
     Args:
         appointment_id (int): ID of appointment to cancel
@@ -850,6 +1354,8 @@ def cancel_appointment(appointment_id):
 
         # Update status
         appointment_record.status = 'Cancelled'
+        # Drop the unsent reminder in the same transaction
+        cancel_appointment_reminder(appointment_record.id)
         db.session.commit()
 
         return jsonify({
@@ -0,0 +1,232 @@
+"""
+Appointment Daily Rollup
+Keeps appointment_daily_stat (date, doctor_id, status -> count) in step
+with the appointment table, and answers analytics queries from it.
+
+Every booking, status change, reschedule and deletion goes through the
+session hooks below, which apply +1/-1 deltas with an upsert inside the
+same transaction as the appointment write. Bulk query deletes
+(Appointment.query.filter(...).delete()) are counted before they run.
+Rebuild the table from scratch with migrate_appointment_rollup.py.
+"""
+
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from sqlalchemy import delete, event, func, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models.models import db, Doctor, User, Appointment, AppointmentDailyStat
+
+GROUP_BY_OPTIONS = ('day', 'week', 'month', 'doctor', 'status')
+DEFAULT_RANGE_DAYS = 30
+
+# Appointments created without a status get the column default
+DEFAULT_STATUS = 'Booked'
+
+# Key in Session.info collecting rollup deltas until the flush completes
+_PENDING_KEY = 'appointment_rollup_deltas'
+
+_ROLLUP_COLUMNS = ('date', 'doctor_id', 'status')
+
+
+def _rollup_key(date_value, doctor_id, status):
+    return (date_value, doctor_id, status or DEFAULT_STATUS)
+
+
+def apply_deltas(connection, deltas):
+    """
+    Add count deltas to the rollup table
+
+    Args:
+        connection: SQLAlchemy connection in the writing transaction
+        deltas (dict): {(date, doctor_id, status): change}
+    """
+    changes = [
+        {'date': key[0], 'doctor_id': key[1], 'status': key[2], 'count': change}
+        for key, change in deltas.items() if change
+    ]
+    if not changes:
+        return
+
+    table = AppointmentDailyStat.__table__
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(_ROLLUP_COLUMNS),
+            set_={'count': table.c.count + statement.excluded['count']}
+        )
+        connection.execute(statement, changes)
+    else:
+        for change in changes:
+            matched = connection.execute(
+                update(table)
+                .where(table.c.date == change['date'], table.c.doctor_id == change['doctor_id'],
+                       table.c.status == change['status'])
+                .values(count=table.c.count + change['count'])
+            ).rowcount
+            if not matched:
+                connection.execute(table.insert(), change)
+
+    # Drop emptied buckets so the table only holds real counts
+    connection.execute(
+        delete(table).where(table.c.count <= 0, table.c.date.in_({change['date'] for change in changes}))
+    )
+
+
+def grouped_counts(where_clause=None):
+    """Select (date, doctor_id, status, count) groups from the appointment table."""
+    status = func.coalesce(Appointment.status, DEFAULT_STATUS)
+    query = select(Appointment.date, Appointment.doctor_id, status, func.count(Appointment.id))
+    if where_clause is not None:
+        query = query.where(where_clause)
+    return query.group_by(Appointment.date, Appointment.doctor_id, status)
+
+
+# ---------- Incremental maintenance ----------
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    """No-op; registered with active_history so reschedules know the old bucket."""
+    return value
+
+
+for _column in _ROLLUP_COLUMNS:
+    event.listen(getattr(Appointment, _column), 'set', _load_previous_value,
+                 active_history=True, retval=True)
+
+
+def _pending(session):
+    return session.info.setdefault(_PENDING_KEY, Counter())
+
+
+@event.listens_for(Session, 'before_flush')
+def _capture_deletions(session, flush_context, instances):
+    """Record deleted appointments while their rows can still be loaded."""
+    for obj in session.deleted:
+        if isinstance(obj, Appointment):
+            _pending(session)[_rollup_key(obj.date, obj.doctor_id, obj.status)] -= 1
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_appointment_writes(session, flush_context):
+    """Count new and changed appointments (ids/FKs/defaults are set by now)."""
+    deltas = _pending(session)
+    for obj in session.new:
+        if isinstance(obj, Appointment):
+            deltas[_rollup_key(obj.date, obj.doctor_id, obj.status)] += 1
+
+    for obj in session.dirty:
+        if not isinstance(obj, Appointment) or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        histories = [state.attrs[column].history for column in _ROLLUP_COLUMNS]
+        if not any(history.has_changes() for history in histories):
+            continue
+        previous = [
+            (history.deleted or history.unchanged or [None])[0] for history in histories
+        ]
+        deltas[_rollup_key(*previous)] -= 1
+        deltas[_rollup_key(obj.date, obj.doctor_id, obj.status)] += 1
+
+    session.info.pop(_PENDING_KEY, None)
+    apply_deltas(session.connection(), deltas)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_appointment_writes(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _count_bulk_deletes(orm_execute_state):
+    """Subtract rows removed by Appointment.query...delete() before they go."""
+    if not orm_execute_state.is_delete:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ is not Appointment:
+        return
+
+    session = orm_execute_state.session
+    deltas = Counter()
+    for date_value, doctor_id, status, count in session.execute(
+        grouped_counts(orm_execute_state.statement.whereclause)
+    ):
+        deltas[_rollup_key(date_value, doctor_id, status)] -= count
+    apply_deltas(session.connection(), deltas)
+
+
+# ---------- Analytics ----------
+
+def _period_start(day, group_by):
+    if group_by == 'week':
+        return day - timedelta(days=day.weekday())
+    if group_by == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def appointment_time_series(start_date, end_date, group_by='day', doctor_id=None):
+    """
+    Appointment counts between two dates (inclusive), read from the rollup only
+
+    Args:
+        start_date (date): First day
+        end_date (date): Last day
+        group_by (str): 'day', 'week' (Monday start), 'month', 'doctor' or 'status'
+        doctor_id (int): Optional doctor filter
+
+    Returns:
+        list: One dict per group with 'total' and 'by_status'
+    """
+    stat = AppointmentDailyStat
+    filters = [stat.date >= start_date, stat.date <= end_date]
+    if doctor_id is not None:
+        filters.append(stat.doctor_id == doctor_id)
+
+    if group_by == 'doctor':
+        rows = db.session.query(stat.doctor_id, stat.status, func.sum(stat.count))\
+            .filter(*filters).group_by(stat.doctor_id, stat.status).all()
+        buckets = defaultdict(Counter)
+        for row_doctor_id, status, count in rows:
+            buckets[row_doctor_id][status] += count
+
+        # Names for the (few) doctors in the result; deleted doctors have none
+        names = dict(
+            db.session.query(Doctor.id, User.username).join(User, User.id == Doctor.user_id)
+            .filter(Doctor.id.in_(list(buckets)))
+        ) if buckets else {}
+        series = [
+            {'doctor_id': key, 'doctor_name': names.get(key), 'total': sum(counts.values()),
+             'by_status': dict(counts)}
+            for key, counts in buckets.items()
+        ]
+        return sorted(series, key=lambda item: (-item['total'], item['doctor_id']))
+
+    if group_by == 'status':
+        rows = db.session.query(stat.status, func.sum(stat.count))\
+            .filter(*filters).group_by(stat.status).order_by(stat.status).all()
+        return [{'status': status, 'total': count} for status, count in rows]
+
+    # Time series: one row per day and status, then folded into periods
+    rows = db.session.query(stat.date, stat.status, func.sum(stat.count))\
+        .filter(*filters).group_by(stat.date, stat.status).all()
+    buckets = defaultdict(Counter)
+    for day, status, count in rows:
+        buckets[_period_start(day, group_by)][status] += count
+
+    # Include empty periods so charts get a continuous axis
+    series = []
+    period = _period_start(start_date, group_by)
+    while period <= end_date:
+        counts = buckets.get(period, Counter())
+        series.append({'period': period.isoformat(), 'total': sum(counts.values()), 'by_status': dict(counts)})
+        if group_by == 'week':
+            period += timedelta(days=7)
+        elif group_by == 'month':
+            period = (period.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            period += timedelta(days=1)
+    return series
@@ -0,0 +1,179 @@
+"""
+Doctor Search Autocomplete
+Process-local prefix trie over doctor names and specializations.
+
+Every trie node stores its best suggestions (specializations first, by
+number of doctors, then doctors by name), so a lookup is one walk down
+the typed prefix with no scoring or database access.
+
+Names (from User.username, "john_smith" -> "john smith") and
+specializations are indexed at each word start, so "smi" finds
+"John Smith" and "medic" finds "General Medicine". Blacklisted doctors are
+left out. Commits that write a doctor (or its user row) mark the trie stale and it
+is rebuilt on the next lookup; a periodic rebuild picks up writes made
+by other processes.
+"""
+
+import re
+import time
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.models import db, User, Doctor
+
+DEFAULT_SUGGESTION_LIMIT = 8
+MAX_SUGGESTION_LIMIT = 20
+
+# Full rebuild interval (seconds), picks up writes from other processes
+REBUILD_INTERVAL = 300
+
+# Key in Session.info flagging a transaction that wrote doctors/users
+_PENDING_KEY = 'autocomplete_pending'
+
+
+def normalize(value):
+    """Lowercase, underscores to spaces, collapse whitespace, drop a "Dr." prefix."""
+    text = re.sub(r'[\s_]+', ' ', (value or '').lower()).strip()
+    return re.sub(r'^dr\.?\s*', '', text)
+
+
+def word_start_keys(text):
+    """
+    Every suffix of a normalized name that starts at a word
+
+    "general medicine" -> ["general medicine", "medicine"]; punctuation
+    also separates words ("obstetrics/gynecology" -> ..., "gynecology").
+    """
+    return [text[match.start():] for match in re.finditer(r'[^\W_]+', text)]
+
+
+class _TrieNode:
+    __slots__ = ('children', 'suggestions')
+
+    def __init__(self):
+        self.children = {}
+        self.suggestions = []
+
+
+class AutocompleteIndex:
+    """Prefix trie of doctor and specialization suggestions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._root = _TrieNode()
+        self._built_at = None
+        self._stale = True
+
+    def mark_stale(self):
+        """Rebuild on next lookup."""
+        self._stale = True
+
+    def _needs_rebuild(self):
+        return self._stale or time.monotonic() - self._built_at > REBUILD_INTERVAL
+
+    @staticmethod
+    def _insert(root, key, suggestion):
+        node = root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            if len(node.suggestions) < MAX_SUGGESTION_LIMIT and suggestion not in node.suggestions:
+                node.suggestions.append(suggestion)
+
+    def _rebuild(self):
+        # Cleared before reading, so writes committed mid-rebuild trigger another one
+        self._stale = False
+        rows = db.session.query(
+            Doctor.id, Doctor.doctor_id, User.username, Doctor.specialization
+        ).join(User, User.id == Doctor.user_id).filter(User.is_blacklisted == False).all()  # noqa: E712
+
+        specializations = {}
+        for _, _, _, specialization in rows:
+            if specialization:
+                specializations[specialization] = specializations.get(specialization, 0) + 1
+
+        # Suggestions are inserted in rank order, so each node keeps the best ones
+        ranked = [
+            ({'type': 'specialization', 'name': name, 'doctor_count': count}, word_start_keys(normalize(name)))
+            for name, count in sorted(specializations.items(), key=lambda item: (-item[1], item[0].lower()))
+        ]
+        for doctor_pk, doctor_code, username, specialization in sorted(rows, key=lambda row: normalize(row[2])):
+            suggestion = {'type': 'doctor', 'id': doctor_pk, 'doctor_id': doctor_code,
+                          'username': username, 'specialization': specialization}
+            ranked.append((suggestion, word_start_keys(normalize(username))))
+
+        root = _TrieNode()
+        for suggestion, keys in ranked:
+            for key in keys:
+                self._insert(root, key, suggestion)
+
+        # Swap in the finished trie so concurrent lookups never see a partial one
+        self._root = root
+        self._built_at = time.monotonic()
+
+    def suggest(self, prefix, limit=DEFAULT_SUGGESTION_LIMIT):
+        """
+        Suggestions whose name/specialization has a word starting with `prefix`
+
+        Returns:
+            list: Suggestion dicts ('type' is 'specialization' or 'doctor')
+        """
+        key = normalize(prefix)
+        if not key:
+            return []
+
+        if self._needs_rebuild():
+            with self._lock:
+                if self._needs_rebuild():
+                    self._rebuild()
+
+        node = self._root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.suggestions[:limit]
+
+
+# Shared per-process index
+autocomplete_index = AutocompleteIndex()
+
+
+def parse_suggestion_limit(value):
+    """
+    Parse the `limit` query parameter for autocomplete
+
+    Raises:
+        ValueError: If not an integer between 1 and MAX_SUGGESTION_LIMIT
+    """
+    if value is None:
+        return DEFAULT_SUGGESTION_LIMIT
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1 or limit > MAX_SUGGESTION_LIMIT:
+        raise ValueError(f'limit must be between 1 and {MAX_SUGGESTION_LIMIT}')
+    return limit
+
+
+# ---------- Refresh on doctor create/update/blacklist ----------
+
+@event.listens_for(Session, 'after_flush')
+def _record_doctor_writes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Doctor) or (isinstance(obj, User) and obj.role == 'Doctor'):
+            session.info[_PENDING_KEY] = True
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_doctor_writes(session):
+    if session.info.pop(_PENDING_KEY, None):
+        autocomplete_index.mark_stale()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_doctor_writes(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,411 @@
+"""
+Availability Calendar Engine
+Builds doctor slot calendars for a date window from one range query.
+
+Time slots:
+- Morning: 08:00-12:00 (booked as 10:00)
+- Evening: 16:00-21:00 (booked as 18:00)
+"""
+
+from datetime import date, datetime, time, timedelta
+import json
+
+from sqlalchemy import case
+
+from models.models import db, User, Doctor, Appointment, DoctorSlot
+
+# Window limits for availability lookups
+DEFAULT_WINDOW_DAYS = 7
+MAX_WINDOW_DAYS = 90
+
+# Date format used by the frontend and stored in Doctor.availability
+DATE_FORMAT = '%d/%m/%Y'
+
+# Slot names stored in DoctorSlot.slot, with their [start, end) hours
+SLOT_NAMES = ('morning', 'evening')
+SLOT_HOURS = {
+    'morning': (8, 12),
+    'evening': (16, 21)
+}
+
+
+def slot_for_time(appointment_time):
+    """Map a booking time to its slot name ('morning', 'evening' or None)."""
+    hour = appointment_time.hour
+    for slot, (start_hour, end_hour) in SLOT_HOURS.items():
+        if start_hour <= hour < end_hour:
+            return slot
+    return None
+
+
+def parse_window_days(raw_value):
+    """
+    Parse the `days=` query parameter
+
+    Returns:
+        int: Window size in days, or None if the value is invalid
+    """
+    if raw_value in (None, ''):
+        return DEFAULT_WINDOW_DAYS
+    try:
+        days = int(raw_value)
+    except (TypeError, ValueError):
+        return None
+    if days < 1 or days > MAX_WINDOW_DAYS:
+        return None
+    return days
+
+
+def parse_offered_slots(availability_json):
+    """
+    Parse a legacy Doctor.availability JSON string
+
+    Only used when migrating existing data into DoctorSlot rows.
+
+    Returns:
+        dict: {'dd/mm/YYYY': {'morning': bool, 'evening': bool}}
+    """
+    if not availability_json:
+        return {}
+    try:
+        entries = json.loads(availability_json)
+    except (json.JSONDecodeError, TypeError):
+        return {}
+    if not isinstance(entries, list):
+        return {}
+
+    offered = {}
+    for entry in entries:
+        if isinstance(entry, dict) and entry.get('date'):
+            offered[entry['date']] = {
+                'morning': bool(entry.get('morning', False)),
+                'evening': bool(entry.get('evening', False))
+            }
+    return offered
+
+
+def fetch_offered_slots(doctor_ids, start_date, end_date):
+    """
+    Fetch offered slots for the window with a single indexed query
+
+    Returns:
+        set: {(doctor_id, date, slot)} for each offered slot
+    """
+    if not doctor_ids:
+        return set()
+
+    rows = db.session.query(DoctorSlot.doctor_id, DoctorSlot.date, DoctorSlot.slot)\
+        .filter(
+            DoctorSlot.doctor_id.in_(list(doctor_ids)),
+            DoctorSlot.date >= start_date,
+            DoctorSlot.date <= end_date
+        ).all()
+    return {(doctor_id, slot_date, slot) for doctor_id, slot_date, slot in rows}
+
+
+def replace_doctor_slots(doctor_id, availability_entries):
+    """
+    Replace a doctor's slots for every date present in the payload
+
+    Args:
+        doctor_id (int): Doctor table ID
+        availability_entries (list): [{"date": "dd/mm/YYYY", "morning": bool, "evening": bool}]
+
+    Raises:
+        ValueError: If the payload is not a list of day entries with valid dates
+
+    Note: Caller is responsible for committing the session.
+    """
+    if not isinstance(availability_entries, list):
+        raise ValueError('availability must be a list of day entries')
+
+    days = {}
+    for entry in availability_entries:
+        if not isinstance(entry, dict) or not entry.get('date'):
+            raise ValueError('Each availability entry needs a date')
+        try:
+            slot_date = datetime.strptime(entry['date'], DATE_FORMAT).date()
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid date '{entry.get('date')}'. Use DD/MM/YYYY")
+        days[slot_date] = entry
+
+    if not days:
+        return
+
+    # Drop existing rows for these dates, then insert the offered slots
+    DoctorSlot.query.filter(
+        DoctorSlot.doctor_id == doctor_id,
+        DoctorSlot.date.in_(list(days.keys()))
+    ).delete(synchronize_session=False)
+
+    for slot_date, entry in days.items():
+        for slot in SLOT_NAMES:
+            if entry.get(slot):
+                db.session.add(DoctorSlot(doctor_id=doctor_id, date=slot_date, slot=slot))
+
+
+def parse_availability_entries(value):
+    """
+    Accept availability as a list of day entries or as the legacy JSON string of one
+
+    An empty value (None, '' or the old '{}' default) means no entries.
+
+    Returns:
+        list: [{"date": "dd/mm/YYYY", "morning": bool, "evening": bool}]
+
+    Raises:
+        ValueError: If the value is neither
+    """
+    if value in (None, '', '{}'):
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            raise ValueError('availability must be a list of day entries')
+    if not isinstance(value, list):
+        raise ValueError('availability must be a list of day entries')
+    return value
+
+
+def get_doctor_schedules(doctor_ids, start_date=None, days=DEFAULT_WINDOW_DAYS):
+    """
+    Build several doctors' own availability views (no booking information)
+
+    Every day of the window is listed, including days with neither slot
+    offered, so the payload matches the grid the doctor saves. All
+    doctors' slots come from one range query.
+
+    Args:
+        doctor_ids (list): Doctor table IDs
+        start_date (date): First day of the window (defaults to today)
+        days (int): Window size in days
+
+    Returns:
+        dict: {doctor_id: [{"date": "dd/mm/YYYY", "morning": bool, "evening": bool}]}
+    """
+    start_date = start_date or date.today()
+    window = [start_date + timedelta(days=day_offset) for day_offset in range(days)]
+    offered_slots = fetch_offered_slots(doctor_ids, window[0], window[-1])
+
+    return {
+        doctor_id: [
+            {
+                'date': slot_date.strftime(DATE_FORMAT),
+                'morning': (doctor_id, slot_date, 'morning') in offered_slots,
+                'evening': (doctor_id, slot_date, 'evening') in offered_slots
+            }
+            for slot_date in window
+        ]
+        for doctor_id in doctor_ids
+    }
+
+
+def get_doctor_schedule(doctor_id, start_date=None, days=DEFAULT_WINDOW_DAYS):
+    """
+    Build one doctor's availability view for the window (see get_doctor_schedules)
+
+    Returns:
+        list: [{"date": "dd/mm/YYYY", "morning": bool, "evening": bool}], one entry per day
+    """
+    return get_doctor_schedules([doctor_id], start_date, days)[doctor_id]
+
+
+def _slot_is_booked():
+    """Correlated EXISTS clause: an active booking occupies the DoctorSlot row."""
+    slot_start = case(
+        *[(DoctorSlot.slot == slot, time(start_hour, 0)) for slot, (start_hour, _) in SLOT_HOURS.items()]
+    )
+    slot_end = case(
+        *[(DoctorSlot.slot == slot, time(end_hour, 0)) for slot, (_, end_hour) in SLOT_HOURS.items()]
+    )
+    return db.session.query(Appointment.id).filter(
+        Appointment.doctor_id == DoctorSlot.doctor_id,
+        Appointment.date == DoctorSlot.date,
+        Appointment.status != 'Cancelled',
+        Appointment.time >= slot_start,
+        Appointment.time < slot_end
+    ).exists()
+
+
+def find_next_available_slots(start_date, end_date, limit, doctor_filter=None):
+    """
+    Find the earliest open slots across all non-blacklisted doctors
+
+    Walks the (date, slot) index on DoctorSlot in date order and skips
+    slots with an active booking, stopping as soon as `limit` rows match.
+
+    Args:
+        start_date (date): First day to search (inclusive)
+        end_date (date): Last day to search (inclusive)
+        limit (int): Maximum number of slots to return
+        doctor_filter: Optional SQLAlchemy condition on Doctor (e.g. specialization)
+
+    Returns:
+        list: Dicts with doctor_id, username, specialization, date and slot
+    """
+    # Morning sorts before evening within a day
+    slot_order = case(
+        *[(DoctorSlot.slot == slot, position) for position, slot in enumerate(SLOT_NAMES)]
+    )
+
+    query = db.session.query(
+        DoctorSlot.date, DoctorSlot.slot, Doctor.id, Doctor.doctor_id,
+        Doctor.specialization, User.username
+    )\
+        .join(Doctor, DoctorSlot.doctor_id == Doctor.id)\
+        .join(User, Doctor.user_id == User.id)\
+        .filter(
+            DoctorSlot.date >= start_date,
+            DoctorSlot.date <= end_date,
+            User.is_blacklisted == False,
+            ~_slot_is_booked()
+        )
+
+    if doctor_filter is not None:
+        query = query.filter(doctor_filter)
+
+    rows = query.order_by(DoctorSlot.date, slot_order, Doctor.id).limit(limit).all()
+
+    return [
+        {
+            'date': slot_date,
+            'slot': slot,
+            'doctor_id': doctor_pk,
+            'doctor_code': doctor_code,
+            'specialization': specialization,
+            'username': username
+        }
+        for slot_date, slot, doctor_pk, doctor_code, specialization, username in rows
+    ]
+
+
+def find_free_doctors(target_date, slot, doctor_filter=None):
+    """
+    Find non-blacklisted doctors offering a slot on a date that is not already booked
+
+    Uses the (date, slot) index on DoctorSlot rather than loading doctors.
+
+    Args:
+        target_date (date): Day to check
+        slot (str): 'morning' or 'evening'
+        doctor_filter: Optional SQLAlchemy condition on Doctor (e.g. specialization)
+
+    Returns:
+        list: Dicts with doctor_id, doctor_code, specialization and username, by doctor ID
+    """
+    query = db.session.query(Doctor.id, Doctor.doctor_id, Doctor.specialization, User.username)\
+        .join(DoctorSlot, DoctorSlot.doctor_id == Doctor.id)\
+        .join(User, Doctor.user_id == User.id)\
+        .filter(
+            DoctorSlot.date == target_date,
+            DoctorSlot.slot == slot,
+            User.is_blacklisted == False,
+            ~_slot_is_booked()
+        )
+
+    if doctor_filter is not None:
+        query = query.filter(doctor_filter)
+
+    return [
+        {
+            'doctor_id': doctor_pk,
+            'doctor_code': doctor_code,
+            'specialization': specialization,
+            'username': username
+        }
+        for doctor_pk, doctor_code, specialization, username in query.order_by(Doctor.id).all()
+    ]
+
+
+def fetch_booked_slots(doctor_ids, start_date, end_date):
+    """
+    Fetch every non-cancelled booking in the window with a single range query
+
+    Args:
+        doctor_ids (list): Doctor table IDs to include
+        start_date (date): First day of the window (inclusive)
+        end_date (date): Last day of the window (inclusive)
+
+    Returns:
+        set: {(doctor_id, date, slot)} for each booked slot
+    """
+    if not doctor_ids:
+        return set()
+
+    # Grouped by (doctor_id, date, time) so each booked slot comes back once
+    rows = db.session.query(Appointment.doctor_id, Appointment.date, Appointment.time)\
+        .filter(
+            Appointment.doctor_id.in_(list(doctor_ids)),
+            Appointment.date >= start_date,
+            Appointment.date <= end_date,
+            Appointment.status != 'Cancelled'
+        )\
+        .group_by(Appointment.doctor_id, Appointment.date, Appointment.time)\
+        .all()
+
+    booked = set()
+    for doctor_id, booking_date, booking_time in rows:
+        slot = slot_for_time(booking_time)
+        if slot:
+            booked.add((doctor_id, booking_date, slot))
+    return booked
+
+
+def build_calendar(doctor_id, offered_slots, booked_slots, start_date, days):
+    """
+    Combine offered and booked slots into the per-day calendar payload
+
+    Args:
+        doctor_id (int): Doctor table ID
+        offered_slots (set): Output of fetch_offered_slots()
+        booked_slots (set): Output of fetch_booked_slots()
+        start_date (date): First day of the window
+        days (int): Number of days in the window
+
+    Returns:
+        list: Day entries with availability and booking flags
+    """
+    calendar = []
+    for day_offset in range(days):
+        target_date = start_date + timedelta(days=day_offset)
+
+        morning_booked = (doctor_id, target_date, 'morning') in booked_slots
+        evening_booked = (doctor_id, target_date, 'evening') in booked_slots
+
+        calendar.append({
+            'date': target_date.strftime(DATE_FORMAT),
+            'morning': (doctor_id, target_date, 'morning') in offered_slots and not morning_booked,
+            'evening': (doctor_id, target_date, 'evening') in offered_slots and not evening_booked,
+            'morning_booked': morning_booked,
+            'evening_booked': evening_booked
+        })
+    return calendar
+
+
+def build_availability_calendars(doctors, days=DEFAULT_WINDOW_DAYS, start_date=None):
+    """
+    Build slot calendars for one or more doctors
+
+    Offered slots and bookings for the window are each loaded in one query,
+    so the number of statements does not grow with the number of days.
+
+    Args:
+        doctors (list): Doctor model instances
+        days (int): Window size in days
+        start_date (date): First day of the window (defaults to today)
+
+    Returns:
+        dict: {doctor.id: calendar list}
+    """
+    start_date = start_date or date.today()
+    end_date = start_date + timedelta(days=days - 1)
+    doctor_ids = [doctor.id for doctor in doctors]
+
+    offered_slots = fetch_offered_slots(doctor_ids, start_date, end_date)
+    booked_slots = fetch_booked_slots(doctor_ids, start_date, end_date)
+
+    return {
+        doctor_id: build_calendar(doctor_id, offered_slots, booked_slots, start_date, days)
+        for doctor_id in doctor_ids
+    }
@@ -0,0 +1,280 @@
+"""
+Bulk Treatment Export
+Exports every patient's treatment history into one zip archive with a
+manifest, for compliance requests.
+
+Patients are split into shards of BULK_SHARD_SIZE (by ascending id). A
+shard is exported by export_shard(): one streamed query for all of its
+patients (grouped by patient), one file per patient, a shared doctor
+name cache, and a shard manifest written last (so finished shards can be
+counted for progress). assemble_archive() then stores the files in a zip
+next to a manifest.json (rows, bytes and SHA-256 per patient file).
+
+Shards run in separate processes, each with its own database session:
+- run_bulk_export(): a ProcessPoolExecutor in the calling process
+  (management script, benchmark)
+- tasks.bulk_export_patient_histories: a Celery chord with one subtask
+  per shard. Celery's prefork workers are daemonic and cannot start a
+  process pool of their own, so Celery distributes the shards instead
+
+Per-patient files are gzip-compressed by default and stored uncompressed
+in the zip, so assembling the archive is a plain copy.
+
+Archives and scratch files live in their own subdirectory of the export
+directory (bulk_directory()), out of reach of the per-patient export
+eviction. evict_archives() applies their own retention,
+BULK_ARCHIVE_RETENTION_SECONDS, each time a new archive is built.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+
+from models.models import db, Patient
+from services.treatment_export import (
+    DoctorNameCache, export_directory, export_file_extension, iter_patient_treatment_rows, write_export_rows,
+    EXPORT_FIELDS
+)
+
+# Patients per shard (one query and one worker task each)
+BULK_SHARD_SIZE = int(os.environ.get('BULK_EXPORT_SHARD_SIZE', '250'))
+
+ARCHIVE_PREFIX = 'bulk_treatments_'
+
+# How long finished archives stay downloadable (compliance pulls are rare and large)
+BULK_ARCHIVE_RETENTION_SECONDS = int(os.environ.get('BULK_ARCHIVE_RETENTION_HOURS', '168')) * 60 * 60
+
+
+def new_job_id():
+    """Sortable, unique id for one bulk export run."""
+    return f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def archive_filename(job_id):
+    return f'{ARCHIVE_PREFIX}{job_id}.zip'
+
+
+def bulk_directory():
+    """Subdirectory of the export directory for archives and job scratch files; created if missing."""
+    directory = os.path.join(export_directory(), 'bulk')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def archive_path(filename):
+    """Path of a finished archive (only the base name of `filename` is used)."""
+    return os.path.join(bulk_directory(), os.path.basename(filename))
+
+
+def job_work_dir(job_id):
+    """Scratch directory holding a job's per-patient files until the archive is built."""
+    return os.path.join(bulk_directory(), job_id)
+
+
+def plan_shards(shard_size=BULK_SHARD_SIZE):
+    """
+    Partition all patients into shards
+
+    Returns:
+        list: Lists of patient ids, ascending
+    """
+    patient_ids = [patient_id for (patient_id,) in db.session.query(Patient.id).order_by(Patient.id)]
+    return [patient_ids[i:i + shard_size] for i in range(0, len(patient_ids), shard_size)]
+
+
+def count_finished_shards(job_id):
+    """Shards whose manifest has been written (for progress reporting)."""
+    try:
+        return sum(1 for name in os.listdir(job_work_dir(job_id)) if name.endswith('.json'))
+    except FileNotFoundError:
+        return 0
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as export_file:
+        for block in iter(lambda: export_file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_shard(job_id, shard_index, patient_ids, export_format='csv', compress=True):
+    """
+    Export one shard of patients to per-patient files
+
+    Patients without appointments get a file with just the header, so the
+    archive holds one file per patient.
+
+    Returns:
+        list: Manifest entries (patient_id, file, rows, bytes, sha256)
+    """
+    work_dir = job_work_dir(job_id)
+    patient_dir = os.path.join(work_dir, 'patients')
+    os.makedirs(patient_dir, exist_ok=True)
+    extension = export_file_extension(export_format, compress)
+
+    rows_by_patient = groupby(
+        iter_patient_treatment_rows(patient_ids, doctor_names=DoctorNameCache()), key=itemgetter(0)
+    )
+    next_group = next(rows_by_patient, None)
+
+    entries = []
+    for patient_id in sorted(patient_ids):
+        if next_group is not None and next_group[0] == patient_id:
+            patient_rows = (row for _, row in next_group[1])
+        else:
+            patient_rows = iter(())
+
+        filename = f'patient_{patient_id}.{extension}'
+        path = os.path.join(patient_dir, filename)
+        rows = write_export_rows(patient_rows, path, export_format, compress)
+        if rows:
+            # This patient's group has been consumed; move on to the next one
+            next_group = next(rows_by_patient, None)
+
+        entries.append({
+            'patient_id': patient_id,
+            'file': f'patients/{filename}',
+            'rows': rows,
+            'bytes': os.path.getsize(path),
+            'sha256': _sha256(path),
+        })
+
+    # Written last: its presence marks the shard as finished
+    with open(os.path.join(work_dir, f'shard_{shard_index:05d}.json'), 'w') as shard_manifest:
+        json.dump(entries, shard_manifest)
+    db.session.remove()
+    return entries
+
+
+def assemble_archive(job_id, entries, export_format='csv', compress=True, started_at=None, workers=None):
+    """
+    Build the job's zip archive (patient files + manifest.json) and remove its scratch files
+
+    Returns:
+        dict: filename, patients, rows, size_bytes and seconds for the job
+    """
+    work_dir = job_work_dir(job_id)
+    entries = sorted(entries, key=itemgetter('patient_id'))
+    filename = archive_filename(job_id)
+    path = archive_path(filename)
+
+    manifest = {
+        'job_id': job_id,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'format': export_format,
+        'compressed': compress,
+        'columns': list(EXPORT_FIELDS),
+        'patients': len(entries),
+        'rows': sum(entry['rows'] for entry in entries),
+        'files': entries,
+    }
+
+    # Compressed patient files gain nothing from deflate: store them as-is
+    member_compression = zipfile.ZIP_STORED if compress or export_format == 'parquet' else zipfile.ZIP_DEFLATED
+    temp_path = f'{path}.part'
+    with zipfile.ZipFile(temp_path, 'w', compression=member_compression, allowZip64=True) as archive:
+        archive.writestr('manifest.json', json.dumps(manifest, indent=2), compress_type=zipfile.ZIP_DEFLATED)
+        for entry in entries:
+            archive.write(os.path.join(work_dir, entry['file']), entry['file'])
+    os.replace(temp_path, path)
+    shutil.rmtree(work_dir, ignore_errors=True)
+    evict_archives(keep=[filename])
+
+    result = {
+        'job_id': job_id,
+        'filename': filename,
+        'format': export_format,
+        'patients': manifest['patients'],
+        'rows': manifest['rows'],
+        'size_bytes': os.path.getsize(path),
+    }
+    if started_at is not None:
+        result['seconds'] = round(time.time() - started_at, 2)
+    if workers is not None:
+        result['workers'] = workers
+    return result
+
+
+def evict_archives(keep=(), ttl=BULK_ARCHIVE_RETENTION_SECONDS):
+    """
+    Delete archives, and scratch left by jobs that never finished, older than ttl
+
+    Args:
+        keep (iterable): Archive names never deleted (e.g. the one just built)
+
+    Returns:
+        int: Archives and scratch directories removed
+    """
+    keep = set(keep)
+    cutoff = time.time() - ttl
+    removed = 0
+    for entry in os.scandir(bulk_directory()):
+        if entry.name in keep or entry.stat().st_mtime > cutoff:
+            continue
+        if entry.is_dir():
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:  # Evicted concurrently by another worker
+                continue
+        removed += 1
+    return removed
+
+
+def _init_worker():
+    """Process pool initializer: an app context and fresh database connections per worker."""
+    from app_config import app
+    app.app_context().push()
+    # Connections inherited from the parent (fork) must not be shared
+    db.engine.dispose(close=False)
+
+
+def run_bulk_export(export_format='csv', compress=True, workers=None, shard_size=BULK_SHARD_SIZE, progress=None):
+    """
+    Export all patients with a process pool (must be called inside an app context)
+
+    Args:
+        workers (int): Worker processes (default: CPU count); 1 runs shards in-process
+        progress (callable): Called with (finished shards, total shards)
+
+    Returns:
+        dict: See assemble_archive(), plus shards
+    """
+    started_at = time.time()
+    job_id = new_job_id()
+    shards = plan_shards(shard_size)
+    workers = workers or os.cpu_count() or 1
+
+    entries = []
+    if workers == 1:
+        for index, patient_ids in enumerate(shards):
+            entries.extend(export_shard(job_id, index, patient_ids, export_format, compress))
+            if progress:
+                progress(index + 1, len(shards))
+    else:
+        # Workers get their own connections: release ours before forking
+        db.session.remove()
+        db.engine.dispose()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            futures = [
+                executor.submit(export_shard, job_id, index, patient_ids, export_format, compress)
+                for index, patient_ids in enumerate(shards)
+            ]
+            for finished, future in enumerate(as_completed(futures), start=1):
+                entries.extend(future.result())
+                if progress:
+                    progress(finished, len(shards))
+
+    result = assemble_archive(job_id, entries, export_format, compress, started_at, workers)
+    result['shards'] = len(shards)
+    return result
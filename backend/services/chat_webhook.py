@@ -0,0 +1,153 @@
+"""
+Google Chat Webhook Client
+Delivers notification messages to a Google Chat space.
+
+- One keep-alive requests.Session per process (pooled connections)
+- Bounded connect/read timeouts
+- Exponential backoff on connection errors, 429 and 5xx (honours Retry-After)
+- Coalescing: send_many() packs several short messages into as few posts
+  as fit under the API's text size limit
+
+The webhook URL comes from GOOGLE_CHAT_WEBHOOK_URL (it embeds the space's
+key and token, so it is never committed); without it chat notifications
+are disabled. Any URL can be passed to ChatWebhookClient directly (e.g. a
+local HTTP stand-in in tests).
+"""
+
+import os
+import time
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeouts in seconds
+REQUEST_TIMEOUT = (3.05, 10)
+
+# Attempts per post, and the backoff before retry n: BACKOFF_BASE * 2**(n-1)
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 0.5
+MAX_BACKOFF = 8.0
+
+# Google Chat rejects message text over 4,096 characters; leave headroom
+MAX_TEXT_CHARS = 4000
+
+# Separator between coalesced messages
+MESSAGE_SEPARATOR = '\n\n'
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def pack_messages(messages, max_chars=MAX_TEXT_CHARS):
+    """
+    Pack messages into as few texts as possible, each at most max_chars long
+
+    Messages stay in order and are never split; a single oversized
+    message is truncated.
+
+    Returns:
+        list: (text, [indices of the messages it contains]) tuples
+    """
+    batches = []
+    current, indices = '', []
+    for index, message in enumerate(messages):
+        if len(message) > max_chars:
+            message = message[:max_chars - 3] + '...'
+        if indices and len(current) + len(MESSAGE_SEPARATOR) + len(message) <= max_chars:
+            current += MESSAGE_SEPARATOR + message
+            indices.append(index)
+        else:
+            if indices:
+                batches.append((current, indices))
+            current, indices = message, [index]
+    if indices:
+        batches.append((current, indices))
+    return batches
+
+
+def coalesce(messages, max_chars=MAX_TEXT_CHARS):
+    """Texts from pack_messages(), without the index bookkeeping."""
+    return [text for text, _ in pack_messages(messages, max_chars)]
+
+
+class ChatWebhookClient:
+    """Pooled, retrying poster for one webhook URL."""
+
+    def __init__(self, webhook_url, pool_size=4, timeout=REQUEST_TIMEOUT,
+                 max_attempts=MAX_ATTEMPTS, backoff_base=BACKOFF_BASE):
+        self.webhook_url = webhook_url
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['Content-Type'] = 'application/json; charset=UTF-8'
+
+    def _backoff(self, attempt, response=None):
+        delay = min(self.backoff_base * 2 ** (attempt - 1), MAX_BACKOFF)
+        if response is not None and response.headers.get('Retry-After', '').isdigit():
+            delay = min(float(response.headers['Retry-After']), MAX_BACKOFF)
+        time.sleep(delay)
+
+    def post(self, text):
+        """
+        Post one message, retrying transient failures
+
+        Returns:
+            bool: True if the webhook accepted the message
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = self.session.post(self.webhook_url, json={'text': text}, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_attempts:
+                    print(f"Error sending to Google Chat after {attempt} attempts: {e}")
+                    return False
+                self._backoff(attempt)
+                continue
+
+            if response.status_code < 300:
+                return True
+            if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_attempts:
+                print(f"Google Chat Webhook rejected message: {response.status_code} {response.text[:200]}")
+                return False
+            self._backoff(attempt, response)
+        return False
+
+    def send_many(self, messages):
+        """
+        Deliver several messages, coalesced into as few posts as fit
+
+        Returns:
+            int: Number of posts that were accepted
+        """
+        return sum(1 for text in coalesce(messages) if self.post(text))
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_chat_client():
+    """
+    Shared client for the configured webhook (created on first use, so each
+    forked worker process gets its own connection pool)
+
+    Returns:
+        ChatWebhookClient or None if GOOGLE_CHAT_WEBHOOK_URL is not set
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                webhook_url = os.environ.get('GOOGLE_CHAT_WEBHOOK_URL', '').strip()
+                if not webhook_url:
+                    return None
+                _client = ChatWebhookClient(webhook_url)
+    return _client
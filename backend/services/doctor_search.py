@@ -0,0 +1,217 @@
+"""
+Doctor Full-Text Search
+SQLite FTS5 index over doctor name, specialization and doctor ID.
+
+The `doctor_search` virtual table uses the doctor id as its rowid and is
+kept in sync by triggers on the doctor and user tables, so every write
+path (ORM, bulk query, raw SQL) updates it in the same transaction.
+Queries use token prefix matching ranked by bm25 (ties broken by doctor
+id, so offsets page through a stable order). The blacklist filter is
+applied inside the query, before limit and offset.
+
+On databases without FTS5, search_doctors() falls back to ILIKE matching.
+"""
+
+import re
+
+from sqlalchemy import event, or_, text
+from sqlalchemy.orm import contains_eager, joinedload
+
+from models.models import db, Doctor, User
+
+# Statements creating the index and its sync triggers (all idempotent)
+_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS doctor_search USING fts5(
+        name, specialization, doctor_code, tokenize = 'unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS doctor_search_ai AFTER INSERT ON doctor BEGIN
+        INSERT INTO doctor_search (rowid, name, specialization, doctor_code)
+        VALUES (new.id, (SELECT username FROM "user" WHERE id = new.user_id),
+                new.specialization, new.doctor_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS doctor_search_au AFTER UPDATE ON doctor BEGIN
+        DELETE FROM doctor_search WHERE rowid = old.id;
+        INSERT INTO doctor_search (rowid, name, specialization, doctor_code)
+        VALUES (new.id, (SELECT username FROM "user" WHERE id = new.user_id),
+                new.specialization, new.doctor_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS doctor_search_ad AFTER DELETE ON doctor BEGIN
+        DELETE FROM doctor_search WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS doctor_search_user_au AFTER UPDATE OF username ON "user" BEGIN
+        UPDATE doctor_search SET name = new.username
+        WHERE rowid IN (SELECT id FROM doctor WHERE user_id = new.id);
+    END
+    """,
+]
+
+_REBUILD_SQL = [
+    "DELETE FROM doctor_search",
+    """
+    INSERT INTO doctor_search (rowid, name, specialization, doctor_code)
+    SELECT doctor.id, "user".username, doctor.specialization, doctor.doctor_id
+    FROM doctor JOIN "user" ON "user".id = doctor.user_id
+    """,
+]
+
+# Per-process state: None = not checked yet, True/False = FTS5 usable
+_index_available = None
+
+
+def create_search_index(connection, rebuild=False):
+    """
+    Create the FTS5 table and triggers on a SQLite connection
+
+    Args:
+        connection: SQLAlchemy connection (inside a transaction)
+        rebuild (bool): Repopulate the index from the doctor table
+    """
+    for statement in _INDEX_DDL:
+        connection.execute(text(statement))
+
+    if not rebuild:
+        indexed = connection.execute(text("SELECT count(*) FROM doctor_search")).scalar()
+        doctors = connection.execute(text("SELECT count(*) FROM doctor")).scalar()
+        rebuild = indexed != doctors
+
+    if rebuild:
+        for statement in _REBUILD_SQL:
+            connection.execute(text(statement))
+
+
+@event.listens_for(Doctor.__table__, 'after_create')
+def _create_index_with_schema(target, connection, **kw):
+    """Create the search index whenever db.create_all() creates the doctor table."""
+    if connection.dialect.name == 'sqlite':
+        try:
+            create_search_index(connection)
+        except Exception as e:
+            print(f"Warning: Doctor search index not created: {e}")
+
+
+def _ensure_index():
+    """Lazily create/repair the index once per process; report whether it is usable."""
+    global _index_available
+    if _index_available is None:
+        if db.engine.dialect.name != 'sqlite':
+            _index_available = False
+        else:
+            try:
+                with db.engine.begin() as connection:
+                    create_search_index(connection)
+                _index_available = True
+            except Exception as e:
+                print(f"Warning: Doctor search index unavailable, using ILIKE search: {e}")
+                _index_available = False
+    return _index_available
+
+
+def build_match_expression(query_str):
+    """
+    Turn free text into an FTS5 prefix query
+
+    "bob tur" -> '"bob"* "tur"*' (every token must prefix-match a word).
+    Underscores and punctuation split tokens, matching how usernames
+    like "bob_turing" and IDs like "DOC-2345" are indexed.
+    """
+    tokens = re.findall(r'[^\W_]+', query_str.lower())
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_doctor_ids(query_str, limit=None, offset=0, exclude_blacklisted=False):
+    """
+    Find doctor IDs matching a search string, best match first
+
+    Args:
+        query_str (str): Free text (see build_match_expression)
+        limit (int): Maximum IDs to return (default: every match)
+        offset (int): Matches to skip
+        exclude_blacklisted (bool): Leave out doctors whose user is blacklisted
+
+    Returns:
+        tuple: (doctor IDs ordered by bm25 rank, total number of matches),
+               or None if the full-text index is not available
+    """
+    if not _ensure_index():
+        return None
+
+    match_expression = build_match_expression(query_str)
+    if not match_expression:
+        return [], 0
+
+    from_clause = "FROM doctor_search"
+    conditions = "doctor_search MATCH :match"
+    if exclude_blacklisted:
+        from_clause += ' JOIN doctor ON doctor.id = doctor_search.rowid JOIN "user" ON "user".id = doctor.user_id'
+        conditions += ' AND "user".is_blacklisted = 0'
+    params = {'match': match_expression, 'limit': -1 if limit is None else limit, 'offset': offset}
+
+    rows = db.session.execute(
+        text(f"SELECT doctor_search.rowid {from_clause} WHERE {conditions} "
+             f"ORDER BY doctor_search.rank, doctor_search.rowid LIMIT :limit OFFSET :offset"),
+        params
+    ).all()
+    doctor_ids = [doctor_id for (doctor_id,) in rows]
+
+    if limit is None or (len(doctor_ids) < limit and (doctor_ids or not offset)):
+        # Last page: the total follows without counting
+        total = offset + len(doctor_ids)
+    else:
+        total = db.session.execute(text(f"SELECT count(*) {from_clause} WHERE {conditions}"), params).scalar()
+    return doctor_ids, total
+
+
+def doctors_in_rank_order(ranked_ids):
+    """Load doctors (with users) for search hits, preserving rank order."""
+    if not ranked_ids:
+        return []
+    by_id = {
+        doc.id: doc
+        for doc in Doctor.query.options(joinedload(Doctor.user)).filter(Doctor.id.in_(ranked_ids))
+    }
+    return [by_id[doctor_id] for doctor_id in ranked_ids if doctor_id in by_id]
+
+
+def search_doctors(query_str, limit=None, offset=0, exclude_blacklisted=False):
+    """
+    Search doctors by name, specialization or doctor ID
+
+    Uses the full-text index, or substring matching (ordered by doctor id)
+    where it is unavailable.
+
+    Args:
+        Same as search_doctor_ids()
+
+    Returns:
+        tuple: (Doctor instances with users loaded, total number of matches)
+    """
+    ranked = search_doctor_ids(query_str, limit, offset, exclude_blacklisted)
+    if ranked is not None:
+        doctor_ids, total = ranked
+        return doctors_in_rank_order(doctor_ids), total
+
+    # Handle both underscore and space separated names
+    query_with_underscore = query_str.replace(' ', '_')
+    query = Doctor.query.join(User, Doctor.user_id == User.id).filter(or_(
+        Doctor.specialization.ilike(f'%{query_str}%'),
+        User.username.ilike(f'%{query_str}%'),
+        User.username.ilike(f'%{query_with_underscore}%'),
+        Doctor.doctor_id.ilike(f'%{query_str}%')
+    ))
+    if exclude_blacklisted:
+        query = query.filter(User.is_blacklisted == False)
+
+    total = query.count()
+    query = query.options(contains_eager(Doctor.user)).order_by(Doctor.id).offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all(), total
@@ -0,0 +1,130 @@
+"""
+Treatment Export Cache
+Content-addressed storage for treatment exports.
+
+An export file is named after a hash of the patient's history version and
+the export options, so an unchanged history maps to the file that already
+exists:
+
+- history_version() is one aggregate query over the patient's
+  appointments and treatments (counts, highest ids and latest updated_at).
+  Any insert, delete or ORM update changes it; renaming a doctor does not
+- POST /patient/export/treatments keeps the task id per (patient, key) in
+  the cache and returns it again while that export is running or its
+  file is still on disk, so repeated clicks queue nothing
+- The export task skips writing when the file for its key exists
+- evict_exports() removes files unused for EXPORT_RETENTION_SECONDS, then
+  the least recently used ones while the directory is over
+  EXPORT_DISK_BUDGET_MB. It only looks at files at the top of the export
+  directory: bulk archives live in a subdirectory with their own retention
+  (services/bulk_export.py)
+"""
+
+import hashlib
+import os
+import time
+
+from sqlalchemy import func
+
+from models.models import db, Patient, Appointment, Treatment
+from services.treatment_export import export_directory, export_file_extension, EXPORT_RETENTION_SECONDS
+
+# Bump when export columns or formatting change, so old files are not reused
+EXPORT_LAYOUT_VERSION = 2
+
+# Total size allowed for the export directory
+EXPORT_DISK_BUDGET_BYTES = int(os.environ.get('EXPORT_DISK_BUDGET_MB', '500')) * 1024 * 1024
+
+# Temporary files older than this belong to exports that crashed
+STALE_PART_SECONDS = 60 * 60
+
+
+def history_version(user_id):
+    """
+    Version of a patient's treatment history, from one aggregate query
+
+    Args:
+        user_id (int): The patient's user ID
+
+    Returns:
+        tuple: (patient_id, version string, appointment count), or (None, None, 0)
+               if the user has no patient profile
+    """
+    row = db.session.query(
+        Patient.id,
+        func.count(Appointment.id), func.max(Appointment.id), func.max(Appointment.updated_at),
+        func.count(Treatment.id), func.max(Treatment.id), func.max(Treatment.updated_at)
+    ).outerjoin(Appointment, Appointment.patient_id == Patient.id)\
+        .outerjoin(Treatment, Treatment.appointment_id == Appointment.id)\
+        .filter(Patient.user_id == user_id)\
+        .group_by(Patient.id).first()
+
+    if row is None:
+        return None, None, 0
+    patient_id, appointment_count = row[0], row[1]
+    return patient_id, ':'.join(str(value) for value in row[1:]), appointment_count
+
+
+def export_cache_key(patient_id, version, export_format, compress):
+    """Hash identifying one export's content."""
+    raw = f'{EXPORT_LAYOUT_VERSION}:{patient_id}:{version}:{export_format}:{bool(compress)}'
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def export_filename(patient_id, cache_key, export_format, compress):
+    """Content-addressed file name, e.g. treatments_12_<key>.csv.gz"""
+    return f'treatments_{patient_id}_{cache_key}.{export_file_extension(export_format, compress)}'
+
+
+def evict_exports(keep=(), ttl=EXPORT_RETENTION_SECONDS, budget_bytes=EXPORT_DISK_BUDGET_BYTES):
+    """
+    Delete expired exports, then the least recently used until under budget
+
+    Args:
+        keep (iterable): File names never deleted (e.g. the export just written)
+
+    Returns:
+        tuple: (files removed, bytes freed)
+    """
+    directory = export_directory()
+    keep = set(keep)
+    now = time.time()
+    removed = freed = 0
+    candidates = []
+    total_bytes = 0
+
+    def remove(path, size):
+        nonlocal removed, freed
+        try:
+            os.remove(path)
+        except FileNotFoundError:  # Evicted concurrently by another worker
+            return
+        removed += 1
+        freed += size
+
+    for entry in os.scandir(directory):
+        # Subdirectories (bulk archives and their scratch files) are not per-patient exports
+        if not entry.is_file():
+            continue
+        stat = entry.stat()
+        age = now - stat.st_mtime
+        if entry.name.endswith('.part'):
+            if age > STALE_PART_SECONDS:
+                remove(entry.path, stat.st_size)
+            continue
+        if entry.name in keep:
+            total_bytes += stat.st_size
+        elif age > ttl:
+            remove(entry.path, stat.st_size)
+        else:
+            total_bytes += stat.st_size
+            candidates.append((stat.st_mtime, stat.st_size, entry.path))
+
+    # Oldest (least recently written or reused) first
+    for _, size, path in sorted(candidates):
+        if total_bytes <= budget_bytes:
+            break
+        remove(path, size)
+        total_bytes -= size
+
+    return removed, freed
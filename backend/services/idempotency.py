@@ -0,0 +1,105 @@
+"""
+Idempotency Keys
+Lets clients safely retry write requests by sending an `Idempotency-Key`
+header. The first response for a key is stored in the Flask-Caching
+backend and replayed for retries, so the view does not run again.
+"""
+
+from functools import wraps
+import hashlib
+
+from flask import request, jsonify, make_response
+from flask_jwt_extended import get_jwt_identity
+
+from app_config import cache
+
+# Header sent by clients
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+# How long a completed response is replayed for (24 hours)
+IDEMPOTENCY_TTL = 24 * 60 * 60
+
+# How long an in-flight request holds its key before another attempt may run
+PENDING_TTL = 60
+
+MAX_KEY_LENGTH = 255
+
+
+def _cache_key(idempotency_key):
+    """Scope the key to the caller and the exact path being written."""
+    digest = hashlib.sha256(idempotency_key.encode('utf-8')).hexdigest()
+    return f"idempotency:{get_jwt_identity()}:{request.method}:{request.path}:{digest}"
+
+
+def _request_fingerprint():
+    """Hash of the request body, used to detect a key reused for a different request."""
+    return hashlib.sha256(request.get_data() or b'').hexdigest()
+
+
+def idempotent(view):
+    """
+    Decorator for JWT-protected write endpoints
+
+    Must be placed below @jwt_required() so the caller identity is known.
+    Requests without the header are processed normally.
+
+    Responses:
+        Replays the stored status and body for a repeated key
+        409: Same key is still being processed by another request
+        422: Same key was used with a different request body
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not idempotency_key:
+            return view(*args, **kwargs)
+
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters'}), 400
+
+        cache_key = _cache_key(idempotency_key)
+        fingerprint = _request_fingerprint()
+
+        try:
+            stored = cache.get(cache_key)
+            if stored is None:
+                # Claim the key atomically; add() fails if another request got there first
+                claimed = cache.add(cache_key, {'state': 'pending', 'fingerprint': fingerprint},
+                                    timeout=PENDING_TTL)
+                stored = None if claimed else cache.get(cache_key)
+        except Exception as e:
+            # Cache backend unavailable: process the request without replay protection
+            print(f"Warning: Idempotency store unavailable: {e}")
+            return view(*args, **kwargs)
+
+        if stored is not None:
+            if stored.get('fingerprint') != fingerprint:
+                return jsonify({'error': f'{IDEMPOTENCY_HEADER} was already used with a different request'}), 422
+            if stored.get('state') == 'pending':
+                return jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409
+
+            replay = make_response(stored['body'], stored['status'])
+            replay.mimetype = stored['mimetype']
+            replay.headers['Idempotent-Replayed'] = 'true'
+            return replay
+
+        response = make_response(view(*args, **kwargs))
+
+        try:
+            if response.status_code >= 500:
+                # Let the client retry server errors for real
+                cache.delete(cache_key)
+            else:
+                cache.set(cache_key, {
+                    'state': 'done',
+                    'fingerprint': fingerprint,
+                    'status': response.status_code,
+                    'mimetype': response.mimetype,
+                    'body': response.get_data()
+                }, timeout=IDEMPOTENCY_TTL)
+        except Exception as e:
+            print(f"Warning: Failed to store idempotent response: {e}")
+
+        return response
+
+    return wrapper
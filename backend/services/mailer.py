@@ -0,0 +1,244 @@
+"""
+SMTP Mailer
+Sends email through a pool of authenticated SMTP connections.
+
+- Connections are opened (connect, EHLO, STARTTLS, AUTH) once and reused
+  for many messages, instead of a fresh login per email
+- A semaphore caps concurrent connections per relay, so a burst of
+  reminders cannot exceed the relay's connection limit
+- Connections are recycled after SMTP_MAX_MESSAGES_PER_CONNECTION messages
+  or when idle too long; a dropped connection is reopened once and the
+  message retried
+- EmailTemplate compiles a Jinja template once and renders it per
+  recipient, so a batch pays the template cost a single time
+
+Configuration comes from SMTP_* environment variables. Without SMTP_HOST
+there is no mailer and tasks.send_email prints a mock email instead. Any
+host/port can be passed to SMTPConnectionPool directly (e.g. a local
+stand-in SMTP server in tests and benchmarks).
+"""
+
+import os
+import time
+import queue
+import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+
+from jinja2 import Environment, BaseLoader
+
+DEFAULT_SENDER = 'hospital@example.com'
+
+# Seconds for connect and each SMTP command
+SMTP_TIMEOUT = 10
+
+# Drop a pooled connection idle longer than this (relays close idle sessions)
+IDLE_TIMEOUT = 60
+
+# Transient failures worth one reconnect-and-retry
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class SMTPConnectionPool:
+    """Bounded pool of authenticated connections to one SMTP relay."""
+
+    def __init__(self, host, port=587, username=None, password=None, starttls=False, use_ssl=False,
+                 max_connections=4, max_messages_per_connection=100, timeout=SMTP_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.use_ssl = use_ssl
+        self.max_connections = max_connections
+        self.max_messages_per_connection = max_messages_per_connection
+        self.timeout = timeout
+
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._idle = queue.LifoQueue()  # most recently used first: least likely to have timed out
+        self.connections_opened = 0
+
+    def _open(self):
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        smtp = smtp_class(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.starttls and not self.use_ssl:
+                smtp.starttls()
+                smtp.ehlo()
+            if self.username:
+                smtp.login(self.username, self.password or '')
+        except Exception:
+            self._discard(smtp)
+            raise
+        smtp.messages_sent = 0
+        smtp.last_used = time.monotonic()
+        self.connections_opened += 1
+        return smtp
+
+    @staticmethod
+    def _discard(smtp):
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+    def _checkout(self):
+        while True:
+            try:
+                smtp = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open()
+            if time.monotonic() - smtp.last_used < IDLE_TIMEOUT:
+                return smtp
+            self._discard(smtp)
+
+    def _checkin(self, smtp):
+        smtp.last_used = time.monotonic()
+        if smtp.messages_sent >= self.max_messages_per_connection:
+            self._discard(smtp)
+        else:
+            self._idle.put(smtp)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; blocks while max_connections are in use."""
+        with self._slots:
+            smtp = self._checkout()
+            try:
+                yield smtp
+            except Exception:
+                # State unknown after a failure: never hand this connection out again
+                self._discard(smtp)
+                raise
+            self._checkin(smtp)
+
+    def send(self, message):
+        """
+        Send one EmailMessage over a pooled connection
+
+        Raises:
+            smtplib.SMTPException or OSError if delivery failed
+        """
+        for attempt in (1, 2):
+            try:
+                with self.connection() as smtp:
+                    smtp.send_message(message)
+                    smtp.messages_sent += 1
+                return
+            except RECONNECT_ERRORS:
+                # The relay dropped a pooled connection; retry once on a fresh one
+                if attempt == 2:
+                    raise
+
+    def send_many(self, messages):
+        """
+        Send messages concurrently, up to max_connections at a time
+
+        Returns:
+            list: None for each delivered message, or the exception it failed with
+        """
+        def deliver(message):
+            try:
+                self.send(message)
+            except Exception as e:
+                return e
+            return None
+
+        with ThreadPoolExecutor(self.max_connections) as executor:
+            return list(executor.map(deliver, messages))
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def build_message(sender, to_email, subject, body, is_html=False):
+    """Assemble an EmailMessage (plain text or HTML body)."""
+    message = EmailMessage()
+    message['From'] = sender
+    message['To'] = to_email
+    message['Subject'] = subject
+    message['Date'] = formatdate(localtime=True)
+    message['Message-ID'] = make_msgid(domain=sender.rpartition('@')[2] or None)
+    message.set_content(body, subtype='html' if is_html else 'plain')
+    return message
+
+
+# ---------- Templates ----------
+
+_template_env = Environment(loader=BaseLoader(), autoescape=False)
+_html_template_env = Environment(loader=BaseLoader(), autoescape=True)
+
+
+class EmailTemplate:
+    """Subject and body templates compiled once, rendered per recipient."""
+
+    def __init__(self, subject, body, is_html=False):
+        env = _html_template_env if is_html else _template_env
+        self.is_html = is_html
+        self._subject = _template_env.from_string(subject)
+        self._body = env.from_string(body)
+
+    def render(self, **context):
+        """
+        Returns:
+            tuple: (subject, body)
+        """
+        return self._subject.render(**context), self._body.render(**context)
+
+
+# ---------- Shared mailer ----------
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _env_flag(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def get_smtp_pool():
+    """
+    Shared pool for the relay configured in SMTP_* environment variables
+    (one pool per relay and process)
+
+    Returns:
+        SMTPConnectionPool or None if SMTP_HOST is not set
+    """
+    host = os.environ.get('SMTP_HOST')
+    if not host:
+        return None
+    port = int(os.environ.get('SMTP_PORT', '587'))
+    username = os.environ.get('SMTP_USERNAME') or None
+
+    key = (host, port, username)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = SMTPConnectionPool(
+                    host, port,
+                    username=username,
+                    password=os.environ.get('SMTP_PASSWORD'),
+                    starttls=_env_flag('SMTP_STARTTLS', port == 587),
+                    use_ssl=_env_flag('SMTP_SSL', port == 465),
+                    max_connections=int(os.environ.get('SMTP_MAX_CONNECTIONS', '4')),
+                    max_messages_per_connection=int(os.environ.get('SMTP_MAX_MESSAGES_PER_CONNECTION', '100')),
+                )
+                _pools[key] = pool
+    return pool
+
+
+def default_sender():
+    return os.environ.get('SMTP_FROM', DEFAULT_SENDER)
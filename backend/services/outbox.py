@@ -0,0 +1,236 @@
+"""
+Notification Outbox
+Transactional outbox for email and Google Chat notifications.
+
+Code that triggers a notification (booking, reminder, report, export)
+calls enqueue_email()/enqueue_chat() inside its own transaction, so the
+notification exists if and only if the change committed. The
+dispatch_notifications Celery task drains due rows in batches:
+
+- Rows are claimed with a lease (claimed_by/locked_until); a dispatcher
+  that crashes mid-batch leaves rows that are re-claimed once the lease
+  expires, giving at-least-once delivery
+- Each channel has its own thread pool, so a slow webhook cannot hold
+  up email (and vice versa); chat rows in a batch are coalesced
+- Failures are retried with exponential backoff, then marked 'failed'
+- A dedupe_key makes enqueueing idempotent (e.g. one reminder per
+  appointment even if the reminder sweep runs twice)
+- Rows can be scheduled for later (available_at) and withdrawn again
+  before they are sent (discard_pending)
+"""
+
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models.models import db, NotificationOutbox
+from services.chat_webhook import get_chat_client, pack_messages
+
+CHANNEL_EMAIL = 'email'
+CHANNEL_CHAT = 'chat'
+
+# Concurrent deliveries per channel within one dispatcher
+CHANNEL_CONCURRENCY = {
+    # Email defaults to the SMTP pool's connection cap (services/mailer.py)
+    CHANNEL_EMAIL: int(os.environ.get('OUTBOX_EMAIL_CONCURRENCY', os.environ.get('SMTP_MAX_CONNECTIONS', '4'))),
+    CHANNEL_CHAT: int(os.environ.get('OUTBOX_CHAT_CONCURRENCY', '2')),
+}
+
+DISPATCH_BATCH_SIZE = 200
+
+# Prefixes matched per DELETE in discard_pending()
+DISCARD_CHUNK_SIZE = 100
+
+# How long a claimed row is reserved for the dispatcher that claimed it
+CLAIM_LEASE = timedelta(minutes=5)
+
+# Failed deliveries: retry after RETRY_BASE * 2**(attempt-1), give up after MAX_DELIVERY_ATTEMPTS
+MAX_DELIVERY_ATTEMPTS = 5
+RETRY_BASE = timedelta(seconds=30)
+
+
+# ---------- Enqueue (inside the caller's transaction) ----------
+
+def _enqueue(channel, body, recipient=None, subject=None, is_html=False, dedupe_key=None, available_at=None):
+    now = datetime.now()
+    values = {
+        'channel': channel, 'recipient': recipient, 'subject': subject, 'body': body,
+        'is_html': is_html, 'dedupe_key': dedupe_key, 'status': 'pending', 'attempts': 0,
+        'available_at': available_at or now, 'created_at': now,
+    }
+    table = NotificationOutbox.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dedupe_key and dialect in ('sqlite', 'postgresql'):
+        # Duplicate keys are skipped by the database without failing the caller's transaction
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        db.session.execute(insert(table).values(**values).on_conflict_do_nothing(index_elements=['dedupe_key']))
+        return
+
+    if dedupe_key and db.session.query(NotificationOutbox.id).filter_by(dedupe_key=dedupe_key).first():
+        return
+    db.session.execute(table.insert().values(**values))
+
+
+def enqueue_email(recipient, subject, body, is_html=False, dedupe_key=None, available_at=None):
+    """Add an email to the outbox (sent from available_at on); committed with the caller's changes."""
+    _enqueue(CHANNEL_EMAIL, body, recipient=recipient, subject=subject, is_html=is_html,
+             dedupe_key=dedupe_key, available_at=available_at)
+
+
+def enqueue_chat(message, dedupe_key=None, available_at=None):
+    """Add a Google Chat message to the outbox (sent from available_at on); committed with the caller's changes."""
+    _enqueue(CHANNEL_CHAT, message, dedupe_key=dedupe_key, available_at=available_at)
+
+
+def discard_pending(dedupe_key_prefixes):
+    """
+    Delete unsent rows whose dedupe_key starts with one of the prefixes
+
+    Used to withdraw scheduled notifications (e.g. the reminder of a
+    cancelled appointment) inside the caller's transaction. Rows already
+    claimed by a dispatcher are left alone.
+    """
+    prefixes = list(dedupe_key_prefixes)
+    for start in range(0, len(prefixes), DISCARD_CHUNK_SIZE):
+        chunk = prefixes[start:start + DISCARD_CHUNK_SIZE]
+        db.session.query(NotificationOutbox).filter(
+            NotificationOutbox.status == 'pending',
+            or_(*(NotificationOutbox.dedupe_key.startswith(prefix, autoescape=True) for prefix in chunk))
+        ).delete(synchronize_session=False)
+
+
+# ---------- Dispatch ----------
+
+def _claim(batch_size, now):
+    """Lease up to batch_size due rows to this dispatcher run and return them."""
+    token = str(uuid.uuid4())
+    due = or_(
+        and_(NotificationOutbox.status == 'pending', NotificationOutbox.available_at <= now),
+        # Claimed by a dispatcher that never finished
+        and_(NotificationOutbox.status == 'sending', NotificationOutbox.locked_until < now),
+    )
+    ids = [row_id for (row_id,) in db.session.query(NotificationOutbox.id)
+           .filter(due).order_by(NotificationOutbox.id).limit(batch_size)]
+    if not ids:
+        return token, []
+
+    # Re-check `due` in the UPDATE so concurrent dispatchers never claim the same row
+    db.session.query(NotificationOutbox).filter(NotificationOutbox.id.in_(ids), due).update(
+        {'status': 'sending', 'claimed_by': token, 'locked_until': now + CLAIM_LEASE},
+        synchronize_session=False
+    )
+    db.session.commit()
+
+    rows = NotificationOutbox.query.filter_by(claimed_by=token, status='sending')\
+        .order_by(NotificationOutbox.id).all()
+    return token, rows
+
+
+def _deliver_email(row):
+    from tasks import send_email
+    send_email(row.recipient, row.subject, row.body, is_html=row.is_html)
+    return True
+
+
+def _deliver_chat(text):
+    client = get_chat_client()
+    if client is None:
+        # Chat notifications disabled: nothing to deliver
+        return True
+    return client.post(text)
+
+
+def _record_results(token, rows, errors, now):
+    """
+    Mark delivered rows sent; schedule retries (or give up) for the rest
+
+    Every UPDATE re-checks claimed_by in the database: a row whose lease
+    expired and was re-claimed by another dispatcher is left to that one.
+    """
+    leased = and_(NotificationOutbox.claimed_by == token, NotificationOutbox.status == 'sending')
+    released = {'claimed_by': None, 'locked_until': None}
+
+    sent_ids = [row.id for row in rows if row.id not in errors]
+    if sent_ids:
+        db.session.query(NotificationOutbox).filter(NotificationOutbox.id.in_(sent_ids), leased).update(
+            {'status': 'sent', 'sent_at': now, 'last_error': None, **released},
+            synchronize_session=False
+        )
+
+    for row in rows:
+        error = errors.get(row.id)
+        if error is None:
+            continue
+        # attempts was read under this lease, so nobody else has changed it
+        attempts = row.attempts + 1
+        if attempts >= MAX_DELIVERY_ATTEMPTS:
+            outcome = {'status': 'failed'}
+        else:
+            outcome = {'status': 'pending', 'available_at': now + RETRY_BASE * 2 ** (attempts - 1)}
+        db.session.query(NotificationOutbox).filter(NotificationOutbox.id == row.id, leased).update(
+            {'attempts': attempts, 'last_error': error[:1000], **released, **outcome},
+            synchronize_session=False
+        )
+    db.session.commit()
+
+
+def dispatch_batch(batch_size=DISPATCH_BATCH_SIZE):
+    """
+    Claim and deliver one batch of due notifications
+
+    Returns:
+        dict: claimed, sent and failed counts for this batch
+    """
+    token, rows = _claim(batch_size, datetime.now())
+    if not rows:
+        return {'claimed': 0, 'sent': 0, 'failed': 0}
+
+    email_rows = [row for row in rows if row.channel == CHANNEL_EMAIL]
+    chat_rows = [row for row in rows if row.channel == CHANNEL_CHAT]
+    errors = {row.id: f'Unknown channel {row.channel}' for row in rows
+              if row.channel not in CHANNEL_CONCURRENCY}
+
+    # One pool per channel: each channel's concurrency limit holds independently
+    with ThreadPoolExecutor(CHANNEL_CONCURRENCY[CHANNEL_EMAIL]) as email_pool, \
+            ThreadPoolExecutor(CHANNEL_CONCURRENCY[CHANNEL_CHAT]) as chat_pool:
+        futures = [(email_pool.submit(_deliver_email, row), [row.id]) for row in email_rows]
+        for text, indices in pack_messages([row.body for row in chat_rows]):
+            futures.append((chat_pool.submit(_deliver_chat, text), [chat_rows[i].id for i in indices]))
+
+        for future, row_ids in futures:
+            try:
+                error = None if future.result() else 'Delivery rejected'
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            if error:
+                for row_id in row_ids:
+                    errors[row_id] = error
+
+    _record_results(token, rows, errors, datetime.now())
+    return {'claimed': len(rows), 'sent': len(rows) - len(errors), 'failed': len(errors)}
+
+
+def dispatch_pending(time_budget=45.0, batch_size=DISPATCH_BATCH_SIZE):
+    """
+    Drain due notifications batch by batch until none are left or time runs out
+
+    Returns:
+        dict: Totals across batches plus elapsed seconds
+    """
+    started = time.perf_counter()
+    totals = {'claimed': 0, 'sent': 0, 'failed': 0, 'batches': 0}
+    while time.perf_counter() - started < time_budget:
+        result = dispatch_batch(batch_size)
+        if not result['claimed']:
+            break
+        totals['batches'] += 1
+        for key in ('claimed', 'sent', 'failed'):
+            totals[key] += result[key]
+    totals['seconds'] = time.perf_counter() - started
+    return totals
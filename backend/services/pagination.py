@@ -0,0 +1,142 @@
+"""
+Keyset Pagination Helpers
+Opaque cursors and page-size parsing for list endpoints.
+
+A cursor encodes the sort key of the last row on the previous page, so
+fetching the next page is an index range scan (WHERE key < cursor LIMIT n)
+instead of an OFFSET that grows with the page number.
+
+Ranked search results have no sort key to seek on; their cursors hold the
+offset of the next page instead (parse_offset_page_args).
+"""
+
+import base64
+import json
+
+from app_config import cache
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Total counts are cached separately so the common path skips COUNT(*)
+TOTAL_COUNT_TIMEOUT = 60
+
+
+def encode_cursor(values):
+    """Encode the last row's sort key as an opaque URL-safe string."""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor()
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def is_paginated_request(args):
+    """Pagination is opt-in: legacy clients without limit/cursor get the full list."""
+    return 'limit' in args or 'cursor' in args
+
+
+def parse_page_args(args):
+    """
+    Read `limit` and `cursor` from request args
+
+    Returns:
+        tuple: (limit, cursor values or None)
+
+    Raises:
+        ValueError: If limit or cursor is invalid
+    """
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+
+    cursor = args.get('cursor')
+    return limit, (decode_cursor(cursor) if cursor else None)
+
+
+def wants_total(args):
+    """Check the optional include_total flag."""
+    return args.get('include_total', '').lower() in ('1', 'true', 'yes')
+
+
+def cached_total(cache_key, query):
+    """
+    Count rows for a list query, cached for TOTAL_COUNT_TIMEOUT seconds
+
+    Args:
+        cache_key (str): Key identifying the list and its filters
+        query: SQLAlchemy query without ordering or pagination applied
+    """
+    key = f'list_total:{cache_key}'
+    try:
+        total = cache.get(key)
+    except Exception:
+        total = None
+    if total is None:
+        total = query.order_by(None).count()
+        try:
+            cache.set(key, total, timeout=TOTAL_COUNT_TIMEOUT)
+        except Exception:
+            pass
+    return total
+
+
+def build_page(rows, limit, cursor_for):
+    """
+    Trim an over-fetched result (limit + 1 rows) to one page
+
+    Args:
+        rows (list): Query results fetched with .limit(limit + 1)
+        limit (int): Page size
+        cursor_for (callable): Maps the last row to its cursor values
+
+    Returns:
+        tuple: (page rows, next cursor or None)
+    """
+    has_more = len(rows) > limit
+    page_rows = rows[:limit]
+    next_cursor = encode_cursor(cursor_for(page_rows[-1])) if has_more and page_rows else None
+    return page_rows, next_cursor
+
+
+def parse_offset_page_args(args):
+    """
+    Read `limit` and an offset cursor from request args (ranked results)
+
+    Returns:
+        tuple: (limit, offset); limit is None when the request is not paginated
+
+    Raises:
+        ValueError: If limit or cursor is invalid
+    """
+    if not is_paginated_request(args):
+        return None, 0
+    limit, cursor = parse_page_args(args)
+    if cursor is None:
+        return limit, 0
+    if len(cursor) != 1 or not isinstance(cursor[0], int) or cursor[0] < 0:
+        raise ValueError('Invalid cursor')
+    return limit, cursor[0]
+
+
+def next_offset_cursor(offset, page_size, total):
+    """Cursor for the page after `page_size` rows starting at `offset`, or None on the last page."""
+    next_offset = offset + page_size
+    return encode_cursor([next_offset]) if page_size and next_offset < total else None
@@ -0,0 +1,382 @@
+"""
+Patient Fuzzy Search
+In-process trigram index over patient name, email and phone number.
+
+Front-desk staff search with partial phone numbers and misspelled names,
+so matching is typo tolerant:
+  1. Candidates are the CANDIDATE_LIMIT patients sharing the most
+     trigrams with the query (ties broken by patient id)
+  2. Candidates are re-scored per word (substring = 1.0, otherwise the
+     closer of trigram overlap and edit similarity) and the top K returned,
+     again ties by patient id, so the same query always gives the same list
+
+The index is built from one joined query on first use and then updated
+incrementally: SQLAlchemy session events record which patients/users
+were written, and those rows are re-read on the next search after the
+transaction commits. Each process keeps its own copy; writes are also
+published to the shared cache as a numbered change list, and every search
+first applies changes published by other workers (one cache read). If
+changes have expired from the cache, or no shared cache is configured,
+the index is rebuilt; a periodic full rebuild remains as a safety net.
+"""
+
+import heapq
+import re
+import time
+import threading
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from sqlalchemy import event, or_
+from sqlalchemy.orm import Session
+
+from app_config import cache
+from models.models import db, User, Patient
+
+DEFAULT_RESULT_LIMIT = 20
+MAX_RESULT_LIMIT = 100
+
+# Candidates re-scored per query (by shared trigram count, ties by id).
+# Re-scoring dominates query time: about 10 ms for 250 candidates among
+# 50,000 patients (bench_patient_search.py), and it grows linearly. Only
+# patients sharing fewer trigrams than every candidate are left out, which
+# takes several hundred near-identical names around the query
+CANDIDATE_LIMIT = 250
+
+# Trigrams found in more than this share of patients (e.g. from "gmail")
+# are skipped when collecting candidates, unless nothing else matches
+COMMON_TRIGRAM_RATIO = 0.2
+
+# Minimum score (0..1) for a patient to be returned
+MIN_SIMILARITY = 0.7
+
+# Fewest digits in a query before it is also matched against phone numbers
+MIN_PHONE_DIGITS = 3
+
+# Full rebuild interval (seconds), safety net for missed change notices
+REBUILD_INTERVAL = 300
+
+# Shared cache keys announcing writes to every process's index
+CHANGE_SEQUENCE_KEY = 'patient_search:change_seq'
+CHANGE_KEY = 'patient_search:change:{}'
+# Changes kept in the cache; an index further behind rebuilds instead
+CHANGE_TIMEOUT = REBUILD_INTERVAL
+MAX_CHANGES_PER_SYNC = 500
+
+# Key in Session.info collecting written rows until commit
+_PENDING_KEY = 'patient_search_pending'
+
+
+def tokenize(value):
+    """Lowercase words; underscores and punctuation split (john_doe -> john, doe)."""
+    return re.findall(r'[^\W_]+', (value or '').lower())
+
+
+@lru_cache(maxsize=65536)
+def trigrams(token):
+    """Padded trigrams of a word, so short words and word starts still match."""
+    padded = f'  {token} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def edit_distance(a, b):
+    """Optimal string alignment distance (adjacent transpositions count as one edit)."""
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[len(b)]
+
+
+@lru_cache(maxsize=65536)
+def word_similarity(query_token, candidate_token):
+    """
+    Similarity of one typed word to one indexed word (0..1)
+
+    Substrings ("ann" in "joanna", "98765" in a phone number) score 1.0.
+    Otherwise the better of trigram overlap and edit similarity is used,
+    comparing against the start of the word too so prefixes with typos
+    ("jhon" for "johnson") still score well.
+    """
+    if query_token in candidate_token:
+        return 1.0
+
+    query_grams = trigrams(query_token)
+    best = len(query_grams & trigrams(candidate_token)) / len(query_grams)
+    for candidate in (candidate_token, candidate_token[:len(query_token)]):
+        longest = max(len(query_token), len(candidate))
+        # Length difference alone bounds the edit similarity; skip hopeless pairs
+        if 1 - abs(len(query_token) - len(candidate)) / longest > best:
+            best = max(best, 1 - edit_distance(query_token, candidate) / longest)
+    return best
+
+
+class PatientSearchIndex:
+    """Trigram posting lists plus the words indexed for each patient."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = defaultdict(set)   # trigram -> {patient_id}
+        self._tokens = {}                   # patient_id -> (words, phone digits)
+        self._user_patients = {}            # user_id -> patient_id
+        self._stale_patient_ids = set()
+        self._stale_user_ids = set()
+        self._built_at = None
+        self._change_sequence = None        # Last shared change applied
+
+    # ---------- Maintenance ----------
+
+    def mark_stale(self, patient_ids=(), user_ids=()):
+        """Record rows written by a committed transaction."""
+        with self._lock:
+            self._stale_patient_ids.update(patient_ids)
+            self._stale_user_ids.update(user_ids)
+
+    def invalidate(self):
+        """Force a full rebuild on next search."""
+        with self._lock:
+            self._built_at = None
+
+    def _add(self, patient_id, user_id, username, email, contact_info):
+        words = tokenize(username) + tokenize(email)
+        digits = re.sub(r'\D', '', contact_info or '')
+        self._tokens[patient_id] = (words, digits)
+        self._user_patients[user_id] = patient_id
+
+        grams = set()
+        for word in words:
+            grams |= trigrams(word)
+        if digits:
+            grams |= trigrams(digits)
+        for gram in grams:
+            self._postings[gram].add(patient_id)
+
+    def _remove(self, patient_id):
+        entry = self._tokens.pop(patient_id, None)
+        if entry is None:
+            return
+        words, digits = entry
+        for word in words + ([digits] if digits else []):
+            for gram in trigrams(word):
+                posting = self._postings.get(gram)
+                if posting is not None:
+                    posting.discard(patient_id)
+                    if not posting:
+                        del self._postings[gram]
+
+    @staticmethod
+    def _row_query():
+        return db.session.query(
+            Patient.id, Patient.user_id, User.username, User.email, Patient.contact_info
+        ).join(User, User.id == Patient.user_id)
+
+    def _rebuild(self):
+        # Changes published from here on are re-applied after the rebuild
+        self._change_sequence = _read_change_sequence()
+        self._postings = defaultdict(set)
+        self._tokens = {}
+        self._user_patients = {}
+        self._stale_patient_ids.clear()
+        self._stale_user_ids.clear()
+        for row in self._row_query():
+            self._add(*row)
+        self._built_at = time.monotonic()
+
+    def _refresh_stale(self):
+        patient_ids = set(self._stale_patient_ids)
+        user_ids = set(self._stale_user_ids)
+        self._stale_patient_ids.clear()
+        self._stale_user_ids.clear()
+
+        patient_ids |= {self._user_patients[u] for u in user_ids if u in self._user_patients}
+        for user_id in user_ids:
+            self._user_patients.pop(user_id, None)
+        for patient_id in patient_ids:
+            self._remove(patient_id)
+
+        # Re-read the written rows that still exist
+        rows = self._row_query().filter(or_(Patient.id.in_(patient_ids), Patient.user_id.in_(user_ids)))
+        for row in rows:
+            self._remove(row[0])
+            self._add(*row)
+
+    def _sync_shared_changes(self):
+        """
+        Mark rows written by other processes as stale
+
+        Returns:
+            bool: False if the published changes cannot be read (rebuild needed)
+        """
+        sequence = _read_change_sequence()
+        if sequence is None:
+            # Shared cache unreachable: rely on the periodic rebuild
+            return True
+        if self._change_sequence is None or sequence < self._change_sequence:
+            # Built while the cache was down, or the cache was flushed
+            return False
+        if sequence == self._change_sequence:
+            return True
+        if sequence - self._change_sequence > MAX_CHANGES_PER_SYNC:
+            return False
+
+        keys = [CHANGE_KEY.format(number) for number in range(self._change_sequence + 1, sequence + 1)]
+        try:
+            changes = cache.get_many(*keys)
+        except Exception:
+            return False
+        if any(change is None for change in changes):
+            # Expired, or announced but not yet written
+            return False
+        for patient_ids, user_ids in changes:
+            self._stale_patient_ids.update(patient_ids)
+            self._stale_user_ids.update(user_ids)
+        self._change_sequence = sequence
+        return True
+
+    def _ensure_fresh(self):
+        if self._built_at is None or time.monotonic() - self._built_at > REBUILD_INTERVAL:
+            self._rebuild()
+            return
+        if not self._sync_shared_changes():
+            self._rebuild()
+        elif self._stale_patient_ids or self._stale_user_ids:
+            self._refresh_stale()
+
+    # ---------- Search ----------
+
+    def search(self, query_str, limit=DEFAULT_RESULT_LIMIT):
+        """
+        Find patients similar to a free-text query
+
+        Args:
+            query_str (str): Name, email, phone fragment or patient ID
+            limit (int): Maximum results (top K)
+
+        Returns:
+            list: (patient_id, score) tuples, best match first
+        """
+        query_words = tokenize(query_str)
+        query_digits = re.sub(r'\D', '', query_str)
+        if len(query_digits) < MIN_PHONE_DIGITS:
+            query_digits = ''
+        if not query_words:
+            return []
+
+        with self._lock:
+            self._ensure_fresh()
+
+            # Stage 1: count shared trigrams per patient
+            query_grams = set()
+            for word in query_words + ([query_digits] if query_digits else []):
+                query_grams |= trigrams(word)
+            postings = [self._postings[gram] for gram in query_grams if gram in self._postings]
+            common_limit = max(len(self._tokens) * COMMON_TRIGRAM_RATIO, CANDIDATE_LIMIT)
+            selective = [posting for posting in postings if len(posting) <= common_limit]
+
+            shared = Counter()
+            for posting in selective or postings:
+                shared.update(posting)
+            candidates = [
+                patient_id for _, patient_id in
+                heapq.nsmallest(CANDIDATE_LIMIT, ((-count, patient_id) for patient_id, count in shared.items()))
+            ]
+
+            # Stage 2: per-word re-scoring
+            scored = []
+            for patient_id in candidates:
+                words, digits = self._tokens[patient_id]
+                if query_digits and digits and query_digits in digits:
+                    score = 1.0
+                else:
+                    indexed = words + [digits] if digits else words
+                    score = sum(
+                        max((word_similarity(q, w) for w in indexed), default=0.0)
+                        for q in query_words
+                    ) / len(query_words)
+                if score >= MIN_SIMILARITY:
+                    scored.append((patient_id, score))
+
+            # Exact patient ID always ranks first
+            if query_str.strip().isdecimal() and int(query_str) in self._tokens:
+                exact_id = int(query_str)
+                scored = [(exact_id, 1.0)] + [item for item in scored if item[0] != exact_id]
+                scored[1:] = sorted(scored[1:], key=lambda item: (-item[1], item[0]))
+            else:
+                scored.sort(key=lambda item: (-item[1], item[0]))
+            return scored[:limit]
+
+
+# Shared per-process index
+patient_index = PatientSearchIndex()
+
+
+def parse_result_limit(value):
+    """
+    Parse the `limit` query parameter for patient search
+
+    Raises:
+        ValueError: If not an integer between 1 and MAX_RESULT_LIMIT
+    """
+    if value is None:
+        return DEFAULT_RESULT_LIMIT
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1 or limit > MAX_RESULT_LIMIT:
+        raise ValueError(f'limit must be between 1 and {MAX_RESULT_LIMIT}')
+    return limit
+
+
+# ---------- Incremental updates via session events ----------
+
+def _read_change_sequence():
+    """Number of the last published change (0 before the first), or None if the cache is unreachable."""
+    try:
+        return int(cache.get(CHANGE_SEQUENCE_KEY) or 0)
+    except Exception:
+        return None
+
+
+def publish_changes(patient_ids, user_ids):
+    """Announce committed patient/user writes to the indexes of other processes."""
+    try:
+        # Atomic on Redis; Flask-Caching only exposes inc() on the backend
+        sequence = cache.cache.inc(CHANGE_SEQUENCE_KEY)
+        if sequence:
+            cache.set(CHANGE_KEY.format(sequence), (sorted(patient_ids), sorted(user_ids)),
+                      timeout=CHANGE_TIMEOUT)
+    except Exception as e:
+        # Other processes catch up at their next periodic rebuild
+        print(f"Warning: Patient search change not published: {e}")
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_patient_writes(session, flush_context):
+    """Remember which patients and users this transaction wrote."""
+    pending = session.info.setdefault(_PENDING_KEY, (set(), set()))
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Patient):
+            pending[0].add(obj.id)
+            if obj.user_id is not None:
+                pending[1].add(obj.user_id)
+        elif isinstance(obj, User):
+            pending[1].add(obj.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_patient_writes(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending and (pending[0] or pending[1]):
+        patient_index.mark_stale(*pending)
+        publish_changes(*pending)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_patient_writes(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,157 @@
+"""
+Appointment Reminders
+Each booking's reminder is a row in the notification outbox, written in
+the booking's own transaction with available_at set REMINDER_LEAD_HOURS
+before the appointment. The outbox dispatcher sends it once it is due;
+nothing waits in the Celery broker, so reminders survive broker and
+worker restarts.
+
+- Booking (or re-activating a booking) calls schedule_appointment_reminder()
+- Cancelling, completing, moving or deleting it calls
+  cancel_appointment_reminder(), which drops the pending rows in the same
+  transaction
+- The send_daily_reminders beat task sweeps upcoming bookings and queues
+  any reminder that is missing (bookings written by other code paths or
+  before this was deployed); the outbox dedupe key makes that a no-op for
+  bookings that already have one
+"""
+
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import aliased
+
+from models.models import db, User, Appointment, Patient, Doctor
+from services.mailer import EmailTemplate
+from services.outbox import enqueue_email, enqueue_chat, discard_pending
+
+# Send reminders this long before the appointment starts
+REMINDER_LEAD_HOURS = float(os.environ.get('REMINDER_LEAD_HOURS', '2'))
+
+# Outbox dedupe keys are f'{REMINDER_KEY_PREFIX}{appointment_id}:{starts_at}:{channel}'
+REMINDER_KEY_PREFIX = 'reminder:'
+
+REMINDER_EMAIL = EmailTemplate(
+    subject="Appointment Reminder: {{ day }}",
+    body=("Hello {{ patient_name }},\n\nYou have an appointment with "
+          "Dr. {{ doctor_name }} on {{ date }} at {{ time }}.\nPlease arrive on time.")
+)
+
+
+def appointment_start(appointment_date, appointment_time):
+    """Combine an appointment's date and time into the moment it starts."""
+    return datetime.combine(appointment_date, appointment_time)
+
+
+def reminder_recipients(first_day=None, last_day=None, appointment_id=None):
+    """
+    Resolve everyone to remind for booked appointments in one joined query
+
+    Args:
+        first_day (date): Booked appointments on or after this day
+        last_day (date): ...and on or before this day
+        appointment_id (int): Or just this appointment (if still booked)
+
+    Returns:
+        list: JSON-serializable dicts (passed to Celery subtasks as-is)
+    """
+    patient_user = aliased(User)
+    doctor_user = aliased(User)
+    query = db.session.query(
+        Appointment.id, Appointment.date, Appointment.time,
+        patient_user.username, patient_user.email, doctor_user.username
+    )\
+        .join(Patient, Patient.id == Appointment.patient_id)\
+        .join(patient_user, patient_user.id == Patient.user_id)\
+        .join(Doctor, Doctor.id == Appointment.doctor_id)\
+        .join(doctor_user, doctor_user.id == Doctor.user_id)\
+        .filter(Appointment.status == 'Booked')
+
+    if first_day is not None:
+        query = query.filter(Appointment.date >= first_day)
+    if last_day is not None:
+        query = query.filter(Appointment.date <= last_day)
+    if appointment_id is not None:
+        query = query.filter(Appointment.id == appointment_id)
+
+    rows = query.order_by(Appointment.date, Appointment.time, Appointment.id).all()
+
+    return [
+        {
+            'appointment_id': row_id,
+            'starts_at': appointment_start(row_date, row_time).isoformat(),
+            'time': row_time.strftime('%H:%M'),
+            # Replace underscores with spaces and capitalize each word
+            'patient_name': patient_username.replace('_', ' ').title(),
+            'patient_email': patient_email,
+            'doctor_name': doctor_username.replace('_', ' ').title()
+        }
+        for row_id, row_date, row_time, patient_username, patient_email, doctor_username in rows
+    ]
+
+
+def queue_reminders(recipients, now=None):
+    """
+    Add the reminder email and chat message for each recipient to the outbox
+
+    Rows become due REMINDER_LEAD_HOURS before the appointment (right away
+    for bookings made inside that window). Appointments that already
+    started are skipped. The caller commits.
+
+    Args:
+        recipients (list): Dicts from reminder_recipients()
+        now (datetime): Current time (default: datetime.now())
+
+    Returns:
+        int: Appointments considered (rows that already existed are skipped by their dedupe key)
+    """
+    now = now or datetime.now()
+    queued = 0
+    for recipient in recipients:
+        starts_at = datetime.fromisoformat(recipient['starts_at'])
+        if starts_at <= now:
+            continue
+        # Naive local times, like the appointment columns
+        remind_at = max(starts_at - timedelta(hours=REMINDER_LEAD_HOURS), now)
+        dedupe_key = f"{REMINDER_KEY_PREFIX}{recipient['appointment_id']}:{recipient['starts_at']}"
+
+        # Sent hours (or, with a long lead, days) ahead: name the date, never "today"
+        appointment_date = starts_at.strftime('%d/%m/%Y')
+        subject, body = REMINDER_EMAIL.render(day=starts_at.date().isoformat(), date=appointment_date, **recipient)
+        enqueue_email(recipient['patient_email'], subject, body,
+                      dedupe_key=f'{dedupe_key}:email', available_at=remind_at)
+
+        # Google Chat notification (coalesced with others at delivery)
+        enqueue_chat(f"🔔 *Appointment Reminder*\nHi {recipient['patient_name']}, don't forget your appointment "
+                     f"with Dr. {recipient['doctor_name']} on {appointment_date} at {recipient['time']}!",
+                     dedupe_key=f'{dedupe_key}:chat', available_at=remind_at)
+        queued += 1
+    return queued
+
+
+def schedule_appointment_reminder(appointment_id):
+    """
+    Queue the reminder for a booked appointment
+
+    Call inside the booking's transaction (after flush, before commit):
+    the reminder commits or rolls back together with the booking.
+
+    Returns:
+        bool: True if a reminder is due for this appointment
+    """
+    return queue_reminders(reminder_recipients(appointment_id=appointment_id)) > 0
+
+
+def cancel_appointment_reminders(appointment_ids):
+    """
+    Drop the unsent reminders of these appointments
+
+    Call inside the transaction that cancels, moves or deletes them. A
+    reminder the dispatcher has already claimed is not recalled.
+    """
+    discard_pending([f'{REMINDER_KEY_PREFIX}{appointment_id}:' for appointment_id in appointment_ids])
+
+
+def cancel_appointment_reminder(appointment_id):
+    """Drop one appointment's unsent reminder (see cancel_appointment_reminders)."""
+    cancel_appointment_reminders([appointment_id])
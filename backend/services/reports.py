@@ -0,0 +1,90 @@
+"""
+Monthly Doctor Reports
+Per-doctor appointment statistics for one calendar month.
+
+Everything comes from two queries: the doctor list (joined with users for
+name/email) and one grouped extract of the month's appointments by
+doctor, weekday, time and status. The extract is at most
+doctors x 7 x slots x statuses rows however many appointments there are,
+and is folded into per-doctor totals in a single pass.
+"""
+
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import extract, func
+
+from models.models import db, User, Doctor, Appointment
+from services.availability import slot_for_time
+
+# extract('dow') numbering: 0 = Sunday
+WEEKDAY_NAMES = ('Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday')
+
+
+def previous_month(today=None):
+    """
+    Calendar month before `today`
+
+    Returns:
+        tuple: (first day, first day of the following month)
+    """
+    today = today or date.today()
+    end = today.replace(day=1)
+    start = (end - timedelta(days=1)).replace(day=1)
+    return start, end
+
+
+def monthly_doctor_stats(start, end):
+    """
+    Appointment statistics per doctor for [start, end)
+
+    Returns:
+        list: Dicts with doctor_id, username, email, total, completed,
+              cancelled, completion_rate, cancellation_rate and
+              busiest_slot (e.g. "Monday morning", None without bookings)
+    """
+    doctors = db.session.query(Doctor.id, User.username, User.email)\
+        .join(User, User.id == Doctor.user_id).order_by(Doctor.id).all()
+
+    status = func.coalesce(Appointment.status, 'Booked')
+    weekday = extract('dow', Appointment.date)
+    rows = db.session.query(
+        Appointment.doctor_id, weekday, Appointment.time, status, func.count(Appointment.id)
+    ).filter(Appointment.date >= start, Appointment.date < end)\
+        .group_by(Appointment.doctor_id, weekday, Appointment.time, status).all()
+
+    totals = Counter()
+    completed = Counter()
+    cancelled = Counter()
+    slot_bookings = defaultdict(Counter)
+    for doctor_id, day_of_week, appointment_time, row_status, count in rows:
+        totals[doctor_id] += count
+        if row_status == 'Completed':
+            completed[doctor_id] += count
+        elif row_status == 'Cancelled':
+            cancelled[doctor_id] += count
+            continue
+        # Busiest slot counts bookings that actually took the slot
+        slot = slot_for_time(appointment_time) or appointment_time.strftime('%H:%M')
+        slot_bookings[doctor_id][(int(day_of_week), slot)] += count
+
+    report = []
+    for doctor_id, username, email in doctors:
+        total = totals[doctor_id]
+        busiest = None
+        if slot_bookings[doctor_id]:
+            # Most bookings first, then earliest weekday/slot for a stable answer
+            (day_of_week, slot), _ = min(slot_bookings[doctor_id].items(), key=lambda item: (-item[1], item[0]))
+            busiest = f'{WEEKDAY_NAMES[day_of_week]} {slot}'
+        report.append({
+            'doctor_id': doctor_id,
+            'username': username,
+            'email': email,
+            'total': total,
+            'completed': completed[doctor_id],
+            'cancelled': cancelled[doctor_id],
+            'completion_rate': completed[doctor_id] / total if total else 0.0,
+            'cancellation_rate': cancelled[doctor_id] / total if total else 0.0,
+            'busiest_slot': busiest,
+        })
+    return report
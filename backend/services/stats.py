@@ -0,0 +1,114 @@
+"""
+Dashboard Statistics
+Record counts shared by the admin dashboard and the debug status endpoint.
+
+All counters come from one aggregate statement and are cached, since the
+admin SPA polls them every few seconds per open tab. Commits that add or
+remove users, doctors, patients or appointments (or change an
+appointment's date/status) drop the cached copy, so the next poll
+recomputes it; the short timeout bounds staleness for writes made
+outside the web process.
+"""
+
+from datetime import date
+
+from sqlalchemy import case, event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from app_config import cache
+from models.models import db, User, Doctor, Patient, Appointment
+
+STATS_CACHE_TIMEOUT = 30
+
+# Key in Session.info flagging a transaction that changed the counts
+_PENDING_KEY = 'dashboard_stats_pending'
+
+
+def _cache_key():
+    # "Upcoming" depends on today's date, so each day gets its own entry
+    return f'dashboard_stats:{date.today().isoformat()}'
+
+
+def _compute_counts():
+    """Compute every counter with a single SELECT."""
+    today = date.today()
+    statement = select(
+        select(func.count(User.id)).scalar_subquery().label('users'),
+        select(func.count(Doctor.id)).scalar_subquery().label('doctors'),
+        select(func.count(Patient.id)).scalar_subquery().label('patients'),
+        func.count(Appointment.id).label('appointments'),
+        func.coalesce(func.sum(case((Appointment.date >= today, 1), else_=0)), 0).label('upcoming'),
+        func.coalesce(func.sum(case((Appointment.status == 'Completed', 1), else_=0)), 0).label('completed'),
+    ).select_from(Appointment)
+
+    row = db.session.execute(statement).one()
+    return {
+        'users': row.users,
+        'doctors': row.doctors,
+        'patients': row.patients,
+        'appointments': row.appointments,
+        'upcoming_appointments': row.upcoming,
+        'completed_appointments': row.completed,
+    }
+
+
+def get_dashboard_counts():
+    """
+    Get record counts for dashboards, cached for STATS_CACHE_TIMEOUT seconds
+
+    Returns:
+        dict: users, doctors, patients, appointments,
+              upcoming_appointments, completed_appointments
+    """
+    key = _cache_key()
+    try:
+        counts = cache.get(key)
+    except Exception:
+        counts = None
+    if counts is None:
+        counts = _compute_counts()
+        try:
+            cache.set(key, counts, timeout=STATS_CACHE_TIMEOUT)
+        except Exception:
+            pass
+    return counts
+
+
+def invalidate_dashboard_counts():
+    """Drop the cached counts so the next request recomputes them."""
+    try:
+        cache.delete(_cache_key())
+    except Exception as e:
+        print(f"Warning: Failed to invalidate dashboard stats: {e}")
+
+
+# ---------- Invalidation on writes ----------
+
+_COUNTED_MODELS = (User, Doctor, Patient, Appointment)
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_count_changes(session, flush_context):
+    changed = any(isinstance(obj, _COUNTED_MODELS) for obj in list(session.new) + list(session.deleted))
+    if not changed:
+        # Appointment date/status edits move rows between the upcoming/completed counters
+        changed = any(
+            isinstance(obj, Appointment) and (
+                inspect(obj).attrs.status.history.has_changes() or
+                inspect(obj).attrs.date.history.has_changes()
+            )
+            for obj in session.dirty
+        )
+    if changed:
+        session.info[_PENDING_KEY] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop(_PENDING_KEY, None):
+        invalidate_dashboard_counts()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_count_changes(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,374 @@
+"""
+Treatment History Export
+Streams a patient's appointments and treatments to a file in constant memory.
+
+- One query (appointment LEFT JOIN treatment) read with yield_per, so rows
+  arrive in fixed-size batches instead of one list of every visit
+- Doctor names come from a per-export dictionary: one lookup per distinct
+  doctor (a handful) instead of two queries per row
+- The JSON in Treatment.notes is parsed once per row and flattened into
+  visit_type, tests_done, medicines and notes columns
+- Output goes through a pluggable writer (EXPORT_FORMATS):
+    csv      spreadsheet-friendly, medicines as "Name (dosage); ..."
+    jsonl    one JSON object per visit, medicines as a list of objects
+    parquet  columnar, typed (date, list<struct<name, dosage>>); needs pyarrow
+- Files are written to a temporary name and renamed into place when
+  complete (a partly written export is never visible under its final name)
+- Files live in export_directory(), outside the static folder: they are
+  only served by the authenticated download route (patient JWT, or the
+  signed, expiring token in the emailed link: sign_download_token())
+"""
+
+import csv
+import gzip
+import json
+import os
+import tempfile
+
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+
+from models.models import db, User, Doctor, Appointment, Treatment
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet exports are unavailable without pyarrow
+    pa = pq = None
+
+# Rows fetched from the database (and buffered per Parquet row group) per batch
+EXPORT_BATCH_SIZE = 500
+
+DEFAULT_EXPORT_FORMAT = 'csv'
+
+# How long finished exports stay downloadable (matches Celery's default result expiry)
+EXPORT_RETENTION_SECONDS = 24 * 60 * 60
+
+# Keeps download tokens from being valid as any other signed value
+DOWNLOAD_TOKEN_SALT = 'treatment-export-download'
+
+# Export row fields, in column order
+EXPORT_FIELDS = ('date', 'doctor', 'visit_type', 'tests_done', 'diagnosis', 'prescription', 'medicines', 'notes')
+
+
+class DoctorNameCache:
+    """Doctor id -> username, filled on first use of each doctor."""
+
+    def __init__(self):
+        self._names = {}
+
+    def __getitem__(self, doctor_id):
+        name = self._names.get(doctor_id)
+        if name is None:
+            name = db.session.query(User.username).join(Doctor, Doctor.user_id == User.id)\
+                .filter(Doctor.id == doctor_id).scalar() or 'Unknown'
+            self._names[doctor_id] = name
+        return name
+
+
+def parse_treatment_notes(notes):
+    """
+    Flatten the Treatment.notes JSON payload
+
+    Older treatments store plain text in notes; that text is kept as the
+    notes field.
+
+    Returns:
+        dict: visit_type, tests_done, medicines (list of {'name', 'dosage'}) and notes
+    """
+    flattened = {'visit_type': '', 'tests_done': '', 'medicines': [], 'notes': ''}
+    if not notes:
+        return flattened
+    try:
+        payload = json.loads(notes)
+    except (ValueError, TypeError):
+        flattened['notes'] = notes
+        return flattened
+    if not isinstance(payload, dict):
+        flattened['notes'] = notes
+        return flattened
+
+    medicines = payload.get('medicines') or []
+    flattened.update({
+        'visit_type': payload.get('visitType') or '',
+        'tests_done': payload.get('testDone') or '',
+        'medicines': [
+            {'name': str(medicine.get('name') or ''), 'dosage': str(medicine.get('dosage') or '')}
+            for medicine in (medicines if isinstance(medicines, list) else [])
+            if isinstance(medicine, dict) and (medicine.get('name') or medicine.get('dosage'))
+        ],
+        'notes': payload.get('notes') or '',
+    })
+    return flattened
+
+
+def iter_patient_treatment_rows(patient_ids, batch_size=EXPORT_BATCH_SIZE, doctor_names=None):
+    """
+    Yield export rows for several patients from one streamed query,
+    grouped by patient (ascending id), each patient's visits oldest first
+
+    Args:
+        patient_ids (list): Patients to export
+        doctor_names (DoctorNameCache): Shared name cache (default: a new one)
+
+    Yields:
+        tuple: (patient_id, row dict keyed by EXPORT_FIELDS); treatment
+               fields are None where no treatment was recorded
+    """
+    query = db.session.query(
+        Appointment.patient_id, Appointment.date, Appointment.doctor_id,
+        Treatment.id, Treatment.diagnosis, Treatment.prescription, Treatment.notes
+    ).outerjoin(Treatment, Treatment.appointment_id == Appointment.id)\
+        .filter(Appointment.patient_id.in_(patient_ids))\
+        .order_by(Appointment.patient_id, Appointment.date, Appointment.time, Appointment.id)\
+        .yield_per(batch_size)
+
+    if doctor_names is None:
+        doctor_names = DoctorNameCache()
+    for patient_id, appointment_date, doctor_id, treatment_id, diagnosis, prescription, notes in query:
+        if treatment_id is None:
+            details = dict.fromkeys(EXPORT_FIELDS[2:])
+        else:
+            details = dict(parse_treatment_notes(notes), diagnosis=diagnosis or '', prescription=prescription or '')
+        yield patient_id, {'date': appointment_date, 'doctor': doctor_names[doctor_id],
+                           **{field: details[field] for field in EXPORT_FIELDS[2:]}}
+
+
+def iter_treatment_rows(patient_id, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yield one export row per appointment, oldest first
+
+    Yields:
+        dict: Keyed by EXPORT_FIELDS (see iter_patient_treatment_rows)
+    """
+    for _, row in iter_patient_treatment_rows([patient_id], batch_size):
+        yield row
+
+
+# ---------- Writers ----------
+
+class ExportWriter:
+    """
+    Base class for export formats
+
+    Subclasses set `extension`, open their output in open() and receive
+    rows one at a time in write().
+    """
+    extension = ''
+    # Whether compress=True wraps the file in gzip (columnar formats compress internally)
+    gzip_wrapped = True
+
+    def __init__(self, path, compress=False):
+        self.path = path
+        self.compress = compress
+
+    def _open_text(self):
+        if self.compress:
+            return gzip.open(self.path, 'wt', newline='', encoding='utf-8')
+        return open(self.path, 'w', newline='', encoding='utf-8')
+
+    def open(self):
+        raise NotImplementedError
+
+    def write(self, row):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+class CSVExportWriter(ExportWriter):
+    """Title-cased headers, 'N/A' for visits without a treatment."""
+    extension = 'csv'
+    headers = {
+        'date': 'Date', 'doctor': 'Doctor', 'visit_type': 'Visit Type', 'tests_done': 'Tests Done',
+        'diagnosis': 'Diagnosis', 'prescription': 'Prescription', 'medicines': 'Medicines', 'notes': 'Notes',
+    }
+
+    def open(self):
+        self._file = self._open_text()
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([self.headers[field] for field in EXPORT_FIELDS])
+
+    def write(self, row):
+        if row['diagnosis'] is None:
+            values = [row['date'], row['doctor']] + ['N/A'] * (len(EXPORT_FIELDS) - 2)
+        else:
+            medicines = '; '.join(
+                f"{medicine['name']} ({medicine['dosage']})" if medicine['dosage'] else medicine['name']
+                for medicine in row['medicines']
+            )
+            values = [row[field] if field != 'medicines' else medicines for field in EXPORT_FIELDS]
+        self._writer.writerow(values)
+
+    def close(self):
+        self._file.close()
+
+
+class JSONLinesExportWriter(ExportWriter):
+    """One object per line; ISO dates, null treatment fields for untreated visits."""
+    extension = 'jsonl'
+
+    def open(self):
+        self._file = self._open_text()
+
+    def write(self, row):
+        self._file.write(json.dumps(dict(row, date=row['date'].isoformat()), ensure_ascii=False))
+        self._file.write('\n')
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetExportWriter(ExportWriter):
+    """Typed columnar file, written one row group per EXPORT_BATCH_SIZE rows."""
+    extension = 'parquet'
+    gzip_wrapped = False
+
+    @staticmethod
+    def schema():
+        return pa.schema([
+            ('date', pa.date32()),
+            ('doctor', pa.string()),
+            ('visit_type', pa.string()),
+            ('tests_done', pa.string()),
+            ('diagnosis', pa.string()),
+            ('prescription', pa.string()),
+            ('medicines', pa.list_(pa.struct([('name', pa.string()), ('dosage', pa.string())]))),
+            ('notes', pa.string()),
+        ])
+
+    def open(self):
+        self._schema = self.schema()
+        # compress=True trades write speed for a smaller file
+        self._writer = pq.ParquetWriter(self.path, self._schema, compression='gzip' if self.compress else 'snappy')
+        self._buffer = []
+
+    def _flush(self):
+        if self._buffer:
+            self._writer.write_table(pa.Table.from_pylist(self._buffer, schema=self._schema))
+            self._buffer = []
+
+    def write(self, row):
+        self._buffer.append(row)
+        if len(self._buffer) >= EXPORT_BATCH_SIZE:
+            self._flush()
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+EXPORT_FORMATS = {
+    'csv': CSVExportWriter,
+    'jsonl': JSONLinesExportWriter,
+    'parquet': ParquetExportWriter,
+}
+
+
+def available_export_formats():
+    """Formats usable in this environment (Parquet needs pyarrow)."""
+    return [name for name in EXPORT_FORMATS if name != 'parquet' or pq is not None]
+
+
+def export_directory():
+    """Directory holding export files (EXPORT_DIR, default <instance>/exports); created if missing."""
+    directory = os.environ.get('EXPORT_DIR') or os.path.join(current_app.instance_path, 'exports')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def export_file_extension(export_format, compress=False):
+    """File extension for an export, e.g. 'csv.gz' or 'parquet'."""
+    writer_class = EXPORT_FORMATS[export_format]
+    if compress and writer_class.gzip_wrapped:
+        return f'{writer_class.extension}.gz'
+    return writer_class.extension
+
+
+def _download_serializer():
+    return URLSafeTimedSerializer(current_app.config['JWT_SECRET_KEY'], salt=DOWNLOAD_TOKEN_SALT)
+
+
+def sign_download_token(task_id, user_id):
+    """
+    Token for an emailed download link: a mail client cannot send the JWT header
+
+    Valid for EXPORT_RETENTION_SECONDS, and only for this task and user.
+    """
+    return _download_serializer().dumps({'task_id': task_id, 'user_id': str(user_id)})
+
+
+def verify_download_token(token, task_id, max_age=EXPORT_RETENTION_SECONDS):
+    """
+    Check a download token against the export it is used for
+
+    Returns:
+        str: The user id it was issued to, or None if it is forged, expired
+             or issued for another task
+    """
+    try:
+        payload = _download_serializer().loads(token, max_age=max_age)
+    except BadSignature:  # Also raised for expired tokens
+        return None
+    if not isinstance(payload, dict) or payload.get('task_id') != task_id:
+        return None
+    return payload.get('user_id')
+
+
+def write_treatment_export(patient_id, path, export_format=DEFAULT_EXPORT_FORMAT, compress=False, progress=None):
+    """
+    Stream a patient's treatment history to `path`
+
+    Args:
+        patient_id (int): Patient whose appointments are exported
+        path (str): Final file path (see export_file_extension)
+        export_format (str): One of available_export_formats()
+        compress (bool): gzip the file (Parquet: gzip column compression)
+        progress (callable): Called with the rows written so far, every EXPORT_BATCH_SIZE rows
+
+    Returns:
+        int: Number of rows written
+
+    Raises:
+        ValueError: Unknown or unavailable format
+    """
+    return write_export_rows(iter_treatment_rows(patient_id), path, export_format, compress, progress)
+
+
+def write_export_rows(rows_iter, path, export_format=DEFAULT_EXPORT_FORMAT, compress=False, progress=None):
+    """
+    Write export rows to `path` through the format's writer
+
+    Same arguments as write_treatment_export(), with the rows supplied by
+    the caller (e.g. one patient's share of a bulk export query).
+
+    Returns:
+        int: Number of rows written
+    """
+    if export_format not in available_export_formats():
+        raise ValueError(f'Unsupported export format: {export_format}')
+
+    # Unique per call: concurrent exports of the same file must not share a temp file.
+    # The .part suffix lets evict_exports() clean up after a crashed worker
+    directory, filename = os.path.split(path)
+    fd, temp_path = tempfile.mkstemp(prefix=f'{filename}.', suffix='.part', dir=directory or None)
+    os.close(fd)
+    writer = EXPORT_FORMATS[export_format](temp_path, compress=compress)
+    rows = 0
+    try:
+        writer.open()
+        try:
+            for row in rows_iter:
+                writer.write(row)
+                rows += 1
+                if progress and rows % EXPORT_BATCH_SIZE == 0:
+                    progress(rows)
+        finally:
+            writer.close()
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return rows
@@ -0,0 +1,91 @@
+"""
+Query-count regression tests for admin list endpoints
+
+Runs the Flask app against a scratch in-memory database and counts the SQL
+statements each endpoint issues. The count must not grow with row count
+(no N+1 relationship loads).
+
+Run with pytest or directly:
+    python test_admin_query_counts.py
+"""
+
+import os
+from datetime import date, time, timedelta
+
+# Point the app at a scratch database before it is configured
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+from main import app
+from models.models import db, User, Doctor, Patient, Appointment
+
+
+def _reset_database():
+    db.drop_all()
+    db.create_all()
+
+
+def _seed_appointments(count):
+    """Create `count` appointments, each with its own doctor and patient."""
+    admin = User(username='admin', email='admin@test.local', password='x', role='Admin')
+    db.session.add(admin)
+    db.session.flush()
+
+    for i in range(count):
+        doctor_user = User(username=f'doctor_{i}', email=f'doctor{i}@test.local', password='x', role='Doctor')
+        patient_user = User(username=f'patient_{i}', email=f'patient{i}@test.local', password='x', role='Patient')
+        db.session.add_all([doctor_user, patient_user])
+        db.session.flush()
+
+        doctor = Doctor(user_id=doctor_user.id, doctor_id=f'DOC-{i}', specialization='Cardiology')
+        patient = Patient(user_id=patient_user.id)
+        db.session.add_all([doctor, patient])
+        db.session.flush()
+
+        db.session.add(Appointment(doctor_id=doctor.id, patient_id=patient.id,
+                                   date=date.today() + timedelta(days=i), time=time(10, 0), status='Booked'))
+    db.session.commit()
+    return admin.id
+
+
+def _count_statements(url, row_count):
+    """Seed `row_count` rows, call `url` as admin and return (statements, payload)."""
+    with app.app_context():
+        _reset_database()
+        admin_id = _seed_appointments(row_count)
+        token = create_access_token(identity=str(admin_id), additional_claims={'role': 'Admin'})
+        db.session.remove()
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = app.test_client().get(url, headers={'Authorization': f'Bearer {token}'})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+        assert response.status_code == 200, response.get_json()
+        return len(statements), response.get_json()
+
+
+def test_list_appointments_constant_queries():
+    small_count, small_payload = _count_statements('/api/admin/appointments', 3)
+    large_count, large_payload = _count_statements('/api/admin/appointments', 60)
+
+    assert len(small_payload['appointments']) == 3
+    assert len(large_payload['appointments']) == 60
+    assert small_count == large_count == 1, (small_count, large_count)
+
+    first = large_payload['appointments'][-1]
+    assert first['patient'] == 'patient_0'
+    assert first['doctor'] == 'doctor_0'
+
+
+if __name__ == '__main__':
+    test_list_appointments_constant_queries()
+    print('All query-count tests passed')
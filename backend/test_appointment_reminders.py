@@ -0,0 +1,160 @@
+"""
+Appointment reminder tests
+
+Reminders are outbox rows written in the booking's transaction and due
+REMINDER_LEAD_HOURS before the appointment (services/reminders.py).
+Cancelling, deleting or re-activating a booking keeps them in line, and
+the sweep adds reminders only for bookings that have none.
+
+Run with pytest or directly:
+    python test_appointment_reminders.py
+"""
+
+import os
+from datetime import date, datetime, time, timedelta
+
+# Point the app at a scratch database before it is configured
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from flask_jwt_extended import create_access_token
+from main import app
+from models.models import db, User, Doctor, Patient, Appointment, NotificationOutbox
+from services.reminders import (
+    REMINDER_LEAD_HOURS, reminder_recipients, queue_reminders, schedule_appointment_reminder
+)
+
+
+def _seed():
+    """One admin, doctor and patient; return (doctor id, patient id, patient token, admin token)."""
+    db.drop_all()
+    db.create_all()
+    admin = User(username='admin', email='admin@test.local', password='x', role='Admin')
+    doctor_user = User(username='doctor_0', email='doctor0@test.local', password='x', role='Doctor')
+    patient_user = User(username='patient_0', email='patient0@test.local', password='x', role='Patient')
+    db.session.add_all([admin, doctor_user, patient_user])
+    db.session.flush()
+    doctor = Doctor(user_id=doctor_user.id, doctor_id='DOC-0', specialization='Cardiology')
+    patient = Patient(user_id=patient_user.id)
+    db.session.add_all([doctor, patient])
+    db.session.commit()
+    return (
+        doctor.id, patient.id,
+        create_access_token(identity=str(patient_user.id), additional_claims={'role': 'Patient'}),
+        create_access_token(identity=str(admin.id), additional_claims={'role': 'Admin'}),
+    )
+
+
+def _reminders(appointment_id=None):
+    """Pending reminder rows as {channel: available_at}."""
+    prefix = 'reminder:' if appointment_id is None else f'reminder:{appointment_id}:'
+    rows = NotificationOutbox.query.filter(NotificationOutbox.dedupe_key.startswith(prefix),
+                                           NotificationOutbox.status == 'pending').all()
+    return {row.channel: row.available_at for row in rows}
+
+
+def test_booking_and_cancelling_keep_the_reminder_in_the_same_transaction():
+    with app.app_context():
+        doctor_id, _, patient_token, admin_token = _seed()
+        client = app.test_client()
+        booking_date = date.today() + timedelta(days=3)
+
+        response = client.post('/patient/appointments/book', headers={'Authorization': f'Bearer {patient_token}'},
+                               json={'doctor_id': doctor_id, 'date': booking_date.strftime('%d/%m/%Y'),
+                                     'time_slot': 'morning'})
+        assert response.status_code == 201, response.get_json()
+        appointment_id = response.get_json()['appointment']['id']
+
+        remind_at = datetime.combine(booking_date, time(10)) - timedelta(hours=REMINDER_LEAD_HOURS)
+        assert _reminders(appointment_id) == {'email': remind_at, 'chat': remind_at}
+        # Sent ahead of the appointment: the text names its date
+        for row in NotificationOutbox.query.filter(NotificationOutbox.dedupe_key.startswith('reminder:')):
+            assert f"on {booking_date.strftime('%d/%m/%Y')} at 10:00" in row.body
+            assert 'today' not in row.body
+
+        response = client.post(f'/patient/appointments/{appointment_id}/cancel',
+                               headers={'Authorization': f'Bearer {patient_token}'})
+        assert response.status_code == 200, response.get_json()
+        assert _reminders(appointment_id) == {}
+
+        # Re-activated by an admin: the reminder comes back
+        response = client.patch(f'/api/admin/appointments/{appointment_id}', json={'status': 'Booked'},
+                                headers={'Authorization': f'Bearer {admin_token}'})
+        assert response.status_code == 200, response.get_json()
+        assert _reminders(appointment_id) == {'email': remind_at, 'chat': remind_at}
+
+        response = client.delete(f'/api/admin/appointments/{appointment_id}',
+                                 headers={'Authorization': f'Bearer {admin_token}'})
+        assert response.status_code == 200, response.get_json()
+        assert _reminders() == {}
+
+
+def test_failed_booking_leaves_no_reminder():
+    with app.app_context():
+        doctor_id, patient_id, patient_token, _ = _seed()
+        booking_date = date.today() + timedelta(days=3)
+        db.session.add(Appointment(doctor_id=doctor_id, patient_id=patient_id, date=booking_date,
+                                   time=time(10), status='Booked'))
+        db.session.commit()
+
+        response = app.test_client().post(
+            '/patient/appointments/book', headers={'Authorization': f'Bearer {patient_token}'},
+            json={'doctor_id': doctor_id, 'date': booking_date.strftime('%d/%m/%Y'), 'time_slot': 'morning'}
+        )
+        assert response.status_code == 409
+        assert _reminders() == {}
+
+
+def test_reminder_timing():
+    with app.app_context():
+        doctor_id, patient_id, _, _ = _seed()
+        now = datetime.now().replace(microsecond=0)
+        soon = now + timedelta(hours=REMINDER_LEAD_HOURS / 2)
+        past = now - timedelta(hours=1)
+        appointments = [
+            Appointment(doctor_id=doctor_id, patient_id=patient_id, date=moment.date(), time=moment.time(),
+                        status='Booked')
+            for moment in (soon, past)
+        ]
+        db.session.add_all(appointments)
+        db.session.flush()
+
+        # Inside the lead window: due right away. Already started: no reminder
+        assert schedule_appointment_reminder(appointments[0].id)
+        assert now <= _reminders(appointments[0].id)['email'] <= datetime.now()
+        assert not schedule_appointment_reminder(appointments[1].id)
+        assert _reminders(appointments[1].id) == {}
+
+
+def test_sweep_only_adds_missing_reminders():
+    with app.app_context():
+        doctor_id, patient_id, _, _ = _seed()
+        tomorrow = date.today() + timedelta(days=1)
+        # Written without going through the booking route
+        db.session.execute(Appointment.__table__.insert(), [
+            {'doctor_id': doctor_id, 'patient_id': patient_id, 'date': tomorrow, 'time': time(hour),
+             'status': status}
+            for hour, status in ((9, 'Booked'), (11, 'Booked'), (13, 'Cancelled'))
+        ])
+        db.session.commit()
+        assert _reminders() == {}
+
+        recipients = reminder_recipients(first_day=date.today(), last_day=tomorrow)
+        assert [recipient['time'] for recipient in recipients] == ['09:00', '11:00']
+        queue_reminders(recipients)
+        db.session.commit()
+        rows = NotificationOutbox.query.count()
+        assert rows == 4
+
+        # Second sweep: nothing new
+        queue_reminders(reminder_recipients(first_day=date.today(), last_day=tomorrow))
+        db.session.commit()
+        assert NotificationOutbox.query.count() == rows
+
+
+if __name__ == '__main__':
+    test_booking_and_cancelling_keep_the_reminder_in_the_same_transaction()
+    test_failed_booking_leaves_no_reminder()
+    test_reminder_timing()
+    test_sweep_only_adds_missing_reminders()
+    print('All appointment reminder tests passed')
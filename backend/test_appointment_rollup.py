@@ -0,0 +1,173 @@
+"""
+Appointment rollup consistency tests
+
+appointment_daily_stat is maintained incrementally by the session hooks in
+services/appointment_rollup.py. After every kind of appointment write
+(insert, status change, date or doctor move, delete, bulk delete,
+rollback) its rows must equal a fresh GROUP BY over the appointment table.
+
+Run with pytest or directly:
+    python test_appointment_rollup.py
+"""
+
+import os
+import random
+from datetime import date, time, timedelta
+
+# Point the app at a scratch database before it is configured
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from main import app
+from models.models import db, User, Doctor, Patient, Appointment, AppointmentDailyStat
+from services.appointment_rollup import grouped_counts, appointment_time_series
+
+STATUSES = ('Booked', 'Completed', 'Cancelled')
+FIRST_DAY = date(2025, 3, 1)
+
+
+def _seed_people(doctor_count=3):
+    db.drop_all()
+    db.create_all()
+    patient_user = User(username='patient_0', email='patient0@test.local', password='x', role='Patient')
+    db.session.add(patient_user)
+    db.session.flush()
+    patient = Patient(user_id=patient_user.id)
+    db.session.add(patient)
+
+    doctor_ids = []
+    for i in range(doctor_count):
+        doctor_user = User(username=f'doctor_{i}', email=f'doctor{i}@test.local', password='x', role='Doctor')
+        db.session.add(doctor_user)
+        db.session.flush()
+        doctor = Doctor(user_id=doctor_user.id, doctor_id=f'DOC-{i}', specialization='Cardiology')
+        db.session.add(doctor)
+        db.session.flush()
+        doctor_ids.append(doctor.id)
+    db.session.commit()
+    return patient.id, doctor_ids
+
+
+def _rollup():
+    return {
+        (row.date, row.doctor_id, row.status): row.count
+        for row in AppointmentDailyStat.query.all()
+    }
+
+
+def _fresh_counts():
+    return {
+        (day, doctor_id, status): count
+        for day, doctor_id, status, count in db.session.execute(grouped_counts())
+    }
+
+
+def _assert_consistent():
+    assert _rollup() == _fresh_counts()
+    assert all(count > 0 for count in _rollup().values())
+
+
+def test_each_write_kind_keeps_counts_exact():
+    with app.app_context():
+        patient_id, (doctor_a, doctor_b, doctor_c) = _seed_people()
+
+        # Insert (one without a status: the column default applies)
+        first = Appointment(doctor_id=doctor_a, patient_id=patient_id, date=FIRST_DAY, time=time(10))
+        second = Appointment(doctor_id=doctor_a, patient_id=patient_id, date=FIRST_DAY, time=time(18),
+                             status='Booked')
+        third = Appointment(doctor_id=doctor_b, patient_id=patient_id, date=FIRST_DAY, time=time(10),
+                            status='Completed')
+        db.session.add_all([first, second, third])
+        db.session.commit()
+        _assert_consistent()
+        assert _rollup()[(FIRST_DAY, doctor_a, 'Booked')] == 2
+
+        # Status change
+        second.status = 'Cancelled'
+        db.session.commit()
+        _assert_consistent()
+
+        # Move to another date, then to another doctor, then both plus status at once
+        first.date = FIRST_DAY + timedelta(days=3)
+        db.session.commit()
+        _assert_consistent()
+        first.doctor_id = doctor_c
+        db.session.commit()
+        _assert_consistent()
+        third.date, third.doctor_id, third.status = FIRST_DAY + timedelta(days=9), doctor_a, 'Cancelled'
+        db.session.commit()
+        _assert_consistent()
+
+        # Several changes to one row in one flush count once
+        first.status = 'Completed'
+        first.status = 'Cancelled'
+        first.status = 'Booked'
+        db.session.commit()
+        _assert_consistent()
+
+        # Rolled back writes leave no trace
+        db.session.add(Appointment(doctor_id=doctor_b, patient_id=patient_id, date=FIRST_DAY, time=time(11)))
+        second.status = 'Completed'
+        db.session.flush()
+        db.session.rollback()
+        _assert_consistent()
+
+        # Delete through the session
+        db.session.delete(second)
+        db.session.commit()
+        _assert_consistent()
+
+        # Bulk delete
+        Appointment.query.filter(Appointment.doctor_id == doctor_c).delete(synchronize_session=False)
+        db.session.commit()
+        _assert_consistent()
+        assert all(key[1] != doctor_c for key in _rollup())
+
+
+def test_random_write_mix_matches_group_by():
+    rng = random.Random(7)
+    with app.app_context():
+        patient_id, doctor_ids = _seed_people(doctor_count=4)
+        used_slots = set()
+
+        def free_slot():
+            # Keep (doctor, date, time) unique among active bookings
+            while True:
+                slot = (rng.choice(doctor_ids), FIRST_DAY + timedelta(days=rng.randrange(20)), time(rng.randrange(8, 20)))
+                if slot not in used_slots:
+                    used_slots.add(slot)
+                    return slot
+
+        for _ in range(300):
+            appointments = Appointment.query.all()
+            action = rng.random()
+            if action < 0.4 or not appointments:
+                doctor_id, day, start = free_slot()
+                db.session.add(Appointment(doctor_id=doctor_id, patient_id=patient_id, date=day, time=start,
+                                           status=rng.choice(STATUSES)))
+            elif action < 0.6:
+                rng.choice(appointments).status = rng.choice(STATUSES)
+            elif action < 0.8:
+                appointment = rng.choice(appointments)
+                appointment.doctor_id, appointment.date, appointment.time = free_slot()
+            elif action < 0.95:
+                db.session.delete(rng.choice(appointments))
+            else:
+                Appointment.query.filter(Appointment.date == FIRST_DAY + timedelta(days=rng.randrange(20)))\
+                    .delete(synchronize_session=False)
+            db.session.commit()
+
+        _assert_consistent()
+
+        # Analytics read the rollup: totals agree with the appointment table
+        series = appointment_time_series(FIRST_DAY, FIRST_DAY + timedelta(days=19), group_by='status')
+        assert {item['status']: item['total'] for item in series} == {
+            status: Appointment.query.filter_by(status=status).count()
+            for status in STATUSES if Appointment.query.filter_by(status=status).count()
+        }
+
+
+if __name__ == '__main__':
+    test_each_write_kind_keeps_counts_exact()
+    test_random_write_mix_matches_group_by()
+    print('All appointment rollup tests passed')
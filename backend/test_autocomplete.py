@@ -0,0 +1,89 @@
+"""
+Doctor autocomplete tests
+
+Every word of a doctor's name or specialization is a valid prefix start,
+specializations rank before doctors, and blacklisted doctors never
+appear.
+
+Run with pytest or directly:
+    python test_autocomplete.py
+"""
+
+import os
+
+# Point the app at a scratch database before it is configured
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from main import app
+from models.models import db, User, Doctor
+from services.autocomplete import autocomplete_index
+
+DOCTORS = [
+    ('john_smith', 'General Medicine', False),
+    ('maria_medina', 'Cardiology', False),
+    ('li_chen', 'General Medicine', False),
+    ('omar_khan', 'Obstetrics/Gynecology', False),
+    ('hidden_medic', 'Internal Medicine', True),
+]
+
+
+def _seed():
+    db.drop_all()
+    db.create_all()
+    for i, (username, specialization, blacklisted) in enumerate(DOCTORS):
+        user = User(username=username, email=f'doctor{i}@test.local', password='x', role='Doctor',
+                    is_blacklisted=blacklisted)
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Doctor(user_id=user.id, doctor_id=f'DOC-{i}', specialization=specialization))
+    db.session.commit()
+
+
+def _labels(prefix):
+    return [
+        suggestion['name'] if suggestion['type'] == 'specialization' else suggestion['username']
+        for suggestion in autocomplete_index.suggest(prefix, limit=20)
+    ]
+
+
+def test_every_word_start_matches():
+    with app.app_context():
+        _seed()
+
+        # Second word of a specialization
+        assert _labels('medic') == ['General Medicine']
+        assert _labels('medi') == ['General Medicine', 'maria_medina']
+        assert _labels('MEDICINE') == ['General Medicine']
+        assert _labels('gener') == ['General Medicine']
+        # Words split by punctuation
+        assert _labels('gyne') == ['Obstetrics/Gynecology']
+        # Names, first and last word
+        assert _labels('smi') == ['john_smith']
+        assert _labels('Dr. John') == ['john_smith']
+        # No match inside a word
+        assert _labels('edicine') == []
+
+
+def test_ranking_and_blacklist():
+    with app.app_context():
+        _seed()
+
+        suggestions = autocomplete_index.suggest('general')
+        assert suggestions[0] == {'type': 'specialization', 'name': 'General Medicine', 'doctor_count': 2}
+
+        # The blacklisted doctor and a specialization only they practise are left out
+        assert 'hidden_medic' not in _labels('hidden')
+        assert _labels('internal') == []
+
+        # Un-blacklisting refreshes the trie on commit
+        User.query.filter_by(username='hidden_medic').one().is_blacklisted = False
+        db.session.commit()
+        assert _labels('internal') == ['Internal Medicine']
+        assert _labels('medi') == ['General Medicine', 'Internal Medicine', 'hidden_medic', 'maria_medina']
+
+
+if __name__ == '__main__':
+    test_every_word_start_matches()
+    test_ranking_and_blacklist()
+    print('All autocomplete tests passed')
@@ -0,0 +1,137 @@
+"""
+Concurrent booking tests
+
+Many patients POST /patient/appointments/book for the same doctor, date
+and time at once. The partial unique index uq_appointment_active_slot must
+let exactly one of them through, and cancelling that booking must free the
+slot again (without letting the cancelled booking take it back).
+
+Each request runs in its own thread with its own database connection, so
+the database needs to be a file (conftest.py sets one up under pytest).
+
+Run with pytest or directly:
+    python test_booking_concurrency.py
+"""
+
+import os
+import tempfile
+import threading
+from collections import Counter
+from datetime import date, timedelta
+
+# Point the app at a scratch database file before it is configured
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='booking_test_'), 'test.db')}")
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from flask_jwt_extended import create_access_token
+from main import app
+from models.models import db, User, Doctor, Patient, Appointment
+
+CONCURRENT_REQUESTS = 16
+
+
+def _seed(patient_count):
+    """Create one doctor and `patient_count` patients; return (doctor id, patient tokens)."""
+    db.drop_all()
+    db.create_all()
+
+    doctor_user = User(username='race_doctor', email='doc@race.local', password='x', role='Doctor')
+    db.session.add(doctor_user)
+    db.session.flush()
+    doctor = Doctor(user_id=doctor_user.id, doctor_id='RACE-1', specialization='Cardiology')
+    db.session.add(doctor)
+
+    tokens = []
+    for i in range(patient_count):
+        user = User(username=f'race_patient_{i}', email=f'pat{i}@race.local', password='x', role='Patient')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Patient(user_id=user.id))
+        tokens.append(create_access_token(identity=str(user.id), additional_claims={'role': 'Patient'}))
+
+    db.session.commit()
+    return doctor.id, tokens
+
+
+def _book_concurrently(doctor_id, tokens, booking_date):
+    """Release one booking request per token at the same moment; return the responses."""
+    barrier = threading.Barrier(len(tokens))
+    responses = []
+    lock = threading.Lock()
+
+    def worker(token):
+        client = app.test_client()
+        payload = {'doctor_id': doctor_id, 'date': booking_date.strftime('%d/%m/%Y'), 'time_slot': 'morning'}
+        barrier.wait()
+        response = client.post('/patient/appointments/book', json=payload,
+                               headers={'Authorization': f'Bearer {token}'})
+        with lock:
+            responses.append((token, response.status_code, response.get_json()))
+
+    threads = [threading.Thread(target=worker, args=(token,)) for token in tokens]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return responses
+
+
+def _active_bookings(doctor_id, booking_date):
+    return Appointment.query.filter(
+        Appointment.doctor_id == doctor_id,
+        Appointment.date == booking_date,
+        Appointment.status != 'Cancelled'
+    ).count()
+
+
+def test_concurrent_bookings_allow_one_per_slot():
+    with app.app_context():
+        doctor_id, tokens = _seed(CONCURRENT_REQUESTS)
+        db.session.remove()
+
+    booking_date = date.today() + timedelta(days=1)
+    responses = _book_concurrently(doctor_id, tokens, booking_date)
+    statuses = Counter(status for _, status, _ in responses)
+
+    assert statuses == {201: 1, 409: CONCURRENT_REQUESTS - 1}, statuses
+    with app.app_context():
+        assert _active_bookings(doctor_id, booking_date) == 1
+
+
+def test_cancelled_booking_frees_the_slot():
+    with app.app_context():
+        doctor_id, tokens = _seed(CONCURRENT_REQUESTS)
+        db.session.remove()
+
+    booking_date = date.today() + timedelta(days=2)
+    responses = _book_concurrently(doctor_id, tokens, booking_date)
+    winner_token, _, winner_payload = next(response for response in responses if response[1] == 201)
+
+    client = app.test_client()
+    response = client.post(f"/patient/appointments/{winner_payload['appointment']['id']}/cancel",
+                           headers={'Authorization': f'Bearer {winner_token}'})
+    assert response.status_code == 200, response.get_json()
+
+    # The cancelled row stays, but no longer holds the slot
+    responses = _book_concurrently(doctor_id, [token for token in tokens if token != winner_token], booking_date)
+    statuses = Counter(status for _, status, _ in responses)
+
+    assert statuses == {201: 1, 409: CONCURRENT_REQUESTS - 2}, statuses
+    with app.app_context():
+        assert _active_bookings(doctor_id, booking_date) == 1
+        assert Appointment.query.filter_by(doctor_id=doctor_id, date=booking_date).count() == 2
+
+        # The doctor cannot complete the cancelled booking now that the slot is taken again
+        doctor_token = create_access_token(identity=str(db.session.get(Doctor, doctor_id).user_id),
+                                           additional_claims={'role': 'Doctor'})
+    response = client.post('/doctor/appointment/update-status', headers={'Authorization': f'Bearer {doctor_token}'},
+                           json={'appointment_id': winner_payload['appointment']['id'], 'status': 'Completed'})
+    assert response.status_code == 409, response.get_json()
+    with app.app_context():
+        assert _active_bookings(doctor_id, booking_date) == 1
+
+
+if __name__ == '__main__':
+    test_concurrent_bookings_allow_one_per_slot()
+    test_cancelled_booking_frees_the_slot()
+    print('All concurrent booking tests passed')
@@ -0,0 +1,172 @@
+"""
+Google Chat webhook client tests
+
+Posts to a local HTTP stand-in (the one from bench_chat_webhook.py) that
+answers from a script of status codes, and checks the retry/backoff
+rules of services/chat_webhook.py plus the size limits of pack_messages.
+Backoff sleeps are recorded instead of slept.
+
+Run with pytest or directly:
+    python test_chat_webhook.py
+"""
+
+import json
+import socket
+import threading
+from http.server import ThreadingHTTPServer
+from types import SimpleNamespace
+
+import services.chat_webhook as chat_webhook
+from services.chat_webhook import (
+    ChatWebhookClient, pack_messages, MAX_ATTEMPTS, MAX_BACKOFF, MAX_TEXT_CHARS, MESSAGE_SEPARATOR
+)
+from bench_chat_webhook import StandInHandler
+
+
+class ScriptedHandler(StandInHandler):
+    """Answers each post with the next (status, headers) from server.script; 200 once it runs out."""
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            self.server.texts.append(json.loads(body)['text'])
+            status, headers = self.server.script.pop(0) if self.server.script else (200, {})
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+
+def _start(script=()):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ScriptedHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.script = [step if isinstance(step, tuple) else (step, {}) for step in script]
+    server.texts = []
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/v1/spaces/test/messages'
+
+
+def _post(script, text='hello', **client_args):
+    """Post once against a scripted stand-in; return (result, texts received, backoff delays)."""
+    server, url = _start(script)
+    delays = []
+    original_time = chat_webhook.time
+    chat_webhook.time = SimpleNamespace(sleep=delays.append)
+    client = ChatWebhookClient(url, **client_args)
+    try:
+        return client.post(text), server.texts, delays
+    finally:
+        chat_webhook.time = original_time
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_transient_errors_are_retried_with_exponential_backoff():
+    accepted, texts, delays = _post([503, 502, 500], backoff_base=0.5)
+    assert accepted
+    assert texts == ['hello'] * 4
+    assert delays == [0.5, 1.0, 2.0]
+
+
+def test_gives_up_after_max_attempts():
+    accepted, texts, delays = _post([503] * 10, backoff_base=0.5)
+    assert not accepted
+    assert len(texts) == MAX_ATTEMPTS
+    assert len(delays) == MAX_ATTEMPTS - 1
+
+    # Backoff is capped
+    accepted, _, delays = _post([503] * 10, backoff_base=5, max_attempts=3)
+    assert delays == [5, MAX_BACKOFF]
+
+
+def test_429_waits_for_retry_after():
+    accepted, texts, delays = _post([(429, {'Retry-After': '3'})], backoff_base=0.5)
+    assert accepted and len(texts) == 2
+    assert delays == [3.0]
+
+    # A long Retry-After is capped; a non-numeric one falls back to the backoff
+    _, _, delays = _post([(429, {'Retry-After': '120'}), (429, {'Retry-After': 'soon'})], backoff_base=0.5)
+    assert delays == [MAX_BACKOFF, 1.0]
+
+
+def test_client_errors_are_not_retried():
+    for status in (400, 403, 404):
+        accepted, texts, delays = _post([status])
+        assert not accepted
+        assert len(texts) == 1 and delays == []
+
+
+def test_connection_errors_are_retried():
+    # A port nobody listens on
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    delays = []
+    original_time = chat_webhook.time
+    chat_webhook.time = SimpleNamespace(sleep=delays.append)
+    try:
+        client = ChatWebhookClient(f'http://127.0.0.1:{port}/', backoff_base=0.5)
+        assert not client.post('hello')
+    finally:
+        chat_webhook.time = original_time
+    assert delays == [0.5, 1.0, 2.0]
+
+
+def test_posts_reuse_one_connection_and_send_many_coalesces():
+    server, url = _start()
+    client = ChatWebhookClient(url)
+    try:
+        for i in range(5):
+            assert client.post(f'message {i}')
+        assert server.connections == 1
+
+        messages = [f'reminder {i} ' + 'x' * 90 for i in range(200)]
+        posts = client.send_many(messages)
+        assert posts == len(server.texts) - 5 < len(messages)
+        assert MESSAGE_SEPARATOR.join(server.texts[5:]) == MESSAGE_SEPARATOR.join(messages)
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_pack_messages_limits():
+    max_chars = 50
+    messages = ['a' * 20, 'b' * 20, 'c' * 5, 'd' * 49, 'e' * 120, 'f']
+    batches = pack_messages(messages, max_chars)
+
+    assert all(len(text) <= max_chars for text, _ in batches)
+    # Every message exactly once, in order
+    assert [index for _, indices in batches for index in indices] == list(range(len(messages)))
+    assert batches[0] == (MESSAGE_SEPARATOR.join(messages[:3]), [0, 1, 2])
+    # An oversized message is truncated, never split
+    assert ('e' * (max_chars - 3) + '...', [4]) in batches
+
+    # Exactly at the limit still fits in one text; one character more does not
+    fits = ['x' * 24, 'y' * (max_chars - 24 - len(MESSAGE_SEPARATOR))]
+    assert len(pack_messages(fits, max_chars)) == 1
+    assert len(pack_messages([fits[0], fits[1] + 'y'], max_chars)) == 2
+
+    assert pack_messages([]) == []
+    assert all(len(text) <= MAX_TEXT_CHARS for text, _ in pack_messages(['z' * 300] * 100))
+
+
+if __name__ == '__main__':
+    test_transient_errors_are_retried_with_exponential_backoff()
+    test_gives_up_after_max_attempts()
+    test_429_waits_for_retry_after()
+    test_client_errors_are_not_retried()
+    test_connection_errors_are_retried()
+    test_posts_reuse_one_connection_and_send_many_coalesces()
+    test_pack_messages_limits()
+    print('All chat webhook tests passed')
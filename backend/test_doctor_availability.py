@@ -0,0 +1,123 @@
+"""
+Doctor availability tests
+
+GET /doctor/availability returns exactly the 7-day grid that POST saves
+(days with neither slot included, older dates left out), and the doctor
+and admin views read and write the same DoctorSlot rows.
+
+Run with pytest or directly:
+    python test_doctor_availability.py
+"""
+
+import os
+from datetime import date, timedelta
+
+# Point the app at a scratch database before it is configured
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from flask_jwt_extended import create_access_token
+from main import app
+from models.models import db, User, Doctor
+from services.availability import DATE_FORMAT
+
+
+def _seed():
+    """One admin and one doctor; return (doctor id, doctor token, admin token)."""
+    db.drop_all()
+    db.create_all()
+    admin = User(username='admin', email='admin@test.local', password='x', role='Admin')
+    doctor_user = User(username='doctor_0', email='doctor0@test.local', password='x', role='Doctor')
+    db.session.add_all([admin, doctor_user])
+    db.session.flush()
+    doctor = Doctor(user_id=doctor_user.id, doctor_id='DOC-0', specialization='Cardiology')
+    db.session.add(doctor)
+    db.session.commit()
+    return (
+        doctor.id,
+        create_access_token(identity=str(doctor_user.id), additional_claims={'role': 'Doctor'}),
+        create_access_token(identity=str(admin.id), additional_claims={'role': 'Admin'}),
+    )
+
+
+def _week(pattern, start=None):
+    """Day entries from today (or `start`), one per (morning, evening) pair in `pattern`."""
+    start = start or date.today()
+    return [
+        {'date': (start + timedelta(days=i)).strftime(DATE_FORMAT), 'morning': morning, 'evening': evening}
+        for i, (morning, evening) in enumerate(pattern)
+    ]
+
+
+def _headers(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_get_returns_the_saved_week():
+    with app.app_context():
+        _, doctor_token, _ = _seed()
+        client = app.test_client()
+
+        # Untouched: seven empty days
+        response = client.get('/doctor/availability', headers=_headers(doctor_token))
+        assert response.get_json()['availability'] == _week([(False, False)] * 7)
+
+        week = _week([(True, False), (False, False), (True, True), (False, False),
+                      (False, True), (False, False), (True, False)])
+        # A date before today is stored but outside the window
+        past = _week([(True, True)], start=date.today() - timedelta(days=3))
+        response = client.post('/doctor/availability', json={'availability': past + week},
+                               headers=_headers(doctor_token))
+        assert response.status_code == 200, response.get_json()
+
+        response = client.get('/doctor/availability', headers=_headers(doctor_token))
+        assert response.get_json()['availability'] == week
+
+        # The dashboard shows the same week
+        response = client.get('/doctor/dashboard', headers=_headers(doctor_token))
+        assert response.get_json()['doctor']['availability'] == week
+
+
+def test_admin_views_and_edits_use_slot_rows():
+    with app.app_context():
+        doctor_id, doctor_token, admin_token = _seed()
+        client = app.test_client()
+
+        week = _week([(False, True)] + [(False, False)] * 6)
+        response = client.patch(f'/api/admin/doctors/{doctor_id}', json={'availability': week},
+                                headers=_headers(admin_token))
+        assert response.status_code == 200, response.get_json()
+        assert response.get_json()['doctor']['availability'] == week
+
+        # The doctor sees the admin's edit, and the admin list shows the doctor's
+        response = client.get('/doctor/availability', headers=_headers(doctor_token))
+        assert response.get_json()['availability'] == week
+
+        week = _week([(True, True)] * 7)
+        client.post('/doctor/availability', json={'availability': week}, headers=_headers(doctor_token))
+        response = client.get('/api/admin/doctors', headers=_headers(admin_token))
+        assert response.get_json()['doctors'][0]['availability'] == week
+
+        for bad in ('Monday-Friday, 9AM-5PM', {'date': '01/01/2030'}, [{'date': '2030-01-01'}]):
+            response = client.patch(f'/api/admin/doctors/{doctor_id}', json={'availability': bad},
+                                    headers=_headers(admin_token))
+            assert response.status_code == 400, bad
+
+
+def test_admin_create_stores_availability():
+    with app.app_context():
+        _, _, admin_token = _seed()
+        week = _week([(True, False)] * 7)
+        response = app.test_client().post('/api/admin/doctors', headers=_headers(admin_token), json={
+            'name': 'New Doctor', 'email': 'new@test.local', 'password': 'pw', 'doctor_id': 'DOC-NEW',
+            'specialization': 'Neurology', 'availability': week
+        })
+        assert response.status_code == 201, response.get_json()
+        assert response.get_json()['doctor']['availability'] == week
+
+
+if __name__ == '__main__':
+    test_get_returns_the_saved_week()
+    test_admin_views_and_edits_use_slot_rows()
+    test_admin_create_stores_availability()
+    print('All doctor availability tests passed')
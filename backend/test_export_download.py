@@ -0,0 +1,50 @@
+"""
+Export download link tests
+
+The emailed link to GET /patient/export/<task_id>/download carries a
+signed, expiring token instead of a JWT header (a mail client cannot send
+one). The token only opens the export it was issued for.
+
+Run with pytest or directly:
+    python test_export_download.py
+"""
+
+import os
+
+# Point the app at a scratch database before it is configured
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from main import app
+from services.treatment_export import sign_download_token, verify_download_token
+
+
+def test_token_is_bound_to_its_task():
+    with app.test_request_context():
+        token = sign_download_token('task-1', 7)
+
+        assert verify_download_token(token, 'task-1') == '7'
+        assert verify_download_token(token, 'task-2') is None
+        assert verify_download_token(token[:-2] + ('AA' if token[-2:] != 'AA' else 'BB'), 'task-1') is None
+        # Past its lifetime
+        assert verify_download_token(token, 'task-1', max_age=-1) is None
+
+
+def test_download_route_accepts_the_token_instead_of_a_jwt():
+    with app.test_request_context():
+        token = sign_download_token('task-1', 7)
+    client = app.test_client()
+
+    assert client.get('/patient/export/task-1/download').status_code == 403
+    assert client.get('/patient/export/task-1/download?token=forged').status_code == 403
+    assert client.get(f'/patient/export/task-2/download?token={token}').status_code == 403
+    # Signature accepted: the request gets as far as the owner lookup (none recorded here)
+    response = client.get(f'/patient/export/task-1/download?token={token}')
+    assert response.status_code == 404
+    assert response.get_json() == {'error': 'Export not found'}
+
+
+if __name__ == '__main__':
+    test_token_is_bound_to_its_task()
+    test_download_route_accepts_the_token_instead_of_a_jwt()
+    print('All export download tests passed')
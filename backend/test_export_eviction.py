@@ -0,0 +1,74 @@
+"""
+Export eviction tests
+
+evict_exports() (per-patient exports) and evict_archives() (bulk archives)
+each apply their own retention, and neither deletes the other's files.
+
+Run with pytest or directly:
+    python test_export_eviction.py
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+# Point the app at a scratch database and export directory before it is configured
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+os.environ.setdefault('EXPORT_DIR', tempfile.mkdtemp(prefix='export_eviction_'))
+
+from main import app
+from services.treatment_export import export_directory
+from services.export_cache import evict_exports
+from services.bulk_export import bulk_directory, archive_path, archive_filename, job_work_dir, evict_archives
+
+DAY = 24 * 60 * 60
+
+
+def _write(path, size, age_seconds):
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    stamp = time.time() - age_seconds
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def _reset():
+    shutil.rmtree(export_directory(), ignore_errors=True)
+
+
+def test_patient_export_eviction_leaves_bulk_archives_alone():
+    with app.app_context():
+        _reset()
+        old_archive = _write(archive_path(archive_filename('20250101000000_aaaa')), 5000, 3 * DAY)
+        expired = _write(os.path.join(export_directory(), 'treatments_1_old.csv'), 100, 2 * DAY)
+        recent = _write(os.path.join(export_directory(), 'treatments_2_new.csv'), 100, 60)
+
+        # Over budget and past the retention: only the per-patient export goes
+        removed, _ = evict_exports(ttl=DAY, budget_bytes=0)
+        assert removed == 2
+        assert not os.path.exists(expired) and not os.path.exists(recent)
+        assert os.path.exists(old_archive)
+
+
+def test_archive_retention():
+    with app.app_context():
+        _reset()
+        fresh = _write(archive_path(archive_filename('fresh')), 10, 60)
+        stale = _write(archive_path(archive_filename('stale')), 10, 10 * DAY)
+        kept = _write(archive_path(archive_filename('kept')), 10, 10 * DAY)
+        abandoned_job = job_work_dir('crashed')
+        os.makedirs(abandoned_job)
+        os.utime(abandoned_job, (time.time() - 10 * DAY,) * 2)
+        patient_export = _write(os.path.join(export_directory(), 'treatments_3_x.csv'), 10, 10 * DAY)
+
+        assert evict_archives(keep=[os.path.basename(kept)], ttl=7 * DAY) == 2
+        assert sorted(os.listdir(bulk_directory())) == sorted(os.path.basename(path) for path in (fresh, kept))
+        assert os.path.exists(patient_export)
+
+
+if __name__ == '__main__':
+    test_patient_export_eviction_leaves_bulk_archives_alone()
+    test_archive_retention()
+    print('All export eviction tests passed')
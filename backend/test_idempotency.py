@@ -0,0 +1,137 @@
+"""
+Idempotency-Key tests
+
+Exercises the @idempotent decorator (services/idempotency.py) on a small
+JWT-protected app with a real cache: replays, a retry arriving while the
+first request is still running, a key reused for another body, and server
+errors that must stay retryable.
+
+Run with pytest or directly:
+    python test_idempotency.py
+"""
+
+import os
+
+# Point the app at a scratch database before it is configured
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from flask import Flask, jsonify
+from flask_caching import Cache
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required
+
+import services.idempotency as idempotency
+from services.idempotency import idempotent, IDEMPOTENCY_HEADER
+
+
+def _app():
+    """A throwaway app with counting write endpoints; returns (app, calls, headers factory)."""
+    app = Flask(__name__)
+    app.config.update(JWT_SECRET_KEY='idempotency-test-secret', CACHE_TYPE='SimpleCache')
+    JWTManager(app)
+    # A real cache (Redis in production) instead of the NullCache used in tests
+    idempotency.cache = Cache(app)
+    calls = []
+
+    @app.route('/write', methods=['POST'])
+    @jwt_required()
+    @idempotent
+    def write():
+        calls.append('write')
+        return jsonify({'call': len(calls)}), 201
+
+    @app.route('/retry-while-running', methods=['POST'])
+    @jwt_required()
+    @idempotent
+    def retry_while_running():
+        calls.append('retry-while-running')
+        # The client retries before this request has finished
+        retry = app.test_client().post('/retry-while-running', json={'n': 1}, headers=headers('in-flight'))
+        return jsonify({'retry_status': retry.status_code}), 201
+
+    @app.route('/fail', methods=['POST'])
+    @jwt_required()
+    @idempotent
+    def fail():
+        calls.append('fail')
+        return jsonify({'error': 'boom'}), 500
+
+    with app.app_context():
+        token = create_access_token(identity='1')
+
+    def headers(key):
+        return {'Authorization': f'Bearer {token}', IDEMPOTENCY_HEADER: key}
+
+    return app, calls, headers
+
+
+def test_replay_returns_the_stored_response():
+    original_cache = idempotency.cache
+    try:
+        app, calls, headers = _app()
+        client = app.test_client()
+
+        first = client.post('/write', json={'n': 1}, headers=headers('key-1'))
+        replay = client.post('/write', json={'n': 1}, headers=headers('key-1'))
+
+        assert first.status_code == replay.status_code == 201
+        assert replay.get_json() == first.get_json() == {'call': 1}
+        assert replay.headers['Idempotent-Replayed'] == 'true'
+        assert 'Idempotent-Replayed' not in first.headers
+        assert calls == ['write']
+
+        # Another key runs the view again
+        assert client.post('/write', json={'n': 1}, headers=headers('key-2')).get_json() == {'call': 2}
+    finally:
+        idempotency.cache = original_cache
+
+
+def test_retry_while_first_request_is_pending_gets_409():
+    original_cache = idempotency.cache
+    try:
+        app, calls, headers = _app()
+
+        response = app.test_client().post('/retry-while-running', json={'n': 1}, headers=headers('in-flight'))
+        assert response.status_code == 201
+        assert response.get_json() == {'retry_status': 409}
+        assert calls == ['retry-while-running']
+    finally:
+        idempotency.cache = original_cache
+
+
+def test_same_key_with_a_different_body_gets_422():
+    original_cache = idempotency.cache
+    try:
+        app, calls, headers = _app()
+        client = app.test_client()
+
+        assert client.post('/write', json={'n': 1}, headers=headers('key-1')).status_code == 201
+        response = client.post('/write', json={'n': 2}, headers=headers('key-1'))
+        assert response.status_code == 422
+        assert calls == ['write']
+    finally:
+        idempotency.cache = original_cache
+
+
+def test_server_errors_are_not_stored():
+    original_cache = idempotency.cache
+    try:
+        app, calls, headers = _app()
+        client = app.test_client()
+
+        for _ in range(2):
+            response = client.post('/fail', json={'n': 1}, headers=headers('key-1'))
+            assert response.status_code == 500
+            assert 'Idempotent-Replayed' not in response.headers
+        # Each retry ran the view again
+        assert calls == ['fail', 'fail']
+    finally:
+        idempotency.cache = original_cache
+
+
+if __name__ == '__main__':
+    test_replay_returns_the_stored_response()
+    test_retry_while_first_request_is_pending_gets_409()
+    test_same_key_with_a_different_body_gets_422()
+    test_server_errors_are_not_stored()
+    print('All idempotency tests passed')
@@ -0,0 +1,153 @@
+"""
+SMTP connection pool tests
+
+Sends through services/mailer.py to the built-in stand-in SMTP server from
+bench_smtp_mailer.py (no aiosmtpd needed) and checks connection reuse
+(most recently used first), the connection cap, recycling, and the single
+reconnect after the relay drops a pooled connection.
+
+Run with pytest or directly:
+    python test_mailer.py
+"""
+
+import socket
+import threading
+
+from services.mailer import SMTPConnectionPool, build_message
+from bench_smtp_mailer import StandInSMTPHandler, StandInServer
+
+
+class TrackingHandler(StandInSMTPHandler):
+    """Stand-in that records open sessions, so a test can drop them or count them."""
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.sockets.append(self.connection)
+            self.server.active += 1
+            self.server.peak = max(self.server.peak, self.server.active)
+
+    def finish(self):
+        with self.server.lock:
+            self.server.active -= 1
+        super().finish()
+
+
+def _start(latency=0.0):
+    server = StandInServer(('127.0.0.1', 0), TrackingHandler)
+    server.latency = latency
+    server.lock = threading.Lock()
+    server.connections = server.messages = server.active = server.peak = 0
+    server.sockets = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _drop_sessions(server):
+    """Close every open session from the server side, as a relay does with idle clients."""
+    with server.lock:
+        sockets, server.sockets = server.sockets, []
+    for sock in sockets:
+        sock.shutdown(socket.SHUT_RDWR)
+
+
+def _stop(server, pool):
+    pool.close()
+    server.shutdown()
+    server.server_close()
+
+
+def _pool(server, **options):
+    return SMTPConnectionPool('127.0.0.1', server.server_address[1], username='hospital', password='x',
+                              timeout=5, **options)
+
+
+def _message(i=0):
+    return build_message('hospital@example.com', f'patient{i}@example.com', f'Reminder {i}', 'See you soon.')
+
+
+def test_sequential_sends_reuse_one_connection():
+    server = _start()
+    pool = _pool(server)
+    try:
+        for i in range(10):
+            pool.send(_message(i))
+        assert server.messages == 10
+        assert pool.connections_opened == server.connections == 1
+    finally:
+        _stop(server, pool)
+
+
+def test_most_recently_used_connection_is_reused_first():
+    server = _start()
+    pool = _pool(server)
+    try:
+        with pool.connection() as first:
+            with pool.connection() as second:
+                assert first is not second
+            # `second` is back in the pool; `first` is checked in after it
+        with pool.connection() as reused:
+            assert reused is first
+        assert pool.connections_opened == 2
+    finally:
+        _stop(server, pool)
+
+
+def test_concurrent_sends_stay_under_the_connection_cap():
+    server = _start(latency=0.002)
+    pool = _pool(server, max_connections=3)
+    try:
+        assert pool.send_many([_message(i) for i in range(60)]) == [None] * 60
+        assert server.messages == 60
+        assert pool.connections_opened <= 3
+        assert server.peak <= 3
+    finally:
+        _stop(server, pool)
+
+
+def test_connections_are_recycled_after_max_messages():
+    server = _start()
+    pool = _pool(server, max_messages_per_connection=4)
+    try:
+        for i in range(10):
+            pool.send(_message(i))
+        assert server.messages == 10
+        assert pool.connections_opened == 3
+    finally:
+        _stop(server, pool)
+
+
+def test_dropped_connection_is_reopened_once():
+    server = _start()
+    pool = _pool(server)
+    try:
+        pool.send(_message(0))
+
+        # The relay closes the idle pooled session: the next send reconnects and succeeds
+        _drop_sessions(server)
+        pool.send(_message(1))
+        assert server.messages == 2
+        assert pool.connections_opened == 2
+
+        # Relay gone entirely: one reconnect attempt, then the error reaches the caller
+        _drop_sessions(server)
+        server.shutdown()
+        server.server_close()
+        try:
+            pool.send(_message(2))
+        except ConnectionError:
+            pass
+        else:
+            raise AssertionError('send succeeded without a relay')
+        assert pool.connections_opened == 2
+    finally:
+        pool.close()
+
+
+if __name__ == '__main__':
+    test_sequential_sends_reuse_one_connection()
+    test_most_recently_used_connection_is_reused_first()
+    test_concurrent_sends_stay_under_the_connection_cap()
+    test_connections_are_recycled_after_max_messages()
+    test_dropped_connection_is_reopened_once()
+    print('All mailer tests passed')
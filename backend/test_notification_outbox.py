@@ -0,0 +1,62 @@
+"""
+Notification outbox tests
+
+Recording delivery results (services/outbox.py) only touches rows this
+dispatcher still holds the lease on: a row whose lease expired and was
+re-claimed by another dispatcher is left to that dispatcher.
+
+Run with pytest or directly:
+    python test_notification_outbox.py
+"""
+
+import os
+from datetime import datetime
+
+# Point the app at a scratch database before it is configured
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from main import app
+from models.models import db, NotificationOutbox
+from services.outbox import enqueue_email, _claim, _record_results, RETRY_BASE
+
+
+def _seed(count):
+    db.drop_all()
+    db.create_all()
+    for i in range(count):
+        enqueue_email(f'patient{i}@test.local', 'Subject', 'Body')
+    db.session.commit()
+
+
+def _row(row_id):
+    return db.session.get(NotificationOutbox, row_id)
+
+
+def test_results_skip_rows_reclaimed_by_another_dispatcher():
+    with app.app_context():
+        _seed(3)
+        now = datetime.now()
+        token, rows = _claim(10, now)
+        sent, retried, taken = (row.id for row in rows)
+
+        # Lease expired mid-batch and another dispatcher claimed this row
+        # (in the database only: the rows in hand still show this dispatcher's token)
+        db.session.query(NotificationOutbox).filter_by(id=taken).update({'claimed_by': 'other-dispatcher'},
+                                                                         synchronize_session=False)
+
+        _record_results(token, rows, {retried: 'SMTP timeout', taken: 'SMTP timeout'}, now)
+        db.session.expire_all()
+
+        assert (_row(sent).status, _row(sent).claimed_by, _row(sent).sent_at) == ('sent', None, now)
+        assert (_row(retried).status, _row(retried).attempts, _row(retried).available_at) == \
+            ('pending', 1, now + RETRY_BASE)
+        assert _row(retried).claimed_by is None
+        # Untouched: still the other dispatcher's
+        assert (_row(taken).status, _row(taken).claimed_by, _row(taken).attempts) == \
+            ('sending', 'other-dispatcher', 0)
+
+
+if __name__ == '__main__':
+    test_results_skip_rows_reclaimed_by_another_dispatcher()
+    print('All notification outbox tests passed')
@@ -0,0 +1,164 @@
+"""
+Keyset pagination tests
+
+Covers the cursor helpers in services/pagination.py and walks the admin
+list endpoints page by page: every row must come back exactly once, in
+the same order as the unpaginated list, including rows that share a date.
+
+Run with pytest or directly:
+    python test_pagination.py
+"""
+
+import os
+from datetime import date, time, timedelta
+
+# Point the app at a scratch database before it is configured
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from flask_jwt_extended import create_access_token
+from main import app
+from models.models import db, User, Doctor, Patient, Appointment
+from services.pagination import encode_cursor, decode_cursor, parse_page_args, build_page, MAX_PAGE_SIZE
+
+APPOINTMENT_COUNT = 23
+DOCTOR_COUNT = 5
+
+
+def _seed():
+    """One admin, DOCTOR_COUNT doctors and APPOINTMENT_COUNT appointments over a few dates."""
+    db.drop_all()
+    db.create_all()
+
+    admin = User(username='admin', email='admin@test.local', password='x', role='Admin')
+    patient_user = User(username='patient_0', email='patient0@test.local', password='x', role='Patient')
+    db.session.add_all([admin, patient_user])
+    db.session.flush()
+    patient = Patient(user_id=patient_user.id)
+    db.session.add(patient)
+
+    doctors = []
+    for i in range(DOCTOR_COUNT):
+        doctor_user = User(username=f'doctor_{i}', email=f'doctor{i}@test.local', password='x', role='Doctor')
+        db.session.add(doctor_user)
+        db.session.flush()
+        doctor = Doctor(user_id=doctor_user.id, doctor_id=f'DOC-{i}', specialization='Cardiology')
+        db.session.add(doctor)
+        doctors.append(doctor)
+    db.session.flush()
+
+    # Several appointments per date, so pages split inside a date
+    for i in range(APPOINTMENT_COUNT):
+        db.session.add(Appointment(
+            doctor_id=doctors[i % DOCTOR_COUNT].id, patient_id=patient.id,
+            date=date(2025, 1, 1) + timedelta(days=i // 4), time=time(8 + i % 12, 0),
+            status='Cancelled' if i % 5 == 0 else 'Booked'
+        ))
+    db.session.commit()
+    return create_access_token(identity=str(admin.id), additional_claims={'role': 'Admin'})
+
+
+def _get(client, token, url):
+    response = client.get(url, headers={'Authorization': f'Bearer {token}'})
+    return response.status_code, response.get_json()
+
+
+def _walk_pages(client, token, url, key, limit):
+    """Follow next_cursor to the end; return (ids in order, number of pages)."""
+    ids, pages, cursor = [], 0, None
+    while True:
+        page_url = f'{url}{"&" if "?" in url else "?"}limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        status, payload = _get(client, token, page_url)
+        assert status == 200, payload
+        assert len(payload[key]) <= limit
+        ids.extend(row['id'] for row in payload[key])
+        pages += 1
+        cursor = payload['next_cursor']
+        if cursor is None:
+            return ids, pages
+
+
+def test_cursor_round_trip():
+    for values in ([], [42], ['2025-01-31', 7], ['with spaces/and+symbols', None, 1.5]):
+        cursor = encode_cursor(values)
+        assert '=' not in cursor and '+' not in cursor and '/' not in cursor
+        assert decode_cursor(cursor) == values
+
+
+def test_malformed_cursors_are_rejected():
+    for cursor in ('not base64!', encode_cursor({'a': 1}).strip(), 'e30', '!!!!'):
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            continue
+        raise AssertionError(f'{cursor!r} was accepted')
+
+
+def test_parse_page_args_limits():
+    assert parse_page_args({'limit': '1'}) == (1, None)
+    assert parse_page_args({'limit': str(MAX_PAGE_SIZE), 'cursor': encode_cursor([3])}) == (MAX_PAGE_SIZE, [3])
+    for bad_limit in ('0', '-1', str(MAX_PAGE_SIZE + 1), 'ten'):
+        try:
+            parse_page_args({'limit': bad_limit})
+        except ValueError:
+            continue
+        raise AssertionError(f'limit={bad_limit} was accepted')
+
+
+def test_build_page():
+    # Over-fetched by one: a next cursor pointing at the last row kept
+    assert build_page([1, 2, 3], 2, lambda row: [row]) == ([1, 2], encode_cursor([2]))
+    # Exactly one page, or less: no cursor
+    assert build_page([1, 2], 2, lambda row: [row]) == ([1, 2], None)
+    assert build_page([], 2, lambda row: [row]) == ([], None)
+
+
+def test_appointment_pages_cover_the_list_once():
+    with app.app_context():
+        token = _seed()
+        client = app.test_client()
+
+        status, payload = _get(client, token, '/api/admin/appointments')
+        assert status == 200, payload
+        expected = [row['id'] for row in payload['appointments']]
+        assert len(expected) == APPOINTMENT_COUNT
+
+        for limit in (1, 3, 4, 7, APPOINTMENT_COUNT, APPOINTMENT_COUNT + 1):
+            ids, pages = _walk_pages(client, token, '/api/admin/appointments', 'appointments', limit)
+            assert ids == expected, limit
+            assert pages == max(1, -(-APPOINTMENT_COUNT // limit)), (limit, pages)
+
+        # Filters apply on every page
+        status, payload = _get(client, token, '/api/admin/appointments?status=Booked')
+        expected_booked = [row['id'] for row in payload['appointments']]
+        ids, _ = _walk_pages(client, token, '/api/admin/appointments?status=Booked', 'appointments', 4)
+        assert ids == expected_booked
+
+        status, payload = _get(client, token, '/api/admin/appointments?limit=5&include_total=1')
+        assert payload['total'] == APPOINTMENT_COUNT
+
+
+def test_doctor_pages_and_bad_arguments():
+    with app.app_context():
+        token = _seed()
+        client = app.test_client()
+
+        ids, pages = _walk_pages(client, token, '/api/admin/doctors', 'doctors', 2)
+        assert ids == sorted(ids) and len(ids) == DOCTOR_COUNT and pages == 3
+
+        for url in ('/api/admin/doctors?limit=0', '/api/admin/doctors?cursor=garbage',
+                    f'/api/admin/doctors?cursor={encode_cursor(["x"])}',
+                    f'/api/admin/appointments?cursor={encode_cursor([])}',
+                    f'/api/admin/appointments?cursor={encode_cursor(["not-a-date", 1])}'):
+            status, payload = _get(client, token, url)
+            assert status == 400, (url, payload)
+
+
+if __name__ == '__main__':
+    test_cursor_round_trip()
+    test_malformed_cursors_are_rejected()
+    test_parse_page_args_limits()
+    test_build_page()
+    test_appointment_pages_cover_the_list_once()
+    test_doctor_pages_and_bad_arguments()
+    print('All pagination tests passed')
@@ -0,0 +1,183 @@
+"""
+Patient fuzzy search tests
+
+Covers ranking in services/patient_search.py (typos, phone fragments,
+exact IDs, deterministic tie order) and how the in-process index follows
+writes: from this process through session events, and from other
+processes through the change list published to the shared cache.
+
+Run with pytest or directly:
+    python test_patient_search.py
+"""
+
+import os
+
+# Point the app at a scratch database before it is configured
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+
+from flask_caching import Cache
+
+from main import app
+from models.models import db, User, Patient
+import services.patient_search as patient_search
+from services.patient_search import PatientSearchIndex, patient_index, CANDIDATE_LIMIT, CHANGE_KEY
+
+NAMED_PATIENTS = [
+    ('john_smith', 'john.smith@mail.com', '9876543210'),
+    ('jon_smyth', 'jsmyth@mail.com', '9123456780'),
+    ('maria_garcia', 'maria.g@mail.com', '9000011111'),
+    ('joanna_rao', 'joanna@mail.com', '9555512345'),
+]
+
+
+def _seed(extra_ann_lee=0):
+    """Named patients, plus `extra_ann_lee` patients who all match "ann lee" equally."""
+    db.drop_all()
+    db.create_all()
+    ids = {}
+    for username, email, phone in NAMED_PATIENTS:
+        user = User(username=username, email=email, password='x', role='Patient')
+        db.session.add(user)
+        db.session.flush()
+        patient = Patient(user_id=user.id, contact_info=phone)
+        db.session.add(patient)
+        db.session.flush()
+        ids[username] = patient.id
+
+    if extra_ann_lee:
+        first_user_id = db.session.query(db.func.max(User.id)).scalar() + 1
+        db.session.execute(User.__table__.insert(), [
+            {'id': first_user_id + i, 'username': f'ann_lee_{i}', 'email': f'ann.lee{i}@clinic.org',
+             'password': 'x', 'role': 'Patient'}
+            for i in range(extra_ann_lee)
+        ])
+        db.session.execute(Patient.__table__.insert(), [
+            {'user_id': first_user_id + i} for i in range(extra_ann_lee)
+        ])
+    db.session.commit()
+    # Core inserts bypass the session hooks
+    patient_index.invalidate()
+    return ids
+
+
+def _names(results):
+    names = dict(db.session.query(Patient.id, User.username).join(User, User.id == Patient.user_id))
+    return [names[patient_id] for patient_id, _ in results]
+
+
+def test_typos_and_phone_fragments_rank_best_match_first():
+    with app.app_context():
+        ids = _seed()
+
+        assert _names(patient_index.search('jhon'))[0] == 'john_smith'
+        assert _names(patient_index.search('jon smith'))[:2] == ['jon_smyth', 'john_smith']
+        assert _names(patient_index.search('maria garcai'))[0] == 'maria_garcia'
+        assert _names(patient_index.search('ann'))[0] == 'joanna_rao'
+
+        # Phone fragments match the containing number exactly
+        assert patient_index.search('98765')[0] == (ids['john_smith'], 1.0)
+        assert _names(patient_index.search('55512'))[0] == 'joanna_rao'
+
+        # An exact patient ID ranks first
+        assert patient_index.search(str(ids['maria_garcia']))[0][0] == ids['maria_garcia']
+
+        assert patient_index.search('zzzz') == []
+        # Digit-like but not a number (superscript two)
+        assert patient_index.search('\u00b2') == []
+
+
+def test_ties_break_by_patient_id():
+    with app.app_context():
+        _seed(extra_ann_lee=CANDIDATE_LIMIT + 50)
+        ann_lee_ids = [
+            patient_id for (patient_id,) in db.session.query(Patient.id).join(User, User.id == Patient.user_id)
+            .filter(User.username.like('ann_lee_%')).order_by(Patient.id)
+        ]
+
+        results = patient_index.search('ann lee', limit=20)
+        assert [patient_id for patient_id, _ in results] == ann_lee_ids[:20]
+        assert all(score == 1.0 for _, score in results)
+        # Same query, same list
+        assert patient_index.search('ann lee', limit=20) == results
+        assert PatientSearchIndex().search('ann lee', limit=20) == results
+
+
+def test_index_follows_session_writes():
+    with app.app_context():
+        ids = _seed()
+        assert patient_index.search('jhon')
+
+        user = User(username='priya_nair', email='priya@mail.com', password='x', role='Patient')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Patient(user_id=user.id, contact_info='9444400000'))
+        db.session.commit()
+        assert _names(patient_index.search('priya nair'))[0] == 'priya_nair'
+
+        # Rename: old name gone, new name found
+        maria = db.session.get(User, db.session.get(Patient, ids['maria_garcia']).user_id)
+        maria.username = 'maria_fernandes'
+        db.session.commit()
+        assert 'maria_garcia' not in _names(patient_index.search('garcia'))
+        assert _names(patient_index.search('fernandes'))[0] == 'maria_fernandes'
+
+        # Phone change
+        db.session.get(Patient, ids['joanna_rao']).contact_info = '9777700000'
+        db.session.commit()
+        assert ids['joanna_rao'] not in [patient_id for patient_id, _ in patient_index.search('55512')]
+        assert patient_index.search('77770')[0][0] == ids['joanna_rao']
+
+        # Rolled back writes are not applied
+        db.session.get(User, user.id).username = 'temporary_name'
+        db.session.flush()
+        db.session.rollback()
+        assert _names(patient_index.search('priya nair'))[0] == 'priya_nair'
+        assert patient_index.search('temporary') == []
+
+        # Delete
+        db.session.delete(db.session.get(Patient, ids['john_smith']))
+        db.session.commit()
+        assert ids['john_smith'] not in [patient_id for patient_id, _ in patient_index.search('john smith')]
+
+
+def test_other_process_writes_are_picked_up_from_the_shared_cache():
+    # A real shared cache (Redis in production) instead of the NullCache used in tests
+    shared_cache = Cache(app, config={'CACHE_TYPE': 'SimpleCache'})
+    original_cache = patient_search.cache
+    patient_search.cache = shared_cache
+    try:
+        with app.app_context():
+            ids = _seed()
+            # Stands in for another worker's index: session events only reach patient_index
+            other_index = PatientSearchIndex()
+            assert _names(other_index.search('jhon'))[0] == 'john_smith'
+            built_at = other_index._built_at
+
+            user = User(username='kavya_menon', email='kavya@mail.com', password='x', role='Patient')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Patient(user_id=user.id))
+            db.session.get(User, db.session.get(Patient, ids['jon_smyth']).user_id).username = 'jon_smithers'
+            db.session.commit()
+
+            assert _names(other_index.search('kavya'))[0] == 'kavya_menon'
+            assert _names(other_index.search('smithers'))[0] == 'jon_smithers'
+            assert other_index._built_at == built_at
+
+            # Changes that expired from the cache force a rebuild, which still sees them
+            db.session.get(User, user.id).username = 'kavya_iyer'
+            db.session.commit()
+            shared_cache.delete(CHANGE_KEY.format(shared_cache.get('patient_search:change_seq')))
+            assert _names(other_index.search('kavya iyer'))[0] == 'kavya_iyer'
+            assert other_index._built_at != built_at
+    finally:
+        patient_search.cache = original_cache
+
+
+if __name__ == '__main__':
+    test_typos_and_phone_fragments_rank_best_match_first()
+    test_ties_break_by_patient_id()
+    test_index_follows_session_writes()
+    test_other_process_writes_are_picked_up_from_the_shared_cache()
+    print('All patient search tests passed')
@@ -0,0 +1,71 @@
+"""
+Treatment export writer tests
+
+write_export_rows() writes to a temporary file and renames it into place;
+two exports of the same file at once each get their own temporary file.
+
+Run with pytest or directly:
+    python test_treatment_export.py
+"""
+
+import csv
+import os
+import shutil
+import tempfile
+
+# Point the app at a scratch database and export directory before it is configured
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('CACHE_TYPE', 'NullCache')
+os.environ.setdefault('EXPORT_DIR', tempfile.mkdtemp(prefix='treatment_export_'))
+
+from main import app
+from services.treatment_export import write_export_rows, export_directory, EXPORT_FIELDS
+
+
+def _rows(count, during=None):
+    """`count` export rows; `during()` runs after the first one is written."""
+    for i in range(count):
+        row = {field: f'{field} {i}' for field in EXPORT_FIELDS}
+        row['medicines'] = [{'name': 'Paracetamol', 'dosage': '500mg'}]
+        yield row
+        if i == 0 and during:
+            during()
+
+
+def test_concurrent_exports_of_the_same_file_do_not_collide():
+    with app.app_context():
+        shutil.rmtree(export_directory(), ignore_errors=True)
+        path = os.path.join(export_directory(), 'treatments_1_same.csv')
+
+        # A second worker exports the same file while the first is half way through
+        def second_export():
+            assert write_export_rows(_rows(5), path) == 5
+
+        assert write_export_rows(_rows(5, during=second_export), path) == 5
+
+        with open(path, newline='', encoding='utf-8') as f:
+            assert len(list(csv.DictReader(f))) == 5
+        assert os.listdir(export_directory()) == ['treatments_1_same.csv']
+
+
+def test_failed_export_leaves_no_temporary_file():
+    with app.app_context():
+        shutil.rmtree(export_directory(), ignore_errors=True)
+        path = os.path.join(export_directory(), 'treatments_2_failed.csv')
+
+        def fail():
+            raise RuntimeError('database went away')
+
+        try:
+            write_export_rows(_rows(5, during=fail), path)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError('export did not fail')
+        assert os.listdir(export_directory()) == []
+
+
+if __name__ == '__main__':
+    test_concurrent_exports_of_the_same_file_do_not_collide()
+    test_failed_export_leaves_no_temporary_file()
+    print('All treatment export tests passed')